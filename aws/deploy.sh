@@ -165,6 +165,8 @@ pip install gunicorn
 
 echo "Creating .env file..."
 cp .env.example .env
+# Requests reach gunicorn through nginx, configured below
+sed -i 's/^TRUSTED_PROXIES=.*/TRUSTED_PROXIES=1/' .env
 
 echo "Setting up systemd service..."
 sudo tee /etc/systemd/system/nonprofit-coach.service > /dev/null << 'EOF'
@@ -177,7 +179,7 @@ Type=simple
 User=ubuntu
 WorkingDirectory=/home/ubuntu/nonprofit/nonprofit_coach
 Environment="PATH=/home/ubuntu/nonprofit/nonprofit_coach/venv/bin"
-ExecStart=/home/ubuntu/nonprofit/nonprofit_coach/venv/bin/gunicorn -w 4 -b 0.0.0.0:5001 app:app
+ExecStart=/home/ubuntu/nonprofit/nonprofit_coach/venv/bin/gunicorn -b 127.0.0.1:5001 app:app
 Restart=always
 
 [Install]
@@ -190,6 +192,14 @@ server {
     listen 80;
     server_name _;
 
+    # Serve static files straight from disk with sendfile(2) instead of
+    # copying them through a gunicorn worker
+    location /static/ {
+        alias /home/ubuntu/nonprofit/nonprofit_coach/static/;
+        sendfile on;
+        tcp_nopush on;
+    }
+
     location / {
         proxy_pass http://127.0.0.1:5001;
         proxy_set_header Host $host;
@@ -1,9 +1,14 @@
 import os
+import asyncio
+import hashlib
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 from uuid import uuid4
 import openai
+from tenacity import (
+    retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+)
 from models.image_generation import (
     ImageRequest, ImageGenerationResponse, GeneratedImage, 
     ImageType, ImageStyle
@@ -18,6 +23,13 @@ DALLE_MODEL = os.getenv("DALLE_MODEL", "dall-e-3")
 DALLE_SIZE = os.getenv("DALLE_SIZE", "1024x1024")
 DALLE_QUALITY = os.getenv("DALLE_QUALITY", "standard")
 
+# Errors worth retrying: rate limits (429), dropped connections and 5xx responses
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
 
 class ImageService:
     """Service for AI-powered image generation using DALL-E."""
@@ -25,11 +37,15 @@ class ImageService:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.client = None
+        # In-flight DALL-E calls keyed by prompt, so identical concurrent
+        # requests share one generation instead of paying for two
+        self._inflight: Dict[str, asyncio.Future] = {}
         
         # Only initialize OpenAI client if API key is properly set
         if self.api_key and self.api_key != "your-openai-api-key-here":
             try:
-                self.client = openai.OpenAI(api_key=self.api_key)
+                # Retries are handled by _call_dalle
+                self.client = openai.OpenAI(api_key=self.api_key, max_retries=0)
             except Exception as e:
                 logger.warning(f"Failed to initialize OpenAI client: {e}")
                 self.client = None
@@ -45,17 +61,8 @@ class ImageService:
             
             logger.info(f"Generating {request.image_type} image for user {request.user_id}")
             
-            # Call DALL-E API
-            response = self.client.images.generate(
-                model=DALLE_MODEL,
-                prompt=prompt,
-                size=DALLE_SIZE,
-                quality=DALLE_QUALITY,
-                n=1
-            )
-            
-            # Extract image data
-            image_data = response.data[0]
+            # Call DALL-E API, joining an identical in-flight request if any
+            image_data = await self._generate_single_flight(prompt)
             
             # Create image object
             now = datetime.utcnow()
@@ -93,6 +100,52 @@ class ImageService:
                 error_message=f"Image generation failed: {str(e)}"
             )
     
+    async def _generate_single_flight(self, prompt: str):
+        """Run one DALL-E call per distinct prompt; concurrent callers await it."""
+        key = self._cache_key(prompt)
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            # The OpenAI client is synchronous; keep it off the event loop
+            image_data = await asyncio.to_thread(self._call_dalle, prompt)
+            future.set_result(image_data)
+            return image_data
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    @retry(
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        wait=wait_exponential(multiplier=1, max=20),
+        stop=stop_after_attempt(3),
+        reraise=True
+    )
+    def _call_dalle(self, prompt: str):
+        """Call the DALL-E API, retrying with exponential backoff on 429/5xx."""
+        response = self.client.images.generate(
+            model=DALLE_MODEL,
+            prompt=prompt,
+            size=DALLE_SIZE,
+            quality=DALLE_QUALITY,
+            n=1
+        )
+        return response.data[0]
+    
+    @staticmethod
+    def _cache_key(prompt: str) -> str:
+        """Build a stable key for a prompt and the current DALL-E settings."""
+        raw = f"{DALLE_MODEL}|{DALLE_SIZE}|{DALLE_QUALITY}|{prompt}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
     def _create_dalle_prompt(self, request: ImageRequest) -> str:
         """Create a detailed prompt for DALL-E based on the request."""
         
@@ -5,9 +5,10 @@ This creates a standalone executable with all dependencies bundled
 """
 
 import sys
-from PyInstaller.utils.hooks import collect_data_files, collect_submodules
 
-block_cipher = None
+# UPX-compressed binaries must be decompressed at launch and break code
+# signing on macOS, so only compress on Windows
+use_upx = sys.platform == 'win32'
 
 # Collect all data files
 datas = [
@@ -24,10 +25,19 @@ hiddenimports = [
     'dotenv',
     'sqlite3',
     'gunicorn',
+    # Search provider modules imported at runtime by search_config
+    'search_providers',
+    'search_providers.base',
+    'search_providers.brave',
 ]
 
-# Add search provider modules
-hiddenimports.extend(collect_submodules('nonprofit_coach.search_providers'))
+# Test and GUI modules never used by the bundled app
+excludes = [
+    'pytest',
+    'tests',
+    'tkinter',
+    'unittest',
+]
 
 a = Analysis(
     ['nonprofit_coach/app.py'],
@@ -38,27 +48,25 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
-    win_no_prefer_redirects=False,
-    win_private_assemblies=False,
-    cipher=block_cipher,
+    excludes=excludes,
     noarchive=False,
+    # Strip docstrings and asserts from bundled bytecode (PyInstaller 6+)
+    optimize=2,
 )
 
-pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+pyz = PYZ(a.pure)
 
 exe = EXE(
     pyz,
     a.scripts,
     a.binaries,
-    a.zipfiles,
     a.datas,
     [],
     name='NonprofitIdeaCoach',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=use_upx,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,
@@ -15,28 +15,35 @@ APP_DESCRIPTION = "AI-powered nonprofit idea development and planning tool"
 ROOT_DIR = Path(__file__).parent.parent
 APP_DIR = ROOT_DIR / "nonprofit_coach"
 
+# Data directories to bundle, mapped to the file suffix to include (None = all files)
+DATA_DIRS = {
+    "templates": ".html",
+    "static": None,
+    "search_providers": ".py",
+}
+
 def get_data_files():
     """Collect all data files to include in the installer"""
-    data_files = []
-    
-    # Templates
-    templates = []
-    for file in (APP_DIR / "templates").glob("*.html"):
-        templates.append(str(file))
-    data_files.append(("templates", templates))
+    buckets = {name: [] for name in DATA_DIRS}
     
-    # Static files
-    static_files = []
-    for file in (APP_DIR / "static").glob("*"):
-        if file.is_file():
-            static_files.append(str(file))
-    data_files.append(("static", static_files))
+    # One scandir pass over the app dir; DirEntry.is_file() reuses the cached
+    # dirent type instead of stat()ing every file again
+    with os.scandir(APP_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name not in DATA_DIRS:
+                continue
+            if not entry.is_dir():
+                continue
+            
+            suffix = DATA_DIRS[entry.name]
+            with os.scandir(entry.path) as files:
+                for file in files:
+                    if not file.is_file():
+                        continue
+                    if suffix is None or file.name.endswith(suffix):
+                        buckets[entry.name].append(file.path)
     
-    # Search providers
-    search_providers = []
-    for file in (APP_DIR / "search_providers").glob("*.py"):
-        search_providers.append(str(file))
-    data_files.append(("search_providers", search_providers))
+    data_files = [(name, sorted(buckets[name])) for name in DATA_DIRS]
     
     # Config files
     config_files = [
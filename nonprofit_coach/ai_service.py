@@ -3,217 +3,1759 @@ AI Service for Nonprofit Idea Coach
 Handles all interactions with Claude API for content generation and follow-up questions.
 """
 
-import anthropic
-from typing import Dict, List, Optional, TYPE_CHECKING
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import httpx
+import io
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict
+from content_formatter import ContentFormatter
+from semantic_cache import SemanticCache
+from tenacity import (
+    Retrying, retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+)
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    import anthropic
     from search_service import SearchResults, Organization, Grant, Resource
 
+logger = logging.getLogger(__name__)
+
+# Older SDKs only enable prompt caching behind this beta header
+PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+# Maximum concurrent Claude requests per service, to stay within rate limits
+MAX_CONCURRENT_REQUESTS = 5
+
+# Output token ceilings per content type. Short outputs get small budgets so a
+# runaway generation stops early; anything not listed uses AIService.max_tokens.
+_MAX_TOKENS = MappingProxyType({
+    "follow_up": 128,
+    "email": 700,
+    "flyer": 600,
+    "social_post": 500,
+    "advertisement": 400,
+    "recruiting_pitch": 500,
+    "job_description": 700,
+    "volunteer_form": 300,
+    "grant_proposal": 1500,
+    "donor_letter": 700,
+    "budget_plan": 900,
+    "implementation_steps": 1500,
+    "local_orgs": 700,
+    "resources": 600,
+    "chat": 1024,
+    "history_summary": 300,
+})
+
+# Model per content type. Haiku handles most content; long-form documents
+# where quality matters most go to Sonnet. Anything not listed uses
+# AIService.model.
+_MODELS = MappingProxyType({
+    "grant_proposal": "claude-3-5-sonnet-latest",
+})
+
+# Message Batches polling: how often to check a batch and how long to wait
+BATCH_POLL_INTERVAL = 10
+BATCH_TIMEOUT = 60 * 60
+
+# Maximum number of generated results kept in memory per service
+_MAX_CACHE = 256
+
+# Chat history sent with each turn is kept under this many (estimated) tokens.
+# Older turns are summarized, in steps of _HISTORY_SUMMARY_STEP messages so
+# the summary, and the prompt cache prefix built on it, only changes every
+# few turns.
+_HISTORY_TOKEN_BUDGET = 4000
+_HISTORY_SUMMARY_STEP = 6
+_CHARS_PER_TOKEN = 4
+
+_HISTORY_SUMMARY_PROMPT = "Summarize the conversation you are given between a nonprofit founder and an AI assistant. Keep decisions made, facts about the nonprofit, and open questions. Write at most 150 words of plain text."
+
+# Follow-up answers longer than this are unlikely to repeat, so they skip the cache
+_MAX_CACHED_RESPONSE_CHARS = 500
+
+# The anthropic SDK pulls in pydantic and builds hundreds of models on import,
+# so it is imported on first use rather than when Flask workers boot
+_anthropic = None
+
+
+def _load_anthropic():
+    """Import the anthropic SDK on first use and return it."""
+    global _anthropic
+    if _anthropic is None:
+        import anthropic as _anthropic
+    return _anthropic
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Errors worth retrying: rate limits (429) and server errors (5xx, including
+    529 overloaded). Everything else fails fast.
+    """
+    anthropic = _load_anthropic()
+    return isinstance(error, (anthropic.RateLimitError, anthropic.InternalServerError))
+
+
+# Upper bound on how long a retry-after header can make a request wait
+MAX_RETRY_AFTER = 30
+
+_jittered_backoff = wait_random_exponential(min=0.5, max=8)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """Wait as long as the API's retry-after header asks, else jittered backoff."""
+    error = retry_state.outcome.exception()
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(max(float(retry_after), 0), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return _jittered_backoff(retry_state)
+
+
+# Retry policy for Claude requests. The SDK's own retries are disabled so this
+# is the only place requests are retried.
+_RETRY_POLICY = {
+    "retry": retry_if_exception(_is_retryable),
+    "wait": _wait_retry_after,
+    "stop": stop_after_attempt(4),
+    "reraise": True
+}
+
+# Connection pool settings shared by all Claude HTTP clients
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=60
+)
+
+# Fail fast on unreachable hosts, but allow long generations to complete.
+# The SDK default read timeout is 10 minutes, which ties up a worker thread
+# for far too long when a request hangs.
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Claude clients and services are shared per API key, and all clients share
+# one HTTP connection pool, so requests reuse keep-alive connections instead
+# of paying a TCP + TLS handshake each time
+_CLIENT_CACHE: Dict[str, "anthropic.Anthropic"] = {}
+_ASYNC_CLIENT_CACHE: Dict[str, "anthropic.AsyncAnthropic"] = {}
+_SERVICE_CACHE: "OrderedDict[str, AIService]" = OrderedDict()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_cache_lock = threading.Lock()
+
+# Services kept for the most recently used API keys. Users can bring their
+# own keys, so older services (and their caches) are dropped past this.
+_MAX_SERVICES = 64
+
+
+def _http2_available() -> bool:
+    """Check whether httpx can negotiate HTTP/2 (requires the h2 package)."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the shared sync HTTP client. Caller must hold _cache_lock."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(http2=_http2_available(), limits=HTTP_LIMITS)
+    return _http_client
+
+
+def _get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client. Caller must hold _cache_lock."""
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = httpx.AsyncClient(http2=_http2_available(), limits=HTTP_LIMITS)
+    return _async_http_client
+
+
+def _get_client(api_key: str) -> "anthropic.Anthropic":
+    """Return the shared sync Claude client for an API key."""
+    with _cache_lock:
+        client = _CLIENT_CACHE.get(api_key)
+        if client is None:
+            client = _load_anthropic().Anthropic(
+                api_key=api_key,
+                max_retries=0,
+                timeout=HTTP_TIMEOUT,
+                http_client=_get_http_client()
+            )
+            _CLIENT_CACHE[api_key] = client
+        return client
+
+
+def _get_async_client(api_key: str) -> "anthropic.AsyncAnthropic":
+    """Return the shared async Claude client for an API key."""
+    with _cache_lock:
+        client = _ASYNC_CLIENT_CACHE.get(api_key)
+        if client is None:
+            client = _load_anthropic().AsyncAnthropic(
+                api_key=api_key,
+                max_retries=0,
+                timeout=HTTP_TIMEOUT,
+                http_client=_get_async_http_client()
+            )
+            _ASYNC_CLIENT_CACHE[api_key] = client
+        return client
+
+
+# Background event loop used to run async Claude calls from sync Flask code
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use."""
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_event_loop.run_forever,
+                name="ai-service-loop",
+                daemon=True
+            ).start()
+        return _event_loop
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+    
+    A single long-lived loop lets the async client keep its connection
+    pool between calls, which asyncio.run() per request would discard.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+
+# ============================================================
+# PROMPT TEMPLATES
+# ============================================================
+
+# Limits on user-supplied text interpolated into prompts. Longer input adds
+# input tokens (cost and prefill latency) without improving the output.
+_MAX_RESPONSE_CHARS = 2000
+_MAX_CONTEXT_CHARS_PER_KEY = 500
+
+_QUESTIONNAIRE_SYSTEM_PROMPT = """You are a supportive nonprofit coach helping someone develop their cause-based idea into a detailed nonprofit plan.
+
+Your role is to:
+- Ask thoughtful follow-up questions that encourage deeper thinking
+- Help users articulate their vision clearly
+- Be encouraging and supportive
+- Keep questions concise and focused
+- Guide them to provide specific, actionable details
+
+Remember: You're helping them refine their idea, not judging it."""
+
+# Role and guidelines appended to the system prompt for each section.
+# Prompt tables are read-only views so they are built once and never mutated.
+_SECTION_GUIDANCE = MappingProxyType({
+    'marketing': """
+Your role: Help create compelling marketing materials (emails, flyers, social posts, ads) that communicate the nonprofit's mission and inspire action.
+
+Guidelines:
+- Use clear, compelling language
+- Focus on the impact and beneficiaries
+- Include clear calls-to-action
+- Keep tone professional yet warm
+- Tailor content to the specific format requested""",
+    
+    'team': """
+Your role: Help with team building, volunteer recruitment, and organizational structure.
+
+Guidelines:
+- Create compelling recruitment materials
+- Suggest appropriate roles and responsibilities
+- Provide hiring guidance and job descriptions
+- Focus on the skills and passion needed
+- Emphasize the impact volunteers will make""",
+    
+    'funding': """
+Your role: Help develop funding strategies, grant proposals, and donor communications.
+
+Guidelines:
+- Identify appropriate funding sources
+- Create persuasive grant proposals
+- Draft compelling donor communications
+- Provide realistic cost estimates
+- Focus on sustainability and impact""",
+    
+    'research': """
+Your role: Help with implementation planning and research.
+
+Guidelines:
+- Provide detailed, actionable implementation steps
+- Identify relevant local organizations and resources
+- Suggest practical next steps
+- Focus on realistic, achievable goals
+- Provide links and references when helpful"""
+})
+
+# Table-style content types are requested as compact JSON and rendered to HTML
+# by ContentFormatter, so Claude doesn't spend output tokens on markup. Values
+# are the table column labels.
+_STRUCTURED_CONTENT_TYPES = MappingProxyType({
+    'local_orgs': ("Organization", "Description", "Website", "How They Can Help"),
+    'resources': ("Resource", "Description", "Link", "Type"),
+})
+
+_STRUCTURED_OUTPUT_INSTRUCTIONS = (
+    'Respond with ONLY a JSON object, no HTML and no other text, in this shape: '
+    '{{"headline": str, "intro": str, "items": [{{"name": str, "description": str, '
+    '"url": str, "notes": str}}], "closing": str}}. '
+    'In each item, "notes" is {notes}. Use "" for unknown URLs. '
+    'These instructions override any HTML formatting requirements.'
+)
+
+_JSON_RETRY_PROMPT = "Return ONLY valid JSON, no prose."
+
+# Content type specific prompts with HTML formatting guidance
+_CONTENT_PROMPTS = MappingProxyType({
+    # Marketing section
+    'email': "Create a compelling email template for this nonprofit. Include a subject line, greeting, body with clear call-to-action, and closing. Keep it concise (300-400 words). Use HTML formatting with <p> tags for paragraphs and <a> tags for any links.",
+    'flyer': "Create content for a flyer about this nonprofit. Include a catchy headline, key points about the cause, impact statement, and how people can get involved. Format with clear sections using HTML headings (<h3>, <h4>) and lists (<ul>, <ol>).",
+    'social_post': "Create 3 social media posts (one for each: Twitter/X, Facebook, Instagram) promoting this nonprofit. Make them engaging, shareable, and include relevant hashtags. Format each post clearly with line breaks.",
+    'advertisement': "Create advertisement copy for this nonprofit. Include a headline, body copy, and call-to-action. Make it compelling and concise (150-200 words). Use HTML formatting with <strong> for emphasis.",
+    
+    # Team section
+    'recruiting_pitch': "Create a compelling volunteer recruitment pitch. Explain why people should join, what they'll do, and the impact they'll make. Keep it inspiring and specific (200-300 words). Use HTML formatting with <p> tags and <ul> for bullet points. Include clickable links with <a> tags for any resources or sign-up pages.",
+    'job_description': "Create a job description for a key role in this nonprofit. Include role title, responsibilities, qualifications, and what makes this opportunity special. Use HTML formatting with <h3> for sections, <ul> for lists, and <strong> for emphasis.",
+    'volunteer_form': "Create a simple volunteer sign-up form structure. List the fields needed to collect volunteer information and their availability. Format as an HTML list with field names and types.",
+    
+    # Funding section
+    'grant_proposal': "Create a grant proposal outline for this nonprofit. Include: Executive Summary, Problem Statement, Proposed Solution, Budget Overview, and Expected Impact. Be specific and compelling. If search results include grant opportunities, present them in an HTML table with columns for Grant Name, Funder, Amount, Deadline, and Application Link. Use <a> tags for all URLs.",
+    'donor_letter': "Write a letter to potential donors. Explain the cause, why it matters, how their donation will help, and include a clear ask. Keep it personal and compelling (300-400 words). Use HTML formatting with <p> tags for paragraphs.",
+    'budget_plan': "Create a basic budget plan for this nonprofit. Include startup costs, ongoing operational expenses, and funding needs. Provide realistic estimates with explanations. Present the budget as an HTML table with columns for Category, Item, Cost, and Notes. Use proper <table>, <thead>, <tbody> structure.",
+    
+    # Research section
+    'implementation_steps': "Create a detailed, step-by-step implementation plan for this nonprofit. Include 10-15 specific, actionable steps in chronological order. Be practical and realistic. Format as an ordered list (<ol>) with each step clearly numbered. If search results include relevant tools or platforms, present them in an HTML table and include clickable links with <a> tags.",
+    'local_orgs': "Identify specific local organizations, community groups, and resources in the operating location that could help or partner with this nonprofit. Include at least 5-10 organizations, using the search results when available. " + _STRUCTURED_OUTPUT_INSTRUCTIONS.format(notes="how the organization can help"),
+    'resources': "Provide a list of helpful resources for starting this nonprofit. Include websites, tools, organizations, and guides that would be valuable, using the search results when available. " + _STRUCTURED_OUTPUT_INSTRUCTIONS.format(notes="the resource type (tool/guide/platform)")
+})
+
+# Prompt for content types without a specific entry above
+_DEFAULT_CONTENT_PROMPT = "Create {content_type} content for this nonprofit. Use proper HTML formatting with tables for structured data, <a> tags for clickable links, and appropriate semantic HTML elements."
+
+# Appended to the content prompt when refining from chat context
+_REFINE_INSTRUCTIONS = "\n\nPlease refine or adjust the content based on the conversation above. Maintain HTML formatting in your response."
+
+
+# Formatting rules appended to every search-backed section prompt
+_SEARCH_FORMATTING_PROMPT = """FORMATTING REQUIREMENTS:
+- Use HTML tables for comparative data (organizations, grants, tools, resources)
+- Make all URLs clickable with <a href="URL" target="_blank">descriptive text</a>
+- Include citations at the end with [1], [2], etc. markers linking to sources
+- Use <ul> and <ol> for lists
+- Use <strong> for emphasis
+- Use <table>, <thead>, <tbody>, <tr>, <th>, <td> for tables
+- Add CSS class "search-results-table" to tables for styling
+
+TABLE FORMAT EXAMPLE:
+<table class="search-results-table">
+  <thead>
+    <tr>
+      <th>Name</th>
+      <th>Description</th>
+      <th>Website</th>
+    </tr>
+  </thead>
+  <tbody>
+    <tr>
+      <td>Organization Name</td>
+      <td>Brief description</td>
+      <td><a href="https://example.com" target="_blank">Visit Website</a></td>
+    </tr>
+  </tbody>
+</table>
+
+IMPORTANT INSTRUCTIONS:
+- Base your response on the search results provided below
+- Include specific names, URLs, and details from the search results
+- Do not make up information - use only what's in the search results
+- If search results are limited, acknowledge this and supplement with general guidance
+- Always make URLs clickable and properly formatted
+- Present comparative information in tables for easy scanning
+"""
+
+_SEARCH_RESULTS_TEMPLATE = """SEARCH RESULTS:
+You have access to current web search results to provide accurate, up-to-date information.
+
+{search_context}
+"""
+
+
+# Opening line of every section prompt, shared by all ideas and sections
+_SECTION_PERSONA = "You are an AI assistant helping with a nonprofit organization.\n\n"
+
+
+_IDEA_TEMPLATE = """NONPROFIT IDEA DETAILS:
+- Title: {title}
+- Description: {description}
+- Why it matters: {importance}
+- Target beneficiaries: {beneficiaries}
+- Implementation approach: {implementation}
+- Significance: {significance}
+- What makes it unique: {uniqueness}
+- Operating location: {location}
+
+"""
+
+
+def _safe_defaults(idea_summary: Dict) -> Dict:
+    """
+    Return the idea's values ready for template formatting.
+    
+    Long text is truncated, and missing fields read as 'N/A' (or 'Untitled'
+    for the title).
+    """
+    values = defaultdict(lambda: "N/A", {
+        key: str(value)[:_MAX_CONTEXT_CHARS_PER_KEY] if isinstance(value, str) else value
+        for key, value in idea_summary.items()
+    })
+    values.setdefault("title", "Untitled")
+    return values
+
+
+def _format_idea(idea_summary: Dict) -> str:
+    """Format the idea details block of a section prompt."""
+    return _IDEA_TEMPLATE.format_map(_safe_defaults(idea_summary))
+
+
+def _format_section(section: str) -> str:
+    """Format the current-section block of a section prompt."""
+    return f"CURRENT SECTION: {section.upper()}\n" + _SECTION_GUIDANCE.get(section, "")
+
+
+def _cached_block(text: str) -> Dict:
+    """System prompt block marked as a prompt cache breakpoint."""
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+
+@functools.lru_cache(maxsize=None)
+def _build_section_prompt(section: str) -> str:
+    """Build the static part of a section prompt: persona plus section guidance."""
+    return _SECTION_PERSONA + _format_section(section)
+
+
+@functools.lru_cache(maxsize=64)
+def _build_content_prompt(content_type: str) -> str:
+    """
+    Build the user prompt for a content type, falling back to the generic one.
+    
+    The prompt depends only on the content type, so it is built once per type.
+    """
+    prompt = _CONTENT_PROMPTS.get(content_type)
+    if prompt is None:
+        prompt = _DEFAULT_CONTENT_PROMPT.format(content_type=content_type)
+    return prompt
+
+
+@functools.lru_cache(maxsize=256)
+def _build_idea_prompt(idea_items: Tuple) -> str:
+    """
+    Build the idea details part of a section prompt.
+    
+    Cached on the idea's (key, value) pairs, since they stay the same for a
+    whole coaching session.
+    """
+    return _format_idea(dict(idea_items))
+
+
+def _response_text(response) -> str:
+    """
+    Join the text blocks of a Claude response into one stripped string.
+    
+    A response can hold several content blocks, so reading only the first
+    would drop the rest.
+    """
+    buf = io.StringIO()
+    for block in response.content:
+        if block.type == "text":
+            buf.write(block.text)
+    return buf.getvalue().strip()
+
+
+
+def _parse_json_content(text: str) -> Optional[Dict]:
+    """Parse a JSON object from a response, tolerating code fences or stray prose."""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _render_content(content_type: str, text: str) -> Optional[str]:
+    """
+    Turn response text into stored content.
+    
+    Structured content types are parsed and rendered to HTML; returns None if
+    their JSON is invalid. Other types pass through unchanged.
+    """
+    columns = _STRUCTURED_CONTENT_TYPES.get(content_type)
+    if columns is None:
+        return text
+    data = _parse_json_content(text)
+    if data is None:
+        return None
+    return ContentFormatter.format_structured_content(data, columns)
+
+def _hash_key(*parts) -> str:
+    """
+    Stable 128-bit BLAKE2b digest of JSON-serializable parts.
+    
+    Used for the result cache keys and for spotting duplicate requests in
+    flight. The keys only need to be unique, not cryptographically strong.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _api_errors() -> Tuple[type, ...]:
+    """Claude API errors that service methods report as AIServiceError."""
+    anthropic = _load_anthropic()
+    return (anthropic.APIStatusError, anthropic.APIConnectionError)
+
+
+def _service_error(error: Exception) -> "AIServiceError":
+    """Convert a Claude API error, keeping rate limits distinguishable."""
+    if isinstance(error, _load_anthropic().RateLimitError):
+        retry_after = None
+        try:
+            retry_after = float(error.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+        return AIServiceRateLimited(f"Claude API rate limited: {str(error)}", retry_after)
+    return AIServiceError(f"Claude API error: {str(error)}")
+
+
+def _translate_errors(fn):
+    """
+    Wrap a service method so Claude API failures surface as AIServiceError.
+    
+    Works for both plain and coroutine methods. Only API errors are
+    translated; bugs and cancellation propagate unchanged.
+    """
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except _api_errors() as e:
+                raise _service_error(e) from e
+        return async_wrapper
+    
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except _api_errors() as e:
+            raise _service_error(e) from e
+    return wrapper
+
+
+def _log_metrics(metrics: Dict):
+    """Default metrics hook: log one line per Claude call."""
+    logger.info(
+        "Claude call: section=%s content_type=%s model=%s ttft_ms=%.0f total_ms=%.0f "
+        "input=%s output=%s cache_read=%s cache_creation=%s cache_hit_ratio=%.2f",
+        metrics["section"],
+        metrics["content_type"],
+        metrics["model"],
+        metrics["ttft_ms"],
+        metrics["total_ms"],
+        metrics["input_tokens"],
+        metrics["output_tokens"],
+        metrics["cache_read_input_tokens"],
+        metrics["cache_creation_input_tokens"],
+        metrics["cache_hit_ratio"]
+    )
+
+
+class BatchResults(NamedTuple):
+    """Output of a finished Message Batch."""
+    contents: Dict[Tuple[str, str], str]  # (section, content_type) -> content
+    failed: List[str]  # custom_ids of requests that failed
+
 
 class AIService:
     """Wrapper for Claude API with prompt templates for nonprofit coaching."""
     
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        metrics_hook: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Initialize AI service with Claude API key.
+        
+        Args:
+            api_key: Anthropic API key for Claude
+            metrics_hook: Optional callable that receives a dict of timing and
+                token metrics after every Claude call (see _record_metrics).
+                Defaults to logging them at INFO level.
+        """
+        self.client = _get_client(api_key)
+        self.async_client = _get_async_client(api_key)
+        self.model = "claude-3-haiku-20240307"
+        self.max_tokens = 2048
+        # asyncio primitives belong to one loop, so keep a semaphore per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._metrics = metrics_hook or _log_metrics
+        # Generated content for repeated requests with no chat context
+        self._result_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        # Ideas for submitted batches, used to cache their results on arrival
+        self._batch_ideas: Dict[str, Dict] = {}
+        # Optional cache that also matches similar ideas, see semantic_cache.py
+        self.semantic_cache = SemanticCache.from_env()
+        # Futures for requests currently being sent, keyed by _hash_key
+        self._inflight: Dict = {}
+        self._inflight_lock = threading.Lock()
+    
+    def warm_up(self):
+        """
+        Open the connection to the Claude API ahead of the first real request.
+        
+        This is the service's INIT phase: DNS lookup, TCP connect and TLS
+        handshake happen here instead of on the first user-visible call. It
+        sends a plain HEAD request to the API host, so it is not billed.
+        Errors are ignored; a failed warm-up only means the first request
+        pays the connection cost as before.
+        """
+        try:
+            with _cache_lock:
+                http_client = _get_http_client()
+            http_client.head(str(self.client.base_url), timeout=5)
+        except Exception as e:
+            logger.debug("Claude connection warm-up failed: %s", e)
+    
+    @_translate_errors
+    def generate_follow_up_questions(
+        self, 
+        question_type: str, 
+        user_response: str,
+        idea_context: Optional[Dict] = None
+    ) -> str:
+        """
+        Generate follow-up questions during the idea development questionnaire.
+        
+        Args:
+            question_type: Type of question (e.g., 'description', 'importance', 'beneficiaries')
+            user_response: The user's response to the current question
+            idea_context: Optional context from previous responses
+            
+        Returns:
+            AI-generated follow-up question or guidance
+        """
+        cache_key = self._follow_up_cache_key(question_type, user_response, idea_context)
+        if cache_key is not None:
+            cached = self._get_cached_result(cache_key)
+            if cached is not None:
+                return cached
+        
+        system_prompt = self._get_questionnaire_system_prompt()
+        user_prompt = self._get_follow_up_prompt(question_type, user_response, idea_context)
+        
+        response = self._create_message(
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+            max_tokens=_MAX_TOKENS["follow_up"],
+            labels={"content_type": "follow_up"}
+        )
+        
+        content = _response_text(response)
+        if cache_key is not None:
+            self._cache_result(cache_key, content)
+        return content
+    
+    @_translate_errors
+    def generate_section_content(
+        self,
+        idea_summary: Dict,
+        section: str,
+        content_type: str,
+        chat_context: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Generate content for a specific section (marketing, team, funding, research).
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section: Section name ('marketing', 'team', 'funding', 'research')
+            content_type: Type of content to generate (e.g., 'email', 'flyer', 'grant_proposal')
+            chat_context: Optional chat history for iterative refinement
+            
+        Returns:
+            AI-generated content
+        """
+        # Live chats refine earlier output, so only plain generations are cached
+        cache_key = None
+        if not chat_context:
+            cache_key = _hash_key(idea_summary, section, content_type)
+            cached = self._get_cached_result(cache_key)
+            if cached is None:
+                cached = self._semantic_get(section, content_type, idea_summary)
+            if cached is not None:
+                return cached
+        
+        system_prompt = self._get_section_system_prompt(idea_summary, section)
+        user_prompt = self._get_content_prompt(section, content_type, chat_context)
+        
+        content = self._generate_content(system_prompt, user_prompt, section, content_type)
+        if cache_key is not None:
+            self._cache_result(cache_key, content)
+            self._semantic_set(section, content_type, idea_summary, content)
+        return content
+    
+    @_translate_errors
+    def generate_section_content_with_search(
+        self,
+        idea_summary: Dict,
+        section: str,
+        content_type: str,
+        search_results: Optional['SearchResults'] = None,
+        chat_context: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Generate content with search results integrated into the prompt.
+        Falls back to standard generation if search_results is None.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section: Section name ('marketing', 'team', 'funding', 'research')
+            content_type: Type of content to generate (e.g., 'email', 'flyer', 'grant_proposal')
+            search_results: Optional SearchResults object with web search data
+            chat_context: Optional chat history for iterative refinement
+            
+        Returns:
+            AI-generated content enhanced with search results
+        """
+        # Fall back to standard generation if no search results
+        if search_results is None:
+            return self.generate_section_content(
+                idea_summary, section, content_type, chat_context
+            )
+        
+        cache_key = None
+        if not chat_context:
+            cache_key = _hash_key(
+                idea_summary, section, content_type,
+                search_results.query,
+                [result.url for result in search_results.results]
+            )
+            cached = self._get_cached_result(cache_key)
+            if cached is None:
+                cached = self._semantic_get(
+                    section, content_type, idea_summary, "search"
+                )
+            if cached is not None:
+                return cached
+        
+        # Use enhanced system prompt with search context
+        system_prompt = self._get_enhanced_system_prompt(
+            idea_summary, section, search_results
+        )
+        user_prompt = self._get_content_prompt(section, content_type, chat_context)
+        
+        content = self._generate_content(system_prompt, user_prompt, section, content_type)
+        if cache_key is not None:
+            self._cache_result(cache_key, content)
+            self._semantic_set(
+                section, content_type, idea_summary, content, "search"
+            )
+        return content
+    
+    @_translate_errors
+    def chat_with_context(
+        self,
+        idea_summary: Dict,
+        section: str,
+        user_message: str,
+        chat_history: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Handle chat interactions within a section with full idea context.
+        
+        Args:
+            idea_summary: Complete idea information
+            section: Current section ('marketing', 'team', 'funding', 'research')
+            user_message: User's chat message
+            chat_history: Previous chat messages
+            
+        Returns:
+            AI response
+        """
+        cached = self._semantic_get_chat(
+            idea_summary, section, chat_history, user_message
+        )
+        if cached is not None:
+            return cached
+        
+        system_prompt, messages = self._build_chat_request(
+            idea_summary, section, user_message, chat_history
+        )
+        
+        response = self._create_message(
+            system=system_prompt,
+            messages=messages,
+            max_tokens=_MAX_TOKENS["chat"],
+            labels={"section": section, "content_type": "chat"}
+        )
+        
+        reply = _response_text(response)
+        self._semantic_set_chat(
+            idea_summary, section, chat_history, user_message, reply
+        )
+        return reply
+    
+    @_translate_errors
+    async def agenerate_follow_up_questions(
+        self,
+        question_type: str,
+        user_response: str,
+        idea_context: Optional[Dict] = None
+    ) -> str:
+        """
+        Async version of generate_follow_up_questions.
+        
+        Args:
+            question_type: Type of question (e.g., 'description', 'importance', 'beneficiaries')
+            user_response: The user's response to the current question
+            idea_context: Optional context from previous responses
+            
+        Returns:
+            AI-generated follow-up question or guidance
+        """
+        cache_key = self._follow_up_cache_key(question_type, user_response, idea_context)
+        if cache_key is not None:
+            cached = self._get_cached_result(cache_key)
+            if cached is not None:
+                return cached
+        
+        system_prompt = self._get_questionnaire_system_prompt()
+        user_prompt = self._get_follow_up_prompt(question_type, user_response, idea_context)
+        
+        response = await self._acreate_message(
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+            max_tokens=_MAX_TOKENS["follow_up"],
+            labels={"content_type": "follow_up"}
+        )
+        
+        content = _response_text(response)
+        if cache_key is not None:
+            self._cache_result(cache_key, content)
+        return content
+    
+    @_translate_errors
+    async def agenerate_section_content(
+        self,
+        idea_summary: Dict,
+        section: str,
+        content_type: str,
+        chat_context: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Async version of generate_section_content.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section: Section name ('marketing', 'team', 'funding', 'research')
+            content_type: Type of content to generate (e.g., 'email', 'flyer', 'grant_proposal')
+            chat_context: Optional chat history for iterative refinement
+            
+        Returns:
+            AI-generated content
+        """
+        cache_key = None
+        if not chat_context:
+            cache_key = _hash_key(idea_summary, section, content_type)
+            cached = self._get_cached_result(cache_key)
+            if cached is None:
+                # Embedding the idea is CPU-bound, so keep it off the event loop
+                cached = await asyncio.to_thread(
+                    self._semantic_get, section, content_type, idea_summary
+                )
+            if cached is not None:
+                return cached
+        
+        system_prompt = self._get_section_system_prompt(idea_summary, section)
+        user_prompt = self._get_content_prompt(section, content_type, chat_context)
+        
+        content = await self._agenerate_content(system_prompt, user_prompt, section, content_type)
+        if cache_key is not None:
+            self._cache_result(cache_key, content)
+            await asyncio.to_thread(
+                self._semantic_set, section, content_type, idea_summary, content
+            )
+        return content
+    
+    @_translate_errors
+    async def achat_with_context(
+        self,
+        idea_summary: Dict,
+        section: str,
+        user_message: str,
+        chat_history: Optional[List[Dict]] = None
+    ) -> str:
+        """
+        Async version of chat_with_context.
+        
+        Args:
+            idea_summary: Complete idea information
+            section: Current section ('marketing', 'team', 'funding', 'research')
+            user_message: User's chat message
+            chat_history: Previous chat messages
+            
+        Returns:
+            AI response
+        """
+        cached = await asyncio.to_thread(
+            self._semantic_get_chat, idea_summary, section, chat_history, user_message
+        )
+        if cached is not None:
+            return cached
+        
+        # Summarizing long histories makes a blocking Claude call
+        system_prompt, messages = await asyncio.to_thread(
+            self._build_chat_request, idea_summary, section, user_message, chat_history
+        )
+        
+        response = await self._acreate_message(
+            system=system_prompt,
+            messages=messages,
+            max_tokens=_MAX_TOKENS["chat"],
+            labels={"section": section, "content_type": "chat"}
+        )
+        
+        reply = _response_text(response)
+        await asyncio.to_thread(
+            self._semantic_set_chat, idea_summary, section, chat_history, user_message, reply
+        )
+        return reply
+    
+    async def agenerate_many_sections(
+        self,
+        idea_summary: Dict,
+        section_specs: List[Tuple[str, str]]
+    ) -> Dict[str, str]:
+        """
+        Generate several pieces of section content concurrently.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section_specs: List of (section, content_type) pairs
+            
+        Returns:
+            Dictionary mapping content_type to generated content
+        """
+        contents = await asyncio.gather(*[
+            self.agenerate_section_content(idea_summary, section, content_type)
+            for section, content_type in section_specs
+        ])
+        
+        return {
+            content_type: content
+            for (_, content_type), content in zip(section_specs, contents)
+        }
+    
+    def generate_many_sections(
+        self,
+        idea_summary: Dict,
+        section_specs: List[Tuple[str, str]]
+    ) -> Dict[str, str]:
+        """
+        Generate several pieces of section content concurrently from sync code.
+        
+        Overlaps the Claude round-trips, so the total wait is roughly that of
+        the slowest request rather than the sum of all of them.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section_specs: List of (section, content_type) pairs
+            
+        Returns:
+            Dictionary mapping content_type to generated content
+        """
+        return run_async(self.agenerate_many_sections(idea_summary, section_specs))
+    
+    @_translate_errors
+    def submit_batch(
+        self,
+        idea_summary: Dict,
+        section_specs: List[Tuple[str, str]]
+    ) -> str:
+        """
+        Submit several pieces of section content as one Message Batch.
+        
+        Batches are billed at half price but can take minutes to finish, so
+        use this for non-interactive work such as generating every section
+        at once. Collect the output later with get_batch_results.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section_specs: List of (section, content_type) pairs
+            
+        Returns:
+            Batch ID
+        """
+        requests = []
+        for section, content_type in section_specs:
+            params = self._message_params(
+                system=self._get_section_system_prompt(idea_summary, section),
+                messages=[{
+                    "role": "user",
+                    "content": self._get_content_prompt(section, content_type)
+                }],
+                max_tokens=self._max_tokens_for(content_type),
+                model=self._model_for(content_type)
+            )
+            params.pop("extra_headers")
+            requests.append({"custom_id": f"{section}-{content_type}", "params": params})
+        
+        batch = self.client.messages.batches.create(requests=requests)
+        with self._result_cache_lock:
+            self._batch_ideas[batch.id] = idea_summary
+        return batch.id
+    
+    @_translate_errors
+    def get_batch_results(self, batch_id: str) -> Optional[BatchResults]:
+        """
+        Fetch the output of a batch created by submit_batch.
+        
+        Results are also stored in the result cache when the batch was
+        submitted by this service, so later calls to generate_section_content
+        for the same inputs return immediately.
+        
+        Args:
+            batch_id: ID returned by submit_batch
+            
+        Returns:
+            BatchResults with the content of each request that succeeded and
+            the custom_ids of those that failed, or None while the batch is
+            still processing
+        """
+        batch = self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+        
+        # The batch is finished either way, so stop tracking it
+        with self._result_cache_lock:
+            idea_summary = self._batch_ideas.pop(batch_id, None)
+        
+        contents = {}
+        failed = []
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                self._log_usage(entry.result.message.usage)
+                section, content_type = entry.custom_id.split("-", 1)
+                content = _render_content(content_type, _response_text(entry.result.message))
+                if content is None:
+                    failed.append(entry.custom_id)
+                else:
+                    contents[(section, content_type)] = content
+            else:
+                failed.append(entry.custom_id)
+        
+        if failed:
+            logger.warning("Batch %s had %d failed request(s): %s",
+                           batch_id, len(failed), ", ".join(failed))
+        
+        if idea_summary is not None:
+            for (section, content_type), content in contents.items():
+                self._cache_result(
+                    _hash_key(idea_summary, section, content_type),
+                    content
+                )
+        return BatchResults(contents, failed)
+    
+    @_translate_errors
+    def batch_generate_sections(
+        self,
+        idea_summary: Dict,
+        section_specs: List[Tuple[str, str]],
+        poll_interval: float = BATCH_POLL_INTERVAL,
+        timeout: float = BATCH_TIMEOUT
+    ) -> Dict[str, str]:
+        """
+        Generate several pieces of section content as one Message Batch and wait for it.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section_specs: List of (section, content_type) pairs
+            poll_interval: Seconds between batch status checks
+            timeout: Seconds to wait for the batch before cancelling it
+            
+        Returns:
+            Dictionary mapping content_type to generated content
+            
+        Raises:
+            AIServiceError: If the batch times out or any request in it fails
+        """
+        batch_id = self.submit_batch(idea_summary, section_specs)
+        deadline = time.monotonic() + timeout
+        while True:
+            results = self.get_batch_results(batch_id)
+            if results is not None:
+                break
+            if time.monotonic() >= deadline:
+                self.client.messages.batches.cancel(batch_id)
+                raise AIServiceError(f"Batch {batch_id} did not finish within {timeout}s")
+            time.sleep(poll_interval)
+        
+        if results.failed:
+            raise AIServiceError(
+                f"Batch {batch_id} had {len(results.failed)} failed request(s): "
+                f"{', '.join(results.failed)}"
+            )
+        return {
+            content_type: content
+            for (section, content_type), content in results.contents.items()
+        }
+    
+    def stream_section_content(
+        self,
+        idea_summary: Dict,
+        section: str,
+        content_type: str,
+        chat_context: Optional[List[Dict]] = None,
+        search_results: Optional['SearchResults'] = None
+    ) -> Iterator[str]:
+        """
+        Stream section content from Claude as text chunks arrive.
+        
+        Streaming counterpart of generate_section_content_with_search; uses
+        the search-enhanced system prompt when search_results is provided.
+        Content found in the result or semantic cache is yielded as one
+        chunk, and streamed content is cached once the stream completes.
+        
+        Args:
+            idea_summary: Complete idea information from questionnaire
+            section: Section name ('marketing', 'team', 'funding', 'research')
+            content_type: Type of content to generate (e.g., 'email', 'flyer', 'grant_proposal')
+            chat_context: Optional chat history for iterative refinement
+            search_results: Optional SearchResults object with web search data
+            
+        Yields:
+            Chunks of AI-generated content
+            
+        Raises:
+            AIServiceError: If the Claude API call fails
+        """
+        if content_type in _STRUCTURED_CONTENT_TYPES:
+            # Structured content is JSON until rendered, so it can't be
+            # shown incrementally; send the rendered HTML as one chunk
+            yield self.generate_section_content_with_search(
+                idea_summary, section, content_type, search_results, chat_context
+            )
+            return
+        
+        # Same caches as generate_section_content_with_search, so a repeat
+        # request is sent whole instead of paying for a new generation
+        cache_key = None
+        if not chat_context:
+            if search_results is None:
+                cache_key = _hash_key(idea_summary, section, content_type)
+                variant = ""
+            else:
+                cache_key = _hash_key(
+                    idea_summary, section, content_type,
+                    search_results.query,
+                    [result.url for result in search_results.results]
+                )
+                variant = "search"
+            cached = self._get_cached_result(cache_key)
+            if cached is None:
+                cached = self._semantic_get(section, content_type, idea_summary, variant)
+            if cached is not None:
+                yield cached
+                return
+        
+        if search_results is None:
+            system_prompt = self._get_section_system_prompt(idea_summary, section)
+        else:
+            system_prompt = self._get_enhanced_system_prompt(
+                idea_summary, section, search_results
+            )
+        user_prompt = self._get_content_prompt(section, content_type, chat_context)
+        
+        chunks = []
+        for text in self._stream_message(
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+            max_tokens=self._max_tokens_for(content_type),
+            labels={"section": section, "content_type": content_type},
+            model=self._model_for(content_type)
+        ):
+            chunks.append(text)
+            yield text
+        
+        if cache_key is not None:
+            content = "".join(chunks)
+            self._cache_result(cache_key, content)
+            self._semantic_set(section, content_type, idea_summary, content, variant)
+    
+    def stream_chat(
+        self,
+        idea_summary: Dict,
+        section: str,
+        user_message: str,
+        chat_history: Optional[List[Dict]] = None
+    ) -> Iterator[str]:
+        """
+        Stream a chat response as text chunks arrive.
+        
+        Args:
+            idea_summary: Complete idea information
+            section: Current section ('marketing', 'team', 'funding', 'research')
+            user_message: User's chat message
+            chat_history: Previous chat messages
+            
+        Yields:
+            Chunks of the AI response
+            
+        Raises:
+            AIServiceError: If the Claude API call fails
+        """
+        system_prompt, messages = self._build_chat_request(
+            idea_summary, section, user_message, chat_history
+        )
+        
+        yield from self._stream_message(
+            system=system_prompt,
+            messages=messages,
+            max_tokens=_MAX_TOKENS["chat"],
+            labels={"section": section, "content_type": "chat"}
+        )
+    
+    def _generate_content(
+        self,
+        system: Union[str, List[Dict]],
+        user_prompt: str,
+        section: str,
+        content_type: str
+    ) -> str:
+        """
+        Generate section content, rendering structured content types to HTML.
+        
+        If a structured response isn't valid JSON, asks once more for JSON only.
+        """
+        messages = [{"role": "user", "content": user_prompt}]
+        params = {
+            "max_tokens": self._max_tokens_for(content_type),
+            "labels": {"section": section, "content_type": content_type},
+            "model": self._model_for(content_type)
+        }
+        text = _response_text(self._create_message(system=system, messages=messages, **params))
+        content = _render_content(content_type, text)
+        if content is None:
+            messages += [
+                {"role": "assistant", "content": text},
+                {"role": "user", "content": _JSON_RETRY_PROMPT}
+            ]
+            text = _response_text(self._create_message(system=system, messages=messages, **params))
+            content = _render_content(content_type, text)
+            if content is None:
+                raise AIServiceError(f"Claude did not return valid JSON for {content_type}")
+        return content
+    
+    async def _agenerate_content(
+        self,
+        system: Union[str, List[Dict]],
+        user_prompt: str,
+        section: str,
+        content_type: str
+    ) -> str:
+        """Async version of _generate_content."""
+        messages = [{"role": "user", "content": user_prompt}]
+        params = {
+            "max_tokens": self._max_tokens_for(content_type),
+            "labels": {"section": section, "content_type": content_type},
+            "model": self._model_for(content_type)
+        }
+        text = _response_text(await self._acreate_message(system=system, messages=messages, **params))
+        content = _render_content(content_type, text)
+        if content is None:
+            messages += [
+                {"role": "assistant", "content": text},
+                {"role": "user", "content": _JSON_RETRY_PROMPT}
+            ]
+            text = _response_text(await self._acreate_message(system=system, messages=messages, **params))
+            content = _render_content(content_type, text)
+            if content is None:
+                raise AIServiceError(f"Claude did not return valid JSON for {content_type}")
+        return content
+    
+    def _build_chat_request(
+        self,
+        idea_summary: Dict,
+        section: str,
+        user_message: str,
+        chat_history: Optional[List[Dict]] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Build the system blocks and messages for a chat turn.
+        
+        History beyond the token budget is replaced by a summary, which goes
+        into the system prompt since the messages must start with a user turn.
+        
+        Returns:
+            Tuple of (system blocks, messages)
+        """
+        messages = [
+            {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+            for msg in chat_history or []
+        ]
+        dropped, messages = self._trim_history(messages)
+        messages.append({"role": "user", "content": user_message})
+        
+        system = self._get_section_system_prompt(idea_summary, section)
+        if dropped:
+            summary = self._summarize_history(dropped)
+            system.append(_cached_block(f"SUMMARY OF EARLIER CONVERSATION:\n{summary}"))
+        return system, messages
+    
+    def _trim_history(
+        self,
+        messages: List[Dict],
+        max_tokens: int = _HISTORY_TOKEN_BUDGET
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Split chat history into older messages to summarize and recent ones to send.
+        
+        Keeps as many of the newest messages as fit the token budget. The
+        cut point is rounded to _HISTORY_SUMMARY_STEP and moved so the kept
+        messages start with a user turn.
+        
+        Returns:
+            Tuple of (dropped messages, kept messages)
+        """
+        total = 0
+        cut = 0
+        for idx in range(len(messages) - 1, -1, -1):
+            total += len(str(messages[idx]["content"])) // _CHARS_PER_TOKEN + 1
+            if total > max_tokens:
+                cut = idx + 1
+                break
+        
+        if cut:
+            # Round up to the next multiple of the step
+            step = _HISTORY_SUMMARY_STEP
+            cut = min((cut + step - 1) // step * step, len(messages))
+            while cut < len(messages) and messages[cut]["role"] != "user":
+                cut += 1
+        return messages[:cut], messages[cut:]
+    
+    def _summarize_history(self, messages: List[Dict]) -> str:
+        """Summarize older chat turns, reusing the summary while they are unchanged."""
+        cache_key = _hash_key("history_summary", messages)
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        response = self._create_message(
+            system=_HISTORY_SUMMARY_PROMPT,
+            messages=[{"role": "user", "content": transcript}],
+            max_tokens=_MAX_TOKENS["history_summary"],
+            labels={"content_type": "history_summary"}
+        )
+        summary = _response_text(response)
+        self._cache_result(cache_key, summary)
+        return summary
+    
+    # The semantic cache helpers below do nothing when the cache is disabled.
+    # Embedding failures are logged and treated as a miss, so the cache can
+    # never fail a generation.
+    
+    def _semantic_get(
+        self,
+        section: str,
+        content_type: str,
+        idea_summary: Dict,
+        variant: str = ""
+    ) -> Optional[str]:
+        """Look up content for a similar idea; see SemanticCache.get."""
+        if self.semantic_cache is None:
+            return None
+        try:
+            return self.semantic_cache.get(section, content_type, idea_summary, variant)
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed: %s", e)
+            return None
+    
+    def _semantic_set(
+        self,
+        section: str,
+        content_type: str,
+        idea_summary: Dict,
+        content: str,
+        variant: str = ""
+    ):
+        """Store generated content; see SemanticCache.set."""
+        if self.semantic_cache is None:
+            return
+        try:
+            self.semantic_cache.set(section, content_type, idea_summary, content, variant)
+        except Exception as e:
+            logger.warning("Semantic cache store failed: %s", e)
+    
+    def _semantic_get_chat(
+        self,
+        idea_summary: Dict,
+        section: str,
+        chat_history: Optional[List[Dict]],
+        user_message: str
+    ) -> Optional[str]:
+        """Look up a reply to a similar message; see SemanticCache.get_chat."""
+        if self.semantic_cache is None:
+            return None
+        try:
+            return self.semantic_cache.get_chat(idea_summary, section, chat_history, user_message)
+        except Exception as e:
+            logger.warning("Semantic cache chat lookup failed: %s", e)
+            return None
+    
+    def _semantic_set_chat(
+        self,
+        idea_summary: Dict,
+        section: str,
+        chat_history: Optional[List[Dict]],
+        user_message: str,
+        reply: str
+    ):
+        """Store a chat reply; see SemanticCache.set_chat."""
+        if self.semantic_cache is None:
+            return
+        try:
+            self.semantic_cache.set_chat(idea_summary, section, chat_history, user_message, reply)
+        except Exception as e:
+            logger.warning("Semantic cache chat store failed: %s", e)
+    
+    def _follow_up_cache_key(
+        self,
+        question_type: str,
+        user_response: str,
+        idea_context: Optional[Dict]
+    ) -> Optional[str]:
         """
-        Initialize AI service with Claude API key.
+        Result cache key for a follow-up question, or None if it shouldn't be cached.
         
-        Args:
-            api_key: Anthropic API key for Claude
+        Short answers repeat across sessions ("I want to help kids read"), so
+        they are normalized for case and surrounding whitespace.
         """
-        # Initialize client with minimal configuration to avoid compatibility issues
-        self.client = anthropic.Anthropic(
-            api_key=api_key,
-            max_retries=2
-        )
-        self.model = "claude-3-haiku-20240307"
-        self.max_tokens = 2048
+        normalized = str(user_response).strip().lower()
+        if len(normalized) > _MAX_CACHED_RESPONSE_CHARS:
+            return None
+        context = sorted((key, str(value)) for key, value in (idea_context or {}).items() if value)
+        return _hash_key("follow_up", question_type, normalized, context)
     
-    def generate_follow_up_questions(
-        self, 
-        question_type: str, 
-        user_response: str,
-        idea_context: Optional[Dict] = None
-    ) -> str:
+    def _get_cached_result(self, key: str) -> Optional[str]:
+        """Return a cached result and mark it as recently used."""
+        with self._result_cache_lock:
+            content = self._result_cache.get(key)
+            if content is not None:
+                self._result_cache.move_to_end(key)
+            return content
+    
+    def _cache_result(self, key: str, content: str):
+        """Store a result, evicting the least recently used one when full."""
+        with self._result_cache_lock:
+            self._result_cache[key] = content
+            self._result_cache.move_to_end(key)
+            if len(self._result_cache) > _MAX_CACHE:
+                self._result_cache.popitem(last=False)
+    
+    def _max_tokens_for(self, content_type: str) -> int:
+        """Return the output token ceiling for a content type."""
+        return _MAX_TOKENS.get(content_type, self.max_tokens)
+    
+    def _model_for(self, content_type: str) -> str:
+        """Return the model used to generate a content type."""
+        return _MODELS.get(content_type, self.model)
+    
+    def _message_params(
+        self,
+        system: Union[str, List[Dict]],
+        messages: List[Dict],
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None
+    ) -> Dict:
         """
-        Generate follow-up questions during the idea development questionnaire.
+        Build Claude request parameters with the system prompt marked for prompt caching.
+        
+        The system prompt is stable across calls for the same idea and section,
+        so Anthropic can serve it from the prompt cache instead of reprocessing it.
         
         Args:
-            question_type: Type of question (e.g., 'description', 'importance', 'beneficiaries')
-            user_response: The user's response to the current question
-            idea_context: Optional context from previous responses
+            system: System prompt text, or system blocks that already carry
+                their own cache_control markers
+            messages: Conversation messages
+            max_tokens: Output token ceiling, defaults to self.max_tokens
+            model: Model to use, defaults to self.model
             
         Returns:
-            AI-generated follow-up question or guidance
+            Keyword arguments for messages.create / messages.stream
         """
-        try:
-            # Build context from previous responses
-            context_str = ""
-            if idea_context:
-                context_str = f"\n\nPrevious responses:\n"
-                for key, value in idea_context.items():
-                    if value:
-                        context_str += f"- {key}: {value}\n"
-            
-            system_prompt = self._get_questionnaire_system_prompt()
-            user_prompt = f"""The user is answering questions about their nonprofit idea.
-
-Current question type: {question_type}
-User's response: {user_response}{context_str}
-
-Based on their response, generate ONE thoughtful follow-up question that:
-1. Encourages them to think deeper about this aspect
-2. Helps them provide more specific details
-3. Is supportive and encouraging
-4. Is concise (1-2 sentences max)
-
-If their response is already detailed and complete, respond with "Great! Let's move on." instead of asking another question."""
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}]
-            )
-            
-            return response.content[0].text.strip()
-            
-        except anthropic.APIError as e:
-            raise AIServiceError(f"Claude API error: {str(e)}")
-        except Exception as e:
-            raise AIServiceError(f"Unexpected error generating follow-up: {str(e)}")
+        if isinstance(system, str):
+            system = [{
+                "type": "text",
+                "text": system,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        
+        return {
+            "model": model or self.model,
+            "max_tokens": max_tokens or self.max_tokens,
+            "system": system,
+            "messages": messages,
+            "extra_headers": PROMPT_CACHING_HEADERS
+        }
     
-    def generate_section_content(
+    def _create_message(
         self,
-        idea_summary: Dict,
-        section: str,
-        content_type: str,
-        chat_context: Optional[List[Dict]] = None
-    ) -> str:
+        system: Union[str, List[Dict]],
+        messages: List[Dict],
+        max_tokens: Optional[int] = None,
+        labels: Optional[Dict] = None,
+        model: Optional[str] = None
+    ):
         """
-        Generate content for a specific section (marketing, team, funding, research).
+        Send a request to Claude and log its token usage.
+        
+        Identical requests already in flight on another thread share that
+        call's response instead of sending their own.
         
         Args:
-            idea_summary: Complete idea information from questionnaire
-            section: Section name ('marketing', 'team', 'funding', 'research')
-            content_type: Type of content to generate (e.g., 'email', 'flyer', 'grant_proposal')
-            chat_context: Optional chat history for iterative refinement
+            system: System prompt text or system blocks
+            messages: Conversation messages
+            max_tokens: Output token ceiling, defaults to self.max_tokens
+            labels: Extra fields for the metrics hook, e.g. section and content_type
+            model: Model to use, defaults to self.model
             
         Returns:
-            AI-generated content
+            Claude API response
         """
+        params = self._message_params(system, messages, max_tokens, model)
+        key = _hash_key(params)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+        if not leader:
+            return future.result()
+        
         try:
-            system_prompt = self._get_section_system_prompt(idea_summary, section)
-            user_prompt = self._get_content_prompt(section, content_type, chat_context)
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}]
-            )
-            
-            return response.content[0].text.strip()
-            
-        except anthropic.APIError as e:
-            raise AIServiceError(f"Claude API error: {str(e)}")
-        except Exception as e:
-            raise AIServiceError(f"Unexpected error generating content: {str(e)}")
+            response = self._send_message(params, labels)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
     
-    def generate_section_content_with_search(
+    async def _acreate_message(
         self,
-        idea_summary: Dict,
-        section: str,
-        content_type: str,
-        search_results: Optional['SearchResults'] = None,
-        chat_context: Optional[List[Dict]] = None
-    ) -> str:
+        system: Union[str, List[Dict]],
+        messages: List[Dict],
+        max_tokens: Optional[int] = None,
+        labels: Optional[Dict] = None,
+        model: Optional[str] = None
+    ):
         """
-        Generate content with search results integrated into the prompt.
-        Falls back to standard generation if search_results is None.
+        Async version of _create_message, limited to MAX_CONCURRENT_REQUESTS at once.
+        
+        Identical requests already in flight on the same event loop share
+        that call's response.
         
         Args:
-            idea_summary: Complete idea information from questionnaire
-            section: Section name ('marketing', 'team', 'funding', 'research')
-            content_type: Type of content to generate (e.g., 'email', 'flyer', 'grant_proposal')
-            search_results: Optional SearchResults object with web search data
-            chat_context: Optional chat history for iterative refinement
+            system: System prompt text or system blocks
+            messages: Conversation messages
+            max_tokens: Output token ceiling, defaults to self.max_tokens
+            labels: Extra fields for the metrics hook, e.g. section and content_type
+            model: Model to use, defaults to self.model
             
         Returns:
-            AI-generated content enhanced with search results
+            Claude API response
         """
-        # Fall back to standard generation if no search results
-        if search_results is None:
-            return self.generate_section_content(
-                idea_summary, section, content_type, chat_context
-            )
+        loop = asyncio.get_running_loop()
+        params = self._message_params(system, messages, max_tokens, model)
+        # asyncio futures belong to one loop, so the key includes the loop
+        key = (id(loop), _hash_key(params))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = loop.create_future()
+        if not leader:
+            return await asyncio.shield(future)
         
         try:
-            # Use enhanced system prompt with search context
-            system_prompt = self._get_enhanced_system_prompt(
-                idea_summary, section, search_results
-            )
-            user_prompt = self._get_content_prompt(section, content_type, chat_context)
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}]
-            )
-            
-            return response.content[0].text.strip()
-            
-        except anthropic.APIError as e:
-            raise AIServiceError(f"Claude API error: {str(e)}")
+            response = await self._asend_message(params, labels)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    @retry(**_RETRY_POLICY)
+    def _send_message(self, params: Dict, labels: Optional[Dict]):
+        """Call messages.create, retrying transient errors, and record usage."""
+        started = time.perf_counter()
+        response = self.client.messages.create(**params)
+        self._log_usage(response.usage)
+        self._record_metrics(labels, response.usage, started, model=params["model"])
+        return response
+    
+    @retry(**_RETRY_POLICY)
+    async def _asend_message(self, params: Dict, labels: Optional[Dict]):
+        """Async version of _send_message, holding this loop's semaphore."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        async with semaphore:
+            started = time.perf_counter()
+            response = await self.async_client.messages.create(**params)
+        self._log_usage(response.usage)
+        self._record_metrics(labels, response.usage, started, model=params["model"])
+        return response
+    
+    def _log_usage(self, usage):
+        """Log token usage, including prompt cache reads and writes."""
+        logger.debug(
+            "Claude usage: input=%s output=%s cache_read=%s cache_creation=%s",
+            usage.input_tokens,
+            usage.output_tokens,
+            getattr(usage, "cache_read_input_tokens", None),
+            getattr(usage, "cache_creation_input_tokens", None)
+        )
+    
+    def _record_metrics(
+        self,
+        labels: Optional[Dict],
+        usage,
+        started: float,
+        first_token: Optional[float] = None,
+        model: Optional[str] = None
+    ):
+        """
+        Report timing and token usage for one Claude call to the metrics hook.
+        
+        ttft_ms is the time to the first streamed token; for non-streaming
+        calls the whole response arrives at once, so it equals total_ms.
+        Errors raised by the hook are logged and never reach the caller.
+        """
+        finished = time.perf_counter()
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+        prompt_tokens = usage.input_tokens + cache_read + cache_creation
+        
+        metrics = {
+            "section": None,
+            "content_type": None,
+            "model": model or self.model,
+            "ttft_ms": ((first_token or finished) - started) * 1000,
+            "total_ms": (finished - started) * 1000,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_input_tokens": cache_read,
+            "cache_creation_input_tokens": cache_creation,
+            "cache_hit_ratio": cache_read / prompt_tokens if prompt_tokens else 0.0
+        }
+        if labels:
+            metrics.update(labels)
+        
+        try:
+            self._metrics(metrics)
         except Exception as e:
-            raise AIServiceError(f"Unexpected error generating content with search: {str(e)}")
+            logger.warning("Metrics hook failed: %s", e)
     
-    def chat_with_context(
+    def _stream_message(
         self,
-        idea_summary: Dict,
-        section: str,
-        user_message: str,
-        chat_history: Optional[List[Dict]] = None
-    ) -> str:
+        system: Union[str, List[Dict]],
+        messages: List[Dict],
+        max_tokens: Optional[int] = None,
+        labels: Optional[Dict] = None,
+        model: Optional[str] = None
+    ) -> Iterator[str]:
         """
-        Handle chat interactions within a section with full idea context.
+        Stream a Claude response, yielding text chunks as they are generated.
         
         Args:
-            idea_summary: Complete idea information
-            section: Current section ('marketing', 'team', 'funding', 'research')
-            user_message: User's chat message
-            chat_history: Previous chat messages
+            system: System prompt text or system blocks
+            messages: Conversation messages
+            max_tokens: Output token ceiling, defaults to self.max_tokens
+            labels: Extra fields for the metrics hook, e.g. section and content_type
+            model: Model to use, defaults to self.model
             
-        Returns:
-            AI response
+        Yields:
+            Text chunks from the response
+            
+        Raises:
+            AIServiceError: If the Claude API call fails
         """
+        params = self._message_params(system, messages, max_tokens, model)
         try:
-            system_prompt = self._get_section_system_prompt(idea_summary, section)
-            
-            # Build message history
-            messages = []
-            if chat_history:
-                for msg in chat_history:
-                    messages.append({
-                        "role": msg.get("role", "user"),
-                        "content": msg.get("content", "")
-                    })
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=system_prompt,
-                messages=messages
-            )
+            # Only opening the stream is retried; once text has been yielded
+            # a retry would repeat it
+            for attempt in Retrying(**_RETRY_POLICY):
+                with attempt:
+                    started = time.perf_counter()
+                    stream = self.client.messages.create(stream=True, **params)
             
-            return response.content[0].text.strip()
+            first_token = None
+            usage = None
+            with stream:
+                for event in stream:
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        yield event.delta.text
+                    elif event.type == "message_start":
+                        usage = event.message.usage
+                    elif event.type == "message_delta" and usage is not None:
+                        usage.output_tokens = event.usage.output_tokens
             
-        except anthropic.APIError as e:
-            raise AIServiceError(f"Claude API error: {str(e)}")
-        except Exception as e:
-            raise AIServiceError(f"Unexpected error in chat: {str(e)}")
+            if usage is not None:
+                self._log_usage(usage)
+                self._record_metrics(labels, usage, started, first_token, params["model"])
+        except _api_errors() as e:
+            raise _service_error(e) from e
     
     # ============================================================
     # PROMPT TEMPLATES
@@ -221,86 +1763,74 @@ If their response is already detailed and complete, respond with "Great! Let's m
     
     def _get_questionnaire_system_prompt(self) -> str:
         """System prompt for questionnaire follow-up questions."""
-        return """You are a supportive nonprofit coach helping someone develop their cause-based idea into a detailed nonprofit plan.
-
-Your role is to:
-- Ask thoughtful follow-up questions that encourage deeper thinking
-- Help users articulate their vision clearly
-- Be encouraging and supportive
-- Keep questions concise and focused
-- Guide them to provide specific, actionable details
-
-Remember: You're helping them refine their idea, not judging it."""
+        return _QUESTIONNAIRE_SYSTEM_PROMPT
     
-    def _get_section_system_prompt(self, idea_summary: Dict, section: str) -> str:
-        """System prompt that includes idea context for section work."""
-        idea_context = f"""You are an AI assistant helping with a nonprofit organization.
-
-NONPROFIT IDEA DETAILS:
-- Title: {idea_summary.get('title', 'Untitled')}
-- Description: {idea_summary.get('description', 'N/A')}
-- Why it matters: {idea_summary.get('importance', 'N/A')}
-- Target beneficiaries: {idea_summary.get('beneficiaries', 'N/A')}
-- Implementation approach: {idea_summary.get('implementation', 'N/A')}
-- Significance: {idea_summary.get('significance', 'N/A')}
-- What makes it unique: {idea_summary.get('uniqueness', 'N/A')}
-- Operating location: {idea_summary.get('location', 'N/A')}
-
-CURRENT SECTION: {section.upper()}
-"""
+    def _get_follow_up_prompt(
+        self,
+        question_type: str,
+        user_response: str,
+        idea_context: Optional[Dict] = None
+    ) -> str:
+        """User prompt asking for a follow-up question on a questionnaire answer."""
+        # Cap user-supplied text so oversized input can't inflate token usage
+        user_response = str(user_response)[:_MAX_RESPONSE_CHARS]
         
-        section_guidance = {
-            'marketing': """
-Your role: Help create compelling marketing materials (emails, flyers, social posts, ads) that communicate the nonprofit's mission and inspire action.
-
-Guidelines:
-- Use clear, compelling language
-- Focus on the impact and beneficiaries
-- Include clear calls-to-action
-- Keep tone professional yet warm
-- Tailor content to the specific format requested""",
-            
-            'team': """
-Your role: Help with team building, volunteer recruitment, and organizational structure.
+        # Build context from previous responses
+        context_str = ""
+        if idea_context:
+            parts = ["\n\nPrevious responses:"]
+            parts.extend(
+                f"- {key}: {str(value)[:_MAX_CONTEXT_CHARS_PER_KEY]}"
+                for key, value in idea_context.items()
+                if value
+            )
+            context_str = "\n".join(parts) + "\n"
+        
+        return f"""The user is answering questions about their nonprofit idea.
 
-Guidelines:
-- Create compelling recruitment materials
-- Suggest appropriate roles and responsibilities
-- Provide hiring guidance and job descriptions
-- Focus on the skills and passion needed
-- Emphasize the impact volunteers will make""",
-            
-            'funding': """
-Your role: Help develop funding strategies, grant proposals, and donor communications.
+Current question type: {question_type}
+User's response: {user_response}{context_str}
 
-Guidelines:
-- Identify appropriate funding sources
-- Create persuasive grant proposals
-- Draft compelling donor communications
-- Provide realistic cost estimates
-- Focus on sustainability and impact""",
-            
-            'research': """
-Your role: Help with implementation planning and research.
+Based on their response, generate ONE thoughtful follow-up question that:
+1. Encourages them to think deeper about this aspect
+2. Helps them provide more specific details
+3. Is supportive and encouraging
+4. Is concise (1-2 sentences max)
 
-Guidelines:
-- Provide detailed, actionable implementation steps
-- Identify relevant local organizations and resources
-- Suggest practical next steps
-- Focus on realistic, achievable goals
-- Provide links and references when helpful"""
-        }
+If their response is already detailed and complete, respond with "Great! Let's move on." instead of asking another question."""
+    
+    def _get_section_system_prompt(self, idea_summary: Dict, section: str) -> List[Dict]:
+        """
+        System prompt blocks that include idea context for section work.
         
-        return idea_context + section_guidance.get(section, "")
+        The static section block comes first so its cache prefix is shared by
+        every idea working in that section; the per-idea block follows.
+        """
+        return [
+            _cached_block(_build_section_prompt(section)),
+            _cached_block(self._get_idea_prompt(idea_summary))
+        ]
+    
+    def _get_idea_prompt(self, idea_summary: Dict) -> str:
+        """Idea details block, cached when the idea's values are hashable."""
+        try:
+            return _build_idea_prompt(tuple(sorted(idea_summary.items())))
+        except TypeError:
+            # Unhashable or unorderable values; build without caching
+            return _format_idea(idea_summary)
     
     def _get_enhanced_system_prompt(
         self, 
         idea_summary: Dict, 
         section: str,
         search_results: 'SearchResults'
-    ) -> str:
+    ) -> List[Dict]:
         """
-        Create enhanced system prompt with search results context.
+        Create enhanced system prompt blocks with search results context.
+        
+        The static blocks (section guidance and the formatting rules) lead so
+        they form a cache prefix shared across ideas; the idea details and
+        the search results, which change per request, come last.
         
         Args:
             idea_summary: Complete idea information
@@ -308,57 +1838,17 @@ Guidelines:
             search_results: SearchResults object with web search data
             
         Returns:
-            Enhanced system prompt with search context and formatting instructions
+            System prompt blocks with search context and formatting instructions
         """
-        base_prompt = self._get_section_system_prompt(idea_summary, section)
-        
         # Format search results for inclusion in prompt
         search_context = self._format_search_results_for_prompt(search_results)
         
-        enhanced_section = f"""
-
-SEARCH RESULTS:
-You have access to current web search results to provide accurate, up-to-date information.
-
-{search_context}
-
-FORMATTING REQUIREMENTS:
-- Use HTML tables for comparative data (organizations, grants, tools, resources)
-- Make all URLs clickable with <a href="URL" target="_blank">descriptive text</a>
-- Include citations at the end with [1], [2], etc. markers linking to sources
-- Use <ul> and <ol> for lists
-- Use <strong> for emphasis
-- Use <table>, <thead>, <tbody>, <tr>, <th>, <td> for tables
-- Add CSS class "search-results-table" to tables for styling
-
-TABLE FORMAT EXAMPLE:
-<table class="search-results-table">
-  <thead>
-    <tr>
-      <th>Name</th>
-      <th>Description</th>
-      <th>Website</th>
-    </tr>
-  </thead>
-  <tbody>
-    <tr>
-      <td>Organization Name</td>
-      <td>Brief description</td>
-      <td><a href="https://example.com" target="_blank">Visit Website</a></td>
-    </tr>
-  </tbody>
-</table>
-
-IMPORTANT INSTRUCTIONS:
-- Base your response on the search results provided above
-- Include specific names, URLs, and details from the search results
-- Do not make up information - use only what's in the search results
-- If search results are limited, acknowledge this and supplement with general guidance
-- Always make URLs clickable and properly formatted
-- Present comparative information in tables for easy scanning
-"""
-        
-        return base_prompt + enhanced_section
+        return [
+            _cached_block(_build_section_prompt(section)),
+            _cached_block(_SEARCH_FORMATTING_PROMPT),
+            _cached_block(self._get_idea_prompt(idea_summary)),
+            {"type": "text", "text": _SEARCH_RESULTS_TEMPLATE.format(search_context=search_context)}
+        ]
     
     def _format_search_results_for_prompt(self, search_results: 'SearchResults') -> str:
         """
@@ -373,19 +1863,21 @@ IMPORTANT INSTRUCTIONS:
         if not search_results or not search_results.results:
             return "No search results available."
         
-        formatted = f"Query: {search_results.query}\n"
-        formatted += f"Total Results: {search_results.total_results}\n\n"
-        
-        for idx, result in enumerate(search_results.results, 1):
-            formatted += f"[{idx}] {result.title}\n"
-            formatted += f"    URL: {result.url}\n"
-            formatted += f"    Domain: {result.domain}\n"
-            formatted += f"    Snippet: {result.snippet}\n"
-            if result.relevance_score:
-                formatted += f"    Relevance: {result.relevance_score}\n"
-            formatted += "\n"
+        parts = [
+            f"Query: {search_results.query}\n",
+            f"Total Results: {search_results.total_results}\n\n"
+        ]
+        parts.extend(
+            f"[{idx}] {result.title}\n"
+            f"    URL: {result.url}\n"
+            f"    Domain: {result.domain}\n"
+            f"    Snippet: {result.snippet}\n"
+            + (f"    Relevance: {result.relevance_score}\n" if result.relevance_score else "")
+            + "\n"
+            for idx, result in enumerate(search_results.results, 1)
+        )
         
-        return formatted
+        return "".join(parts)
     
     def _get_content_prompt(
         self, 
@@ -395,40 +1887,17 @@ IMPORTANT INSTRUCTIONS:
     ) -> str:
         """Generate specific prompt for content type with HTML formatting instructions."""
         
-        # Content type specific prompts with HTML formatting guidance
-        prompts = {
-            # Marketing section
-            'email': "Create a compelling email template for this nonprofit. Include a subject line, greeting, body with clear call-to-action, and closing. Keep it concise (300-400 words). Use HTML formatting with <p> tags for paragraphs and <a> tags for any links.",
-            'flyer': "Create content for a flyer about this nonprofit. Include a catchy headline, key points about the cause, impact statement, and how people can get involved. Format with clear sections using HTML headings (<h3>, <h4>) and lists (<ul>, <ol>).",
-            'social_post': "Create 3 social media posts (one for each: Twitter/X, Facebook, Instagram) promoting this nonprofit. Make them engaging, shareable, and include relevant hashtags. Format each post clearly with line breaks.",
-            'advertisement': "Create advertisement copy for this nonprofit. Include a headline, body copy, and call-to-action. Make it compelling and concise (150-200 words). Use HTML formatting with <strong> for emphasis.",
-            
-            # Team section
-            'recruiting_pitch': "Create a compelling volunteer recruitment pitch. Explain why people should join, what they'll do, and the impact they'll make. Keep it inspiring and specific (200-300 words). Use HTML formatting with <p> tags and <ul> for bullet points. Include clickable links with <a> tags for any resources or sign-up pages.",
-            'job_description': "Create a job description for a key role in this nonprofit. Include role title, responsibilities, qualifications, and what makes this opportunity special. Use HTML formatting with <h3> for sections, <ul> for lists, and <strong> for emphasis.",
-            'volunteer_form': "Create a simple volunteer sign-up form structure. List the fields needed to collect volunteer information and their availability. Format as an HTML list with field names and types.",
-            
-            # Funding section
-            'grant_proposal': "Create a grant proposal outline for this nonprofit. Include: Executive Summary, Problem Statement, Proposed Solution, Budget Overview, and Expected Impact. Be specific and compelling. If search results include grant opportunities, present them in an HTML table with columns for Grant Name, Funder, Amount, Deadline, and Application Link. Use <a> tags for all URLs.",
-            'donor_letter': "Write a letter to potential donors. Explain the cause, why it matters, how their donation will help, and include a clear ask. Keep it personal and compelling (300-400 words). Use HTML formatting with <p> tags for paragraphs.",
-            'budget_plan': "Create a basic budget plan for this nonprofit. Include startup costs, ongoing operational expenses, and funding needs. Provide realistic estimates with explanations. Present the budget as an HTML table with columns for Category, Item, Cost, and Notes. Use proper <table>, <thead>, <tbody> structure.",
-            
-            # Research section
-            'implementation_steps': "Create a detailed, step-by-step implementation plan for this nonprofit. Include 10-15 specific, actionable steps in chronological order. Be practical and realistic. Format as an ordered list (<ol>) with each step clearly numbered. If search results include relevant tools or platforms, present them in an HTML table and include clickable links with <a> tags.",
-            'local_orgs': "Identify specific local organizations, community groups, and resources in the operating location that could help or partner with this nonprofit. If search results are available, present them in an HTML table with columns for Organization Name, Description, Website, and How They Can Help. Use <a href='URL' target='_blank'>Visit Website</a> format for all links. Include at least 5-10 organizations. Add a citations section at the end with numbered references [1], [2], etc.",
-            'resources': "Provide a list of helpful resources for starting this nonprofit. Include websites, tools, organizations, and guides that would be valuable. If search results are available, present them in an HTML table with columns for Resource Name, Description, Type (tool/guide/platform), and Link. Use <a href='URL' target='_blank'>descriptive text</a> format for all links. Include citations at the end."
-        }
-        
-        base_prompt = prompts.get(content_type, f"Create {content_type} content for this nonprofit. Use proper HTML formatting with tables for structured data, <a> tags for clickable links, and appropriate semantic HTML elements.")
+        base_prompt = _build_content_prompt(content_type)
         
         # Add chat context if provided
         if chat_context:
-            context_str = "\n\nPrevious conversation:\n"
-            for msg in chat_context[-3:]:  # Last 3 messages for context
-                role = msg.get('role', 'user')
-                content = msg.get('content', '')
-                context_str += f"{role}: {content}\n"
-            base_prompt += context_str + "\n\nPlease refine or adjust the content based on the conversation above. Maintain HTML formatting in your response."
+            lines = ["", "", "Previous conversation:"]
+            lines.extend(
+                f"{msg.get('role', 'user')}: {msg.get('content', '')}"
+                for msg in chat_context[-3:]  # Last 3 messages for context
+            )
+            context_str = "\n".join(lines) + "\n"
+            base_prompt += context_str + _REFINE_INSTRUCTIONS
         
         return base_prompt
 
@@ -438,13 +1907,26 @@ class AIServiceError(Exception):
     pass
 
 
+class AIServiceRateLimited(AIServiceError):
+    """Claude rejected a request for exceeding the rate limit, even after retries."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Seconds the API asked callers to wait, if it said
+        self.retry_after = retry_after
+
+
 # ============================================================
 # HELPER FUNCTIONS FOR FLASK ROUTES
 # ============================================================
 
 def create_ai_service(api_key: str) -> AIService:
     """
-    Factory function to create AI service instance.
+    Factory function to get the AI service instance for an API key.
+    
+    Services are cached per API key, so calling this on every request
+    reuses the same Claude clients and their connection pools. Only the
+    _MAX_SERVICES most recently used keys are kept.
     
     Args:
         api_key: Anthropic API key
@@ -455,4 +1937,26 @@ def create_ai_service(api_key: str) -> AIService:
     if not api_key:
         raise AIServiceError("API key is required")
     
-    return AIService(api_key)
+    with _cache_lock:
+        service = _SERVICE_CACHE.get(api_key)
+        if service is not None:
+            _SERVICE_CACHE.move_to_end(api_key)
+    if service is None:
+        new_service = AIService(api_key)
+        with _cache_lock:
+            service = _SERVICE_CACHE.setdefault(api_key, new_service)
+            if len(_SERVICE_CACHE) > _MAX_SERVICES:
+                # The shared HTTP pool stays open; only the per-key objects go
+                old_key, _ = _SERVICE_CACHE.popitem(last=False)
+                _CLIENT_CACHE.pop(old_key, None)
+                _ASYNC_CLIENT_CACHE.pop(old_key, None)
+        
+        if service is new_service:
+            # Warm the connection without blocking the caller
+            threading.Thread(
+                target=service.warm_up,
+                name="ai-service-warm-up",
+                daemon=True
+            ).start()
+    
+    return service
@@ -1,34 +1,371 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import (
+    Flask, Response, render_template, request, jsonify, session, redirect,
+    stream_with_context, url_for
+)
 import os
+import re
+import json
+import queue
+import atexit
+import click
+import hashlib
+import shutil
+import logging
+import logging.handlers
+import threading
+import concurrent.futures
 from dotenv import load_dotenv
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
 from db import (
+    init_db,
     save_idea, 
     get_idea_by_id,
     get_all_ideas,
     save_content, 
+    save_contents_bulk,
     get_content_by_idea_and_section,
     save_volunteer,
+    save_volunteers_bulk,
     get_volunteers_by_idea,
     delete_idea
 )
 from ai_service import create_ai_service, AIServiceError
+import site_generator
 from site_generator import (
     generate_home_page,
     generate_section_page,
     generate_and_save_site
 )
-from search_config import validate_search_config_on_startup
+from content_formatter import ContentFormatter
+from search_config import create_search_service, validate_search_config_on_startup
+
+try:
+    import redis
+    from flask_session import Session
+except ImportError:
+    redis = None
+    Session = None
+
+try:
+    from flask_limiter import Limiter
+except ImportError:
+    Limiter = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def configure_logging():
+    """
+    Send log records through a queue so request threads only enqueue them.
+
+    The handlers already on the root logger (or a plain stderr handler) move
+    to a listener thread that formats and writes each record, so a burst of
+    errors doesn't make every worker thread wait on the stderr lock.
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    for handler in handlers:
+        root.removeHandler(handler)
+    log_queue = queue.Queue(-1)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    if root.level == logging.WARNING:
+        root.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+configure_logging()
+
 # Validate search configuration on startup
 validate_search_config_on_startup()
 
+# One search service for the process, so its result cache is shared by
+# every request instead of starting empty each time
+search_service = create_search_service()
+
+# Create the AI service for the configured API key up front so its connection
+# to the Claude API is warmed in the background before the first request
+if os.environ.get('ANTHROPIC_API_KEY'):
+    try:
+        create_ai_service(os.environ['ANTHROPIC_API_KEY'])
+    except AIServiceError as e:
+        logger.warning("AI service warm-up skipped: %s", e)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson instead of the json module."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+# Responses are read by our own JavaScript, so skip sorting every key
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+app.json.sort_keys = False
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
+# Set SESSION_COOKIE_SECURE=true in production with HTTPS
+app.config['SESSION_COOKIE_SECURE'] = os.environ.get('SESSION_COOKIE_SECURE', 'false').lower() == 'true'
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 hour
+# Idea, volunteer and chat bodies are a few KB; larger ones are refused
+# before they're read or parsed
+app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024
+
+# With REDIS_URL set, sessions live in Redis and the cookie only carries a
+# session id, so the user's API key is no longer sent with every request
+if os.environ.get('REDIS_URL'):
+    if Session is None or redis is None:
+        logger.warning("REDIS_URL is set but flask-session/redis are not installed; "
+                       "using cookie sessions")
+    else:
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.Redis.from_url(os.environ['REDIS_URL'])
+        app.config['SESSION_PERMANENT'] = True
+        Session(app)
+
+
+# Behind nginx or a hosting load balancer, request.remote_addr is the proxy.
+# Set TRUSTED_PROXIES to the number of proxies in front of the app to read
+# the client's address from X-Forwarded-For (only then, since clients can
+# send that header themselves).
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', '0'))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
+
+def _rate_limit_key() -> str:
+    """
+    Rate limit per user-supplied API key, or else per client address.
+    
+    The server's own ANTHROPIC_API_KEY is shared by every visitor, so it
+    isn't used as a key. Keys are hashed so they aren't kept in limiter
+    storage.
+    """
+    user_key = session.get('api_key')
+    key = f'key:{user_key}' if user_key else f'addr:{request.remote_addr or ""}'
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+# Routes that call Claude are rate limited per user when flask-limiter is
+# installed, so one client can't queue up unbounded generations
+AI_RATE_LIMIT = os.environ.get('AI_RATE_LIMIT', '30/minute')
+if Limiter is not None:
+    limiter = Limiter(_rate_limit_key, app=app,
+                      storage_uri=os.environ.get('REDIS_URL', 'memory://'))
+    rate_limited = limiter.limit(AI_RATE_LIMIT)
+else:
+    def rate_limited(fn):
+        return fn
+
+
+# Generated content and pages are text that compresses several times over.
+# Streamed responses are left alone so each event reaches the browser as
+# soon as it is generated instead of waiting on the compressor's buffer.
+if Compress is not None:
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    app.config['COMPRESS_MIN_SIZE'] = 512
+    app.config['COMPRESS_STREAMS'] = False
+    Compress(app)
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': 'Request body is too large'}), 413
+
+
+@app.errorhandler(429)
+def rate_limit_exceeded(e):
+    return jsonify({'error': f'Too many requests: {e.description}'}), 429
+
+# Compile every template now instead of on the first request that uses it.
+# The bytecode cache lets each new gunicorn worker load the compiled
+# templates instead of parsing them again.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+for template_name in app.jinja_env.list_templates():
+    app.jinja_env.get_template(template_name)
+
+# Slow disk work the client doesn't need to wait for (exporting and removing
+# generated sites) runs on this pool after the response is sent
+_background = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='background')
+
+
+def run_in_background(fn, *args):
+    """Run fn(*args) on the background pool inside an application context."""
+    def task():
+        with app.app_context():
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.exception("Background task %s failed", fn.__name__)
+    _background.submit(task)
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or migrate the database tables."""
+    init_db()
+    click.echo("Initialized the database")
+
+
+def conditional_page(html: str) -> Response:
+    """
+    Return a page with an ETag, answering 304 if the browser's copy is current.
+    
+    Pages are marked private and always revalidated: serving a site page
+    can set the session cookie, so shared caches must not store it.
+    """
+    response = Response(html, mimetype='text/html')
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    
+    # Flask-Compress tags compressed copies "<etag>:<encoding>", so the
+    # browser sends that back; it is still the same version of the page
+    etag, _ = response.get_etag()
+    if any(tag.split(':', 1)[0] == etag for tag in request.if_none_match.as_set()):
+        response.set_data(b'')
+        response.status_code = 304
+        return response
+    return response.make_conditional(request)
+
+
+# Work currently running for single_flight, keyed by request
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Seconds a caller waits for another request's work before giving up, so a
+# leader that hangs can't tie up every waiting worker thread with it
+FLIGHT_TIMEOUT = int(os.environ.get('FLIGHT_TIMEOUT', '300'))
+
+
+def claim_flight(key):
+    """
+    Join the work running under key, or start it.
+    
+    Returns the shared future and whether the caller is the leader. The
+    leader does the work and must pass its outcome to finish_flight; the
+    others wait on the future, for at most FLIGHT_TIMEOUT seconds.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = concurrent.futures.Future()
+    return future, leader
+
+
+def finish_flight(key, future, result=None, error=None):
+    """Hand the leader's result (or exception) to waiting callers."""
+    with _inflight_lock:
+        del _inflight[key]
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def single_flight(key, fn):
+    """
+    Run fn() once for concurrent callers with the same key.
+    
+    Callers that arrive while it is running wait and get the same result
+    (or exception) instead of repeating the work. Waiting longer than
+    FLIGHT_TIMEOUT raises TimeoutError.
+    """
+    future, leader = claim_flight(key)
+    if not leader:
+        return future.result(timeout=FLIGHT_TIMEOUT)
+    
+    try:
+        result = fn()
+    except BaseException as e:
+        finish_flight(key, future, error=e)
+        raise
+    finish_flight(key, future, result)
+    return result
+
+
+def read_json(*required_fields):
+    """
+    Read the request body as a JSON object and check required fields.
+    
+    Malformed requests are rejected here, before they reach the database
+    or cost a Claude call.
+    
+    Args:
+        required_fields: Fields that must be present and non-empty
+        
+    Returns:
+        (data, None) on success, or (None, error response) to return as is
+    """
+    try:
+        # Parsed once; later get_json() calls reuse the cached result
+        data = request.get_json(silent=True)
+    except RequestEntityTooLarge:
+        return None, request_too_large(None)
+    if not isinstance(data, dict):
+        return None, (jsonify({'error': 'Request body must be a JSON object'}), 400)
+    
+    for field in required_fields:
+        if not data.get(field):
+            return None, (jsonify({'error': f'Missing required field: {field}'}), 400)
+    
+    return data, None
+
+
+SECTIONS = ('research', 'team', 'funding', 'marketing')
+
+# Content types are interpolated into prompts, so only allow short identifiers
+_CONTENT_TYPE_PATTERN = re.compile(r'[a-z][a-z0-9_]{0,39}')
+
+
+def check_section(section, content_type=None):
+    """
+    Validate a section (and optionally a content type) from a request body.
+    
+    Runs before any database read, search or Claude call, so a malformed
+    request costs nothing.
+    
+    Returns:
+        None if valid, otherwise an error response to return as is
+    """
+    if section not in SECTIONS:
+        return jsonify({'error': f'Invalid section: {section}'}), 400
+    if content_type is not None and not (
+            isinstance(content_type, str) and _CONTENT_TYPE_PATTERN.fullmatch(content_type)):
+        return jsonify({'error': f'Invalid content type: {content_type}'}), 400
+    return None
+
+
+# Fields the questionnaire must fill in before an idea can be saved
+IDEA_FIELDS = ('title', 'description', 'importance', 'beneficiaries',
+               'implementation', 'significance', 'uniqueness', 'location')
+
 
 # Helper function to get API key
 def get_api_key():
@@ -40,6 +377,45 @@ def get_api_key():
 # SEARCH INTEGRATION HELPER FUNCTIONS
 # ============================================================
 
+# Section/content type combinations that benefit from web search. Marketing
+# content is generally AI-only.
+_SEARCH_ENABLED = frozenset({
+    ('research', 'local_orgs'),
+    ('research', 'implementation_steps'),
+    ('research', 'resources'),
+    ('funding', 'grant_proposal'),
+    ('funding', 'budget_plan'),
+    ('team', 'recruiting_pitch'),
+    ('team', 'job_description'),
+})
+
+# Search plan for each content type: (query templates, result count, whether
+# to pass the idea's location). Templates are filled in with the idea's
+# cause, location, description and the content type. Several templates are
+# searched concurrently and their results merged.
+_SEARCH_QUERIES = {
+    # Local organizations, from several angles
+    'local_orgs': ((
+        "{cause} nonprofit organizations near {location}",
+        "{cause} community resources {location}",
+        "volunteer opportunities {cause} {location}",
+    ), 10, True),
+    # Grant opportunities
+    'grant_proposal': (("{cause} grants funding opportunities nonprofit {location}",), 10, True),
+    # Tools and platforms
+    'implementation_steps': (("{cause} nonprofit tools platforms resources implementation",), 8, False),
+    # Educational resources and guides
+    'resources': (("{cause} nonprofit resources guides how to start",), 8, False),
+    # Budget examples and cost information
+    'budget_plan': (("{cause} nonprofit budget startup costs expenses",), 5, False),
+    # Volunteer platforms
+    'recruiting_pitch': (("volunteer recruitment platforms nonprofit {location}",), 5, True),
+    # Salary benchmarks and role information
+    'job_description': (("nonprofit job roles salaries {cause}",), 5, False),
+}
+_DEFAULT_SEARCH_QUERY = (("{cause} {description} nonprofit {content_type}",), 5, False)
+
+
 def should_use_search(section: str, content_type: str) -> bool:
     """
     Determine if web search should be used for this content type.
@@ -51,19 +427,7 @@ def should_use_search(section: str, content_type: str) -> bool:
     Returns:
         True if search should be used, False otherwise
     """
-    # Define content types that benefit from search
-    search_enabled_types = {
-        'research': ['local_orgs', 'implementation_steps', 'resources'],
-        'funding': ['grant_proposal', 'budget_plan'],
-        'team': ['recruiting_pitch', 'job_description'],
-        'marketing': []  # Generally AI-only, but could add specific types
-    }
-    
-    # Check if this section/content_type combination should use search
-    if section in search_enabled_types:
-        return content_type in search_enabled_types[section]
-    
-    return False
+    return (section, content_type) in _SEARCH_ENABLED
 
 
 def perform_search(search_service, idea: dict, section: str, content_type: str):
@@ -80,77 +444,80 @@ def perform_search(search_service, idea: dict, section: str, content_type: str):
         SearchResults object or None if search fails
     """
     try:
+        templates, count, use_location = _SEARCH_QUERIES.get(content_type, _DEFAULT_SEARCH_QUERY)
         location = idea.get('location', '')
-        cause = idea.get('title', '')
-        description = idea.get('description', '')
-        
-        # Map content types to search methods
-        if content_type == 'local_orgs':
-            # Search for local organizations
-            return search_service.search(
-                query=f"{cause} nonprofit organizations community resources near {location}",
-                location=location,
-                filters={'count': 10}
-            )
-        
-        elif content_type == 'grant_proposal':
-            # Search for grant opportunities
-            return search_service.search(
-                query=f"{cause} grants funding opportunities nonprofit {location}",
-                location=location,
-                filters={'count': 10}
-            )
-        
-        elif content_type == 'implementation_steps':
-            # Search for tools and platforms
-            return search_service.search(
-                query=f"{cause} nonprofit tools platforms resources implementation",
-                filters={'count': 8}
-            )
-        
-        elif content_type == 'resources':
-            # Search for educational resources and guides
-            return search_service.search(
-                query=f"{cause} nonprofit resources guides how to start",
-                filters={'count': 8}
-            )
-        
-        elif content_type == 'budget_plan':
-            # Search for budget examples and cost information
-            return search_service.search(
-                query=f"{cause} nonprofit budget startup costs expenses",
-                filters={'count': 5}
-            )
+        fields = {
+            'cause': idea.get('title', ''),
+            'location': location,
+            'description': idea.get('description', ''),
+            'content_type': content_type,
+        }
+        queries = [template.format(**fields) for template in templates]
+        location = location if use_location else None
         
-        elif content_type == 'recruiting_pitch':
-            # Search for volunteer platforms
-            return search_service.search(
-                query=f"volunteer recruitment platforms nonprofit {location}",
+        if len(queries) > 1:
+            return search_service.search_many(
+                queries=queries,
                 location=location,
-                filters={'count': 5}
-            )
-        
-        elif content_type == 'job_description':
-            # Search for salary benchmarks and role information
-            return search_service.search(
-                query=f"nonprofit job roles salaries {cause}",
-                filters={'count': 5}
-            )
-        
-        else:
-            # Default general search
-            return search_service.search(
-                query=f"{cause} {description} nonprofit {content_type}",
-                filters={'count': 5}
+                filters={'count': count}
             )
+        return search_service.search(
+            query=queries[0],
+            location=location,
+            filters={'count': count}
+        )
     
     except Exception as e:
         # Log the error but don't fail - fall back to AI-only generation
-        print(f"Search failed for {section}/{content_type}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Search failed for %s/%s", section, content_type,
+                         extra={'idea_id': idea.get('id')})
         return None
 
+def generate_and_save_content(ai_service, idea: dict, section: str, content_type: str,
+                              chat_context: list) -> str:
+    """
+    Search if useful, generate content for a section and save it.
+    
+    Args:
+        ai_service: AIService instance
+        idea: Idea dictionary with nonprofit details
+        section: Section name
+        content_type: Type of content being generated
+        chat_context: Chat history for iterative refinement
+        
+    Returns:
+        Generated content, with citations when search results were used
+    """
+    # Determine if search is needed and perform search
+    search_results = None
+    if search_service and should_use_search(section, content_type):
+        search_results = perform_search(
+            search_service,
+            idea,
+            section,
+            content_type
+        )
+    
+    # Generate content with search results
+    content = ai_service.generate_section_content_with_search(
+        idea_summary=idea,
+        section=section,
+        content_type=content_type,
+        search_results=search_results,
+        chat_context=chat_context
+    )
+    
+    # Apply content formatting if we have search results
+    if search_results:
+        content = ContentFormatter.ensure_links_clickable(content)
+        # Add citations if search results were used
+        content = ContentFormatter.add_citations(content, [search_results])
+    
+    # Save content to database
+    save_content(idea['id'], section, content_type, content)
+    
+    return content
+
 # Landing page route - shows all ideas and new idea form
 @app.route('/')
 def index():
@@ -161,7 +528,9 @@ def index():
 # API key setup route
 @app.route('/api/setup', methods=['POST'])
 def setup_api_key():
-    data = request.get_json()
+    data, error = read_json()
+    if error:
+        return error
     api_key = data.get('api_key')
     save_api_key = data.get('save_api_key', False)
     
@@ -193,7 +562,9 @@ def save_question():
         return jsonify({'error': 'API key not configured'}), 401
     
     try:
-        data = request.get_json()
+        data, error = read_json('question_type', 'user_response')
+        if error:
+            return error
         question_type = data.get('question_type')
         user_response = data.get('user_response')
         idea_context = data.get('idea_context', {})
@@ -223,15 +594,9 @@ def complete_questionnaire():
         return jsonify({'error': 'API key not configured'}), 401
     
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['title', 'description', 'importance', 'beneficiaries', 
-                          'implementation', 'significance', 'uniqueness', 'location']
-        
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        data, error = read_json(*IDEA_FIELDS)
+        if error:
+            return error
         
         # Save idea to database
         idea_data = {
@@ -255,14 +620,14 @@ def complete_questionnaire():
         # Generate website
         idea = get_idea_by_id(idea_id)
         if idea:
-            generate_and_save_site(idea)
+            # The site pages are served live from /site/<id>; the saved copy
+            # is only an export, so write it after responding
+            run_in_background(generate_and_save_site, idea)
         
         return jsonify({'success': True, 'idea_id': idea_id})
         
     except Exception as e:
-        print(f"Error saving idea: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error saving idea")
         return jsonify({'error': f'Failed to save idea: {str(e)}'}), 500
 
 # Serve generated site home page
@@ -282,14 +647,13 @@ def serve_site(idea_id):
         return redirect(url_for('index'))
     
     # Generate and serve home page
-    return generate_home_page(idea)
+    return conditional_page(generate_home_page(idea))
 
 # Serve generated site section pages
 @app.route('/site/<int:idea_id>/<section>')
 def serve_section(idea_id, section):
     # Validate section
-    valid_sections = ['research', 'team', 'funding', 'marketing']
-    if section not in valid_sections:
+    if section not in SECTIONS:
         return "Invalid section", 404
     
     # Get idea from database
@@ -306,21 +670,27 @@ def serve_section(idea_id, section):
         return redirect(url_for('index'))
     
     # Generate and serve section page
-    return generate_section_page(idea, section)
+    return conditional_page(generate_section_page(idea, section))
 
 # Generate content for sections
 @app.route('/api/generate', methods=['POST'])
+@rate_limited
 def generate_content():
     api_key = get_api_key()
     if not api_key:
         return jsonify({'error': 'API key not configured'}), 401
     
     try:
-        data = request.get_json()
+        data, error = read_json('idea_id', 'section', 'content_type')
+        if error:
+            return error
         idea_id = data.get('idea_id')
         section = data.get('section')
         content_type = data.get('content_type')
         chat_context = data.get('chat_context', [])
+        error = check_section(section, content_type)
+        if error:
+            return error
         
         # Get idea from database
         idea = get_idea_by_id(idea_id)
@@ -330,66 +700,267 @@ def generate_content():
         # Create AI service
         ai_service = create_ai_service(api_key)
         
-        # Initialize search service
-        from search_config import create_search_service
-        search_service = create_search_service()
-        
-        # Determine if search is needed and perform search
-        search_results = None
-        if search_service and should_use_search(section, content_type):
-            search_results = perform_search(
-                search_service,
-                idea,
-                section,
-                content_type
-            )
+        # Identical requests already running (double clicks, several tabs)
+        # wait for that one instead of searching and generating again. The
+        # id comes from the database row, so "5" and 5 share a key.
+        key = ('generate', idea['id'], section, content_type, json.dumps(chat_context, sort_keys=True))
+        content = single_flight(key, lambda: generate_and_save_content(
+            ai_service, idea, section, content_type, chat_context
+        ))
         
-        # Generate content with search results
-        content = ai_service.generate_section_content_with_search(
-            idea_summary=idea,
-            section=section,
-            content_type=content_type,
-            search_results=search_results,
-            chat_context=chat_context
-        )
+        return jsonify({'success': True, 'content': content})
         
-        # Apply content formatting if we have search results
-        if search_results:
-            from content_formatter import ContentFormatter
-            content = ContentFormatter.ensure_links_clickable(content)
-            # Add citations if search results were used
-            content = ContentFormatter.add_citations(content, [search_results])
+    except AIServiceError as e:
+        logger.exception("AI Service Error", extra={'idea_id': idea_id})
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        logger.exception("Error generating content", extra={'idea_id': idea_id})
+        return jsonify({'error': f'Failed to generate content: {str(e)}'}), 500
+
+
+# Queue several pieces of content as one discounted Message Batch. Batches
+# take minutes, so the client polls the status route below for the results.
+@app.route('/api/generate/batch', methods=['POST'])
+@rate_limited
+def generate_content_batch():
+    api_key = get_api_key()
+    if not api_key:
+        return jsonify({'error': 'API key not configured'}), 401
+    
+    try:
+        data, error = read_json('idea_id')
+        if error:
+            return error
+        idea_id = data.get('idea_id')
+        items = data.get('items', [])
         
-        # Save content to database
-        save_content(idea_id, section, content_type, content)
+        if not items:
+            return jsonify({'error': 'No content items requested'}), 400
+        if not all(isinstance(item, dict) for item in items):
+            return jsonify({'error': 'Each item must be a JSON object'}), 400
+        for item in items:
+            error = check_section(item.get('section'), item.get('content_type', ''))
+            if error:
+                return error
         
-        return jsonify({'success': True, 'content': content})
+        # Get idea from database
+        idea = get_idea_by_id(idea_id)
+        if not idea:
+            return jsonify({'error': 'Idea not found'}), 404
+        
+        ai_service = create_ai_service(api_key)
+        section_specs = [(item['section'], item['content_type']) for item in items]
+        batch_id = ai_service.submit_batch(idea, section_specs)
+        
+        # Remember which idea the batch belongs to for when results arrive
+        batches = session.get('batches', {})
+        batches[batch_id] = idea_id
+        session['batches'] = batches
+        
+        return jsonify({'success': True, 'batch_id': batch_id})
         
     except AIServiceError as e:
-        print(f"AI Service Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("AI Service Error while submitting batch", extra={'idea_id': idea_id})
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        print(f"Error generating content: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'Failed to generate content: {str(e)}'}), 500
+        logger.exception("Error submitting batch", extra={'idea_id': idea_id})
+        return jsonify({'error': f'Failed to submit batch: {str(e)}'}), 500
+
+
+@app.route('/api/generate/batch/<batch_id>', methods=['GET'])
+def generate_content_batch_status(batch_id):
+    api_key = get_api_key()
+    if not api_key:
+        return jsonify({'error': 'API key not configured'}), 401
+    
+    batches = session.get('batches', {})
+    idea_id = batches.get(batch_id)
+    if idea_id is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    
+    try:
+        ai_service = create_ai_service(api_key)
+        results = ai_service.get_batch_results(batch_id)
+        if results is None:
+            return jsonify({'success': True, 'status': 'processing'})
+        
+        # The batch has ended, so forget it whatever happens below; polling
+        # again would only download the same results
+        batches.pop(batch_id)
+        session['batches'] = batches
+        
+        contents = [
+            {
+                'section': section,
+                'content_type': content_type,
+                'content': content
+            }
+            for (section, content_type), content in results.contents.items()
+        ]
+        if contents:
+            save_contents_bulk(idea_id, contents)
+        
+        return jsonify({
+            'success': True,
+            'status': 'ended',
+            'contents': contents,
+            'failed': results.failed
+        })
+        
+    except AIServiceError as e:
+        logger.exception("AI Service Error while fetching batch", extra={'idea_id': idea_id})
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        logger.exception("Error fetching batch", extra={'idea_id': idea_id})
+        return jsonify({'error': f'Failed to fetch batch: {str(e)}'}), 500
+
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Format a dictionary as a server-sent event."""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+def sse_response(events) -> Response:
+    """Stream server-sent events, asking proxies not to buffer them."""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+# Stream generated content for sections as server-sent events
+@app.route('/api/generate/stream', methods=['POST'])
+@rate_limited
+def generate_content_stream():
+    api_key = get_api_key()
+    if not api_key:
+        return jsonify({'error': 'API key not configured'}), 401
+    
+    data, error = read_json('idea_id', 'section', 'content_type')
+    if error:
+        return error
+    idea_id = data.get('idea_id')
+    section = data.get('section')
+    content_type = data.get('content_type')
+    chat_context = data.get('chat_context', [])
+    error = check_section(section, content_type)
+    if error:
+        return error
+    
+    idea = get_idea_by_id(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+    
+    try:
+        ai_service = create_ai_service(api_key)
+    except AIServiceError as e:
+        return jsonify({'error': str(e)}), 500
+    
+    search_results = None
+    if search_service and should_use_search(section, content_type):
+        search_results = perform_search(search_service, idea, section, content_type)
+    
+    # Shared with /api/generate, so a double click or a second tab waits for
+    # the generation already running instead of paying for another
+    key = ('generate', idea['id'], section, content_type, json.dumps(chat_context, sort_keys=True))
+    
+    def complete(future, chunks):
+        """Format and save the finished content, and pass it to any waiters."""
+        try:
+            content = ''.join(chunks).strip()
+            if search_results:
+                content = ContentFormatter.ensure_links_clickable(content)
+                content = ContentFormatter.add_citations(content, [search_results])
+            save_content(idea_id, section, content_type, content)
+        except BaseException as e:
+            finish_flight(key, future, error=e)
+            raise
+        finish_flight(key, future, content)
+        return content
+    
+    def finish_abandoned(future, stream, chunks):
+        """Run a stream whose client disconnected to the end, then save it."""
+        try:
+            chunks.extend(stream)
+        except BaseException as e:
+            finish_flight(key, future, error=e)
+            raise
+        complete(future, chunks)
+    
+    def generate():
+        future, leader = claim_flight(key)
+        if not leader:
+            try:
+                content = future.result(timeout=FLIGHT_TIMEOUT)
+            except AIServiceError as e:
+                yield sse_event({'error': str(e)}, event='error')
+                return
+            except Exception as e:
+                # The leader's failure (or our wait timing out) still has to
+                # end this stream with an event the client understands
+                logger.exception("Error waiting for streamed content", extra={'idea_id': idea_id})
+                yield sse_event({'error': f'Failed to generate content: {str(e)}'}, event='error')
+                return
+            yield sse_event({'content': content}, event='done')
+            return
+        
+        chunks = []
+        stream = ai_service.stream_section_content(
+            idea_summary=idea,
+            section=section,
+            content_type=content_type,
+            chat_context=chat_context,
+            search_results=search_results
+        )
+        try:
+            for text in stream:
+                chunks.append(text)
+                yield sse_event({'delta': text})
+        except GeneratorExit:
+            # The client went away mid-stream. The generation is already
+            # paid for, so finish it in the background and save it.
+            run_in_background(finish_abandoned, future, stream, chunks)
+            raise
+        except AIServiceError as e:
+            finish_flight(key, future, error=e)
+            logger.exception("AI Service Error while streaming", extra={'idea_id': idea_id})
+            yield sse_event({'error': str(e)}, event='error')
+            return
+        except BaseException as e:
+            finish_flight(key, future, error=e)
+            raise
+        
+        # Saved before 'done' is sent, so a client that disconnects as soon
+        # as it has the content can't lose it
+        content = complete(future, chunks)
+        yield sse_event({'content': content}, event='done')
+    
+    return sse_response(generate())
 
 
 # Chat with AI assistant
 @app.route('/api/chat', methods=['POST'])
+@rate_limited
 def chat():
     api_key = get_api_key()
     if not api_key:
         return jsonify({'error': 'API key not configured'}), 401
     
     try:
-        data = request.get_json()
+        data, error = read_json('idea_id', 'section', 'message')
+        if error:
+            return error
         idea_id = data.get('idea_id')
         section = data.get('section')
         message = data.get('message')
         chat_history = data.get('chat_history', [])
+        error = check_section(section)
+        if error:
+            return error
         
         # Get idea from database
         idea = get_idea_by_id(idea_id)
@@ -410,16 +981,60 @@ def chat():
         return jsonify({'success': True, 'response': response})
         
     except AIServiceError as e:
-        print(f"AI Service Error in chat: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("AI Service Error in chat", extra={'idea_id': idea_id})
         return jsonify({'error': str(e)}), 500
     except Exception as e:
-        print(f"Error in chat: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in chat", extra={'idea_id': idea_id})
         return jsonify({'error': f'Failed to get response: {str(e)}'}), 500
 
+# Stream chat responses as server-sent events
+@app.route('/api/chat/stream', methods=['POST'])
+@rate_limited
+def chat_stream():
+    api_key = get_api_key()
+    if not api_key:
+        return jsonify({'error': 'API key not configured'}), 401
+    
+    data, error = read_json('idea_id', 'section', 'message')
+    if error:
+        return error
+    idea_id = data.get('idea_id')
+    section = data.get('section')
+    message = data.get('message')
+    chat_history = data.get('chat_history', [])
+    error = check_section(section)
+    if error:
+        return error
+    
+    idea = get_idea_by_id(idea_id)
+    if not idea:
+        return jsonify({'error': 'Idea not found'}), 404
+    
+    try:
+        ai_service = create_ai_service(api_key)
+    except AIServiceError as e:
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        chunks = []
+        try:
+            for text in ai_service.stream_chat(
+                idea_summary=idea,
+                section=section,
+                user_message=message,
+                chat_history=chat_history
+            ):
+                chunks.append(text)
+                yield sse_event({'delta': text})
+            
+            yield sse_event({'response': ''.join(chunks).strip()}, event='done')
+        
+        except AIServiceError as e:
+            logger.exception("AI Service Error while streaming chat", extra={'idea_id': idea_id})
+            yield sse_event({'error': str(e)}, event='error')
+    
+    return sse_response(generate())
+
 # Delete an idea
 @app.route('/api/ideas/<int:idea_id>', methods=['DELETE'])
 def delete_idea_route(idea_id):
@@ -429,23 +1044,16 @@ def delete_idea_route(idea_id):
         
         if success:
             # Delete generated site files
-            import shutil
-            site_dir = os.path.join(
-                os.path.dirname(__file__),
-                'generated_sites',
-                str(idea_id)
-            )
-            if os.path.exists(site_dir):
-                shutil.rmtree(site_dir)
+            site_dir = site_generator._SITES_ROOT / str(idea_id)
+            if site_dir.exists():
+                run_in_background(shutil.rmtree, site_dir, True)
             
             return jsonify({'success': True, 'message': 'Idea deleted successfully'})
         else:
             return jsonify({'error': 'Failed to delete idea'}), 500
             
     except Exception as e:
-        print(f"Error deleting idea: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error deleting idea", extra={'idea_id': idea_id})
         return jsonify({'error': f'Failed to delete idea: {str(e)}'}), 500
 
 
@@ -470,7 +1078,9 @@ def test_page():
 def test_create_idea():
     """Test route: Create a new nonprofit idea."""
     try:
-        data = request.get_json()
+        data, error = read_json()
+        if error:
+            return error
         idea_id = save_idea(data)
         idea = get_idea_by_id(idea_id)
         return jsonify({
@@ -501,7 +1111,9 @@ def test_get_idea(idea_id):
 def test_save_content(idea_id):
     """Test route: Save content for an idea."""
     try:
-        data = request.get_json()
+        data, error = read_json()
+        if error:
+            return error
         content_id = save_content(
             idea_id=idea_id,
             section=data.get('section'),
@@ -534,7 +1146,9 @@ def test_get_content(idea_id, section):
 def test_save_volunteer(idea_id):
     """Test route: Save volunteer for an idea."""
     try:
-        data = request.get_json()
+        data, error = read_json()
+        if error:
+            return error
         volunteer_id = save_volunteer(idea_id, data)
         return jsonify({
             'success': True,
@@ -544,6 +1158,25 @@ def test_save_volunteer(idea_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/test/ideas/<int:idea_id>/volunteers/bulk', methods=['POST'])
+def test_save_volunteers_bulk(idea_id):
+    """Test route: Save a list of volunteers for an idea."""
+    try:
+        data, error = read_json('volunteers')
+        if error:
+            return error
+        volunteers = data['volunteers']
+        if not isinstance(volunteers, list) or not all(isinstance(v, dict) for v in volunteers):
+            return jsonify({'error': 'volunteers must be a list of objects'}), 400
+        saved = save_volunteers_bulk(idea_id, volunteers)
+        return jsonify({
+            'success': True,
+            'saved': saved
+        }), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/test/ideas/<int:idea_id>/volunteers', methods=['GET'])
 def test_get_volunteers(idea_id):
     """Test route: Get volunteers for an idea."""
@@ -559,6 +1192,8 @@ def test_get_volunteers(idea_id):
 
 if __name__ == '__main__':
     # Use PORT from environment variable for deployment, or 5001 for local
+    # Deployments run under gunicorn (see gunicorn.conf.py); this built-in
+    # server is only for the desktop launchers and local development
     port = int(os.environ.get('PORT', 5001))
-    debug = os.environ.get('FLASK_ENV') != 'production'
-    app.run(debug=debug, host='0.0.0.0', port=port)
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    app.run(debug=debug, host='0.0.0.0', port=port, threaded=True)
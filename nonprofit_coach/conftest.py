@@ -0,0 +1,185 @@
+"""
+Shared pytest fixtures.
+
+The Claude API is replaced by an httpx mock transport, so the tests run
+offline and can count the requests each code path sends.
+"""
+
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+import ai_service
+import db
+
+# Manual scripts that call the real Claude API and prompt for input;
+# run them directly with python3 instead
+collect_ignore = ["test_ai_service.py", "test_integration.py"]
+
+IDEA = {
+    'id': 1,
+    'title': 'Food Bank',
+    'description': 'Collect surplus groceries for families',
+    'importance': 'Many local families skip meals',
+    'beneficiaries': 'Low-income families',
+    'implementation': 'Weekly pickups from grocery stores',
+    'significance': 'Fewer hungry children',
+    'uniqueness': 'Run by high school students',
+    'location': 'Austin, TX',
+    'status': 'complete',
+}
+
+
+class MockClaudeAPI:
+    """Stand-in for the Messages API that records every request."""
+
+    def __init__(self):
+        self.requests = []
+        self.text = "Generated content"
+        self.usage = {
+            "input_tokens": 120,
+            "output_tokens": 8,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 100,
+        }
+        # Set to an HTTP status to make every request fail with it
+        self.error_status = None
+        # Set to hold requests until the event is set
+        self.release = None
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        with self._lock:
+            self.requests.append(body)
+        if self.release is not None:
+            self.release.wait(timeout=5)
+        if self.error_status is not None:
+            return httpx.Response(
+                self.error_status,
+                json={"type": "error", "error": {"type": "api_error", "message": "boom"}}
+            )
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                content=self._stream_events(body),
+                headers={"content-type": "text/event-stream"}
+            )
+        return httpx.Response(200, json={
+            "id": "msg_test",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude-3-haiku-20240307"),
+            "content": [{"type": "text", "text": self.text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": self.usage,
+        })
+
+    async def ahandle(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        # Network latency, so concurrent coroutines overlap as they would
+        await asyncio.sleep(0.05)
+        return self.handle(request)
+
+    def _stream_events(self, body: dict) -> bytes:
+        message = {
+            "id": "msg_test", "type": "message", "role": "assistant",
+            "model": body.get("model", "claude-3-haiku-20240307"), "content": [],
+            "stop_reason": None, "stop_sequence": None,
+            "usage": dict(self.usage, output_tokens=0),
+        }
+        half = len(self.text) // 2
+        events = [
+            ("message_start", {"type": "message_start", "message": message}),
+            ("content_block_start", {
+                "type": "content_block_start", "index": 0,
+                "content_block": {"type": "text", "text": ""}
+            }),
+        ]
+        for chunk in (self.text[:half], self.text[half:]):
+            events.append(("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": chunk}
+            }))
+        events += [
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            ("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": self.usage["output_tokens"]}
+            }),
+            ("message_stop", {"type": "message_stop"}),
+        ]
+        return "".join(
+            f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events
+        ).encode("utf-8")
+
+
+@pytest.fixture
+def claude_api(monkeypatch):
+    """Route every Claude client created during the test to a MockClaudeAPI."""
+    api = MockClaudeAPI()
+    anthropic = ai_service._load_anthropic()
+
+    def client(api_key):
+        return anthropic.Anthropic(
+            api_key=api_key, max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(api.handle))
+        )
+
+    def async_client(api_key):
+        return anthropic.AsyncAnthropic(
+            api_key=api_key, max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(api.ahandle))
+        )
+
+    monkeypatch.setattr(ai_service, "_get_client", client)
+    monkeypatch.setattr(ai_service, "_get_async_client", async_client)
+    monkeypatch.setattr(ai_service, "_SERVICE_CACHE", type(ai_service._SERVICE_CACHE)())
+    monkeypatch.setattr(ai_service.SemanticCache, "from_env", classmethod(lambda cls: None))
+    return api
+
+
+@pytest.fixture
+def service(claude_api):
+    """An AIService whose requests go to the claude_api mock."""
+    return ai_service.create_ai_service("sk-test")
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the db module at a fresh database file."""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    # Fresh per-thread connections, and init_db runs against the new file
+    monkeypatch.setattr(db, "_local", threading.local())
+    monkeypatch.setattr(db, "_initialized", False)
+    db.clear_idea_cache()
+    yield db
+    db.clear_idea_cache()
+
+
+@pytest.fixture
+def client(temp_db, claude_api, monkeypatch):
+    """Flask test client using the temp database and the claude_api mock."""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-test")
+    import app
+    monkeypatch.setattr(app, "search_service", None)
+    app.app.config["TESTING"] = True
+    return app.app.test_client()
+
+
+@pytest.fixture
+def saved_idea(temp_db):
+    """An idea saved in the temp database, as returned by get_idea_by_id."""
+    idea = dict(IDEA)
+    del idea['id']
+    return temp_db.get_idea_by_id(temp_db.save_idea(idea))
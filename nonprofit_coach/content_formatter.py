@@ -5,10 +5,68 @@ This module provides utilities for formatting AI-generated content with
 HTML tables, citations, and clickable links based on search results.
 """
 
+import functools
 import re
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from search_service import Organization, Grant, Resource, SearchResults
 
+# Plain http(s) URLs that aren't already inside an anchor tag (not preceded
+# by href=" or >)
+_URL_RE = re.compile(r'(?<!href=")(?<!>)(https?://[^\s<>"]+)')
+
+# Start of a sources/citations heading, where tables are inserted
+_SOURCES_HEADING_RE = re.compile(r'(## (?:Sources|Citations))')
+
+
+def _replace_url(match) -> str:
+    """Wrap a URL matched by _URL_RE in an anchor tag."""
+    url = match.group(1)
+    # Clean up trailing punctuation
+    url = url.rstrip('.,;:!?)')
+    return f'<a href="{url}" target="_blank" rel="noopener noreferrer">{url}</a>'
+
+
+def _table_head(table_class: str, caption: str, headers: Tuple[str, ...]) -> str:
+    """
+    Build the opening markup of a search results table, up to <tbody>.
+    
+    Args:
+        table_class: CSS class added next to 'search-table'
+        caption: Table caption text
+        headers: Column header labels
+        
+    Returns:
+        HTML string to be followed by the table rows
+    """
+    header_cells = ''.join(f'      <th>{header}</th>\n' for header in headers)
+    return (
+        '<div class="table-wrapper">\n'
+        f'<table class="search-table {table_class}">\n'
+        f'  <caption>{caption}</caption>\n'
+        '  <thead>\n'
+        '    <tr>\n'
+        f'{header_cells}'
+        '    </tr>\n'
+        '  </thead>\n'
+        '  <tbody>\n'
+    )
+
+
+# Table markup around the rows never changes, so it is built once here
+_ORGANIZATION_TABLE_HEAD = _table_head(
+    'organization-table', 'Local Organizations and Resources',
+    ('Organization', 'Description', 'Location', 'Website')
+)
+_GRANT_TABLE_HEAD = _table_head(
+    'grant-table', 'Grant Opportunities',
+    ('Grant Name', 'Funder', 'Amount', 'Deadline', 'Application')
+)
+_RESOURCE_TABLE_HEAD = _table_head(
+    'resource-table', 'Tools and Resources',
+    ('Resource', 'Description', 'Type', 'Cost', 'Link')
+)
+_TABLE_CLOSE = '  </tbody>\n</table>\n</div>\n'
+
 
 class ContentFormatter:
     """
@@ -31,33 +89,49 @@ class ContentFormatter:
         Returns:
             Content with embedded HTML table
         """
+        return ''.join(ContentFormatter.iter_with_tables(content, data, table_type))
+    
+    @staticmethod
+    def iter_with_tables(content: str, data: List, table_type: str) -> Iterator[str]:
+        """
+        Yield content with an HTML table inserted, chunk by chunk.
+        
+        The table is produced a row at a time, so a route can pass this to
+        Response(stream_with_context(...)) without building the whole page.
+        
+        Args:
+            content: The AI-generated content string
+            data: List of data objects (Organization, Grant, or Resource)
+            table_type: Type of table ('organization', 'grant', 'resource')
+            
+        Yields:
+            String chunks of the content with embedded HTML table
+        """
         if not data:
-            return content
+            yield content
+            return
         
         # Generate appropriate table based on type
         if table_type == 'organization':
-            table_html = ContentFormatter.format_organization_table(data)
+            table_chunks = ContentFormatter.iter_organization_table(data)
         elif table_type == 'grant':
-            table_html = ContentFormatter.format_grant_table(data)
+            table_chunks = ContentFormatter.iter_grant_table(data)
         elif table_type == 'resource':
-            table_html = ContentFormatter.format_resource_table(data)
+            table_chunks = ContentFormatter.iter_resource_table(data)
         else:
-            return content
+            yield content
+            return
         
-        # Insert table at the end of content or before citations
-        if '## Sources' in content or '## Citations' in content:
-            # Insert before citations section
-            content = re.sub(
-                r'(## (?:Sources|Citations))',
-                f'\n\n{table_html}\n\n\\1',
-                content,
-                count=1
-            )
-        else:
-            # Append to end
-            content = f"{content}\n\n{table_html}"
+        # Insert table before citations section, or at the end of content
+        match = _SOURCES_HEADING_RE.search(content)
+        split_at = match.start() if match else len(content)
         
-        return content
+        yield content[:split_at]
+        yield '\n\n'
+        yield from table_chunks
+        if match:
+            yield '\n\n'
+            yield content[split_at:]
     
     @staticmethod
     def add_citations(content: str, sources: List[SearchResults]) -> str:
@@ -75,46 +149,38 @@ class ContentFormatter:
             return content
         
         # Build citations section
-        citations_html = '\n\n<div class="citations">\n<h3>Sources</h3>\n<ol class="citation-list">\n'
+        parts = [content, '\n\n<div class="citations">\n<h3>Sources</h3>\n<ol class="citation-list">\n']
         
-        citation_num = 1
         for source in sources:
             if hasattr(source, 'results'):
                 for result in source.results[:5]:  # Limit to top 5 per source
-                    citations_html += f'  <li>\n'
-                    citations_html += f'    <a href="{result.url}" target="_blank" rel="noopener noreferrer">{result.title}</a>\n'
-                    citations_html += f'    <p class="citation-snippet">{result.snippet}</p>\n'
-                    citations_html += f'  </li>\n'
-                    citation_num += 1
+                    parts.append(
+                        f'  <li>\n'
+                        f'    <a href="{result.url}" target="_blank" rel="noopener noreferrer">{result.title}</a>\n'
+                        f'    <p class="citation-snippet">{result.snippet}</p>\n'
+                        f'  </li>\n'
+                    )
         
-        citations_html += '</ol>\n</div>\n'
+        parts.append('</ol>\n</div>\n')
         
-        return content + citations_html
+        return ''.join(parts)
     
     @staticmethod
+    @functools.lru_cache(maxsize=128)
     def ensure_links_clickable(content: str) -> str:
         """
         Convert plain URLs to HTML anchor tags.
         
+        Cached on the content, since a response served from the semantic
+        cache comes back with the same text and would be converted again.
+        
         Args:
             content: The content string that may contain plain URLs
             
         Returns:
             Content with URLs converted to clickable links
         """
-        # Pattern to match URLs that aren't already in anchor tags
-        # This looks for http(s):// URLs not preceded by href=" or >
-        url_pattern = r'(?<!href=")(?<!>)(https?://[^\s<>"]+)'
-        
-        def replace_url(match):
-            url = match.group(1)
-            # Clean up trailing punctuation
-            url = url.rstrip('.,;:!?)')
-            return f'<a href="{url}" target="_blank" rel="noopener noreferrer">{url}</a>'
-        
-        content = re.sub(url_pattern, replace_url, content)
-        
-        return content
+        return _URL_RE.sub(_replace_url, content)
     
     @staticmethod
     def format_organization_table(orgs: List[Organization]) -> str:
@@ -127,40 +193,40 @@ class ContentFormatter:
         Returns:
             HTML table string with responsive classes
         """
+        return ''.join(ContentFormatter.iter_organization_table(orgs))
+    
+    @staticmethod
+    def iter_organization_table(orgs: List[Organization]) -> Iterator[str]:
+        """
+        Yield an HTML table for local organizations, one row at a time.
+        
+        Args:
+            orgs: List of Organization objects
+            
+        Yields:
+            HTML string chunks: the table head, each row, then the close
+        """
         if not orgs:
-            return ""
+            return
         
-        html = '<div class="table-wrapper">\n'
-        html += '<table class="search-table organization-table">\n'
-        html += '  <caption>Local Organizations and Resources</caption>\n'
-        html += '  <thead>\n'
-        html += '    <tr>\n'
-        html += '      <th>Organization</th>\n'
-        html += '      <th>Description</th>\n'
-        html += '      <th>Location</th>\n'
-        html += '      <th>Website</th>\n'
-        html += '    </tr>\n'
-        html += '  </thead>\n'
-        html += '  <tbody>\n'
+        e = ContentFormatter._escape_html
+        yield _ORGANIZATION_TABLE_HEAD
         
         for org in orgs:
-            html += '    <tr>\n'
-            html += f'      <td class="org-name">{ContentFormatter._escape_html(org.name)}</td>\n'
-            html += f'      <td class="org-description">{ContentFormatter._escape_html(org.description)}</td>\n'
-            html += f'      <td class="org-location">{ContentFormatter._escape_html(org.location)}</td>\n'
-            
             if org.website:
-                html += f'      <td class="org-website"><a href="{org.website}" target="_blank" rel="noopener noreferrer">Visit Website</a></td>\n'
+                website = f'<a href="{org.website}" target="_blank" rel="noopener noreferrer">Visit Website</a>'
             else:
-                html += '      <td class="org-website">N/A</td>\n'
-            
-            html += '    </tr>\n'
-        
-        html += '  </tbody>\n'
-        html += '</table>\n'
-        html += '</div>\n'
+                website = 'N/A'
+            yield (
+                '    <tr>\n'
+                f'      <td class="org-name">{e(org.name)}</td>\n'
+                f'      <td class="org-description">{e(org.description)}</td>\n'
+                f'      <td class="org-location">{e(org.location)}</td>\n'
+                f'      <td class="org-website">{website}</td>\n'
+                '    </tr>\n'
+            )
         
-        return html
+        yield _TABLE_CLOSE
     
     @staticmethod
     def format_grant_table(grants: List[Grant]) -> str:
@@ -173,37 +239,37 @@ class ContentFormatter:
         Returns:
             HTML table string with responsive classes
         """
+        return ''.join(ContentFormatter.iter_grant_table(grants))
+    
+    @staticmethod
+    def iter_grant_table(grants: List[Grant]) -> Iterator[str]:
+        """
+        Yield an HTML table for funding opportunities, one row at a time.
+        
+        Args:
+            grants: List of Grant objects
+            
+        Yields:
+            HTML string chunks: the table head, each row, then the close
+        """
         if not grants:
-            return ""
+            return
         
-        html = '<div class="table-wrapper">\n'
-        html += '<table class="search-table grant-table">\n'
-        html += '  <caption>Grant Opportunities</caption>\n'
-        html += '  <thead>\n'
-        html += '    <tr>\n'
-        html += '      <th>Grant Name</th>\n'
-        html += '      <th>Funder</th>\n'
-        html += '      <th>Amount</th>\n'
-        html += '      <th>Deadline</th>\n'
-        html += '      <th>Application</th>\n'
-        html += '    </tr>\n'
-        html += '  </thead>\n'
-        html += '  <tbody>\n'
+        e = ContentFormatter._escape_html
+        yield _GRANT_TABLE_HEAD
         
         for grant in grants:
-            html += '    <tr>\n'
-            html += f'      <td class="grant-name">{ContentFormatter._escape_html(grant.name)}</td>\n'
-            html += f'      <td class="grant-funder">{ContentFormatter._escape_html(grant.funder)}</td>\n'
-            html += f'      <td class="grant-amount">{ContentFormatter._escape_html(grant.amount or "Varies")}</td>\n'
-            html += f'      <td class="grant-deadline">{ContentFormatter._escape_html(grant.deadline or "See website")}</td>\n'
-            html += f'      <td class="grant-link"><a href="{grant.application_url}" target="_blank" rel="noopener noreferrer">Apply</a></td>\n'
-            html += '    </tr>\n'
-        
-        html += '  </tbody>\n'
-        html += '</table>\n'
-        html += '</div>\n'
-        
-        return html
+            yield (
+                '    <tr>\n'
+                f'      <td class="grant-name">{e(grant.name)}</td>\n'
+                f'      <td class="grant-funder">{e(grant.funder)}</td>\n'
+                f'      <td class="grant-amount">{e(grant.amount or "Varies")}</td>\n'
+                f'      <td class="grant-deadline">{e(grant.deadline or "See website")}</td>\n'
+                f'      <td class="grant-link"><a href="{grant.application_url}" target="_blank" rel="noopener noreferrer">Apply</a></td>\n'
+                '    </tr>\n'
+            )
+        
+        yield _TABLE_CLOSE
     
     @staticmethod
     def format_resource_table(resources: List[Resource]) -> str:
@@ -216,37 +282,94 @@ class ContentFormatter:
         Returns:
             HTML table string with responsive classes
         """
+        return ''.join(ContentFormatter.iter_resource_table(resources))
+    
+    @staticmethod
+    def iter_resource_table(resources: List[Resource]) -> Iterator[str]:
+        """
+        Yield an HTML table for tools and platforms, one row at a time.
+        
+        Args:
+            resources: List of Resource objects
+            
+        Yields:
+            HTML string chunks: the table head, each row, then the close
+        """
         if not resources:
-            return ""
+            return
         
-        html = '<div class="table-wrapper">\n'
-        html += '<table class="search-table resource-table">\n'
-        html += '  <caption>Tools and Resources</caption>\n'
-        html += '  <thead>\n'
-        html += '    <tr>\n'
-        html += '      <th>Resource</th>\n'
-        html += '      <th>Description</th>\n'
-        html += '      <th>Type</th>\n'
-        html += '      <th>Cost</th>\n'
-        html += '      <th>Link</th>\n'
-        html += '    </tr>\n'
-        html += '  </thead>\n'
-        html += '  <tbody>\n'
+        e = ContentFormatter._escape_html
+        yield _RESOURCE_TABLE_HEAD
         
         for resource in resources:
-            html += '    <tr>\n'
-            html += f'      <td class="resource-title">{ContentFormatter._escape_html(resource.title)}</td>\n'
-            html += f'      <td class="resource-description">{ContentFormatter._escape_html(resource.description)}</td>\n'
-            html += f'      <td class="resource-type">{ContentFormatter._escape_html(resource.resource_type.title())}</td>\n'
-            html += f'      <td class="resource-cost">{ContentFormatter._escape_html(resource.cost or "Unknown")}</td>\n'
-            html += f'      <td class="resource-link"><a href="{resource.url}" target="_blank" rel="noopener noreferrer">Visit</a></td>\n'
-            html += '    </tr>\n'
-        
-        html += '  </tbody>\n'
-        html += '</table>\n'
-        html += '</div>\n'
-        
-        return html
+            yield (
+                '    <tr>\n'
+                f'      <td class="resource-title">{e(resource.title)}</td>\n'
+                f'      <td class="resource-description">{e(resource.description)}</td>\n'
+                f'      <td class="resource-type">{e(resource.resource_type.title())}</td>\n'
+                f'      <td class="resource-cost">{e(resource.cost or "Unknown")}</td>\n'
+                f'      <td class="resource-link"><a href="{resource.url}" target="_blank" rel="noopener noreferrer">Visit</a></td>\n'
+                '    </tr>\n'
+            )
+        
+        yield _TABLE_CLOSE
+    
+    @staticmethod
+    def format_structured_content(data: Dict, columns: Tuple[str, str, str, str]) -> str:
+        """
+        Render structured content returned as JSON by the AI into HTML.
+        
+        The AI returns a compact JSON object instead of HTML markup, which
+        saves output tokens; the table scaffolding is added here.
+        
+        Args:
+            data: Dict with 'headline', 'intro', 'items' and 'closing' keys.
+                Each item has 'name', 'description', 'url' and 'notes'.
+            columns: Header labels for the name, description, link and notes columns
+            
+        Returns:
+            HTML string with the content and a results table
+        """
+        escape = ContentFormatter._escape_html
+        
+        parts = []
+        if data.get('headline'):
+            parts.append(f'<h3>{escape(str(data["headline"]))}</h3>\n')
+        if data.get('intro'):
+            parts.append(f'<p>{escape(str(data["intro"]))}</p>\n')
+        
+        items = [item for item in data.get('items') or [] if isinstance(item, dict)]
+        if items:
+            parts.append('<div class="table-wrapper">\n'
+                         '<table class="search-results-table">\n'
+                         '  <thead>\n'
+                         '    <tr>\n')
+            parts.extend(f'      <th>{escape(column)}</th>\n' for column in columns)
+            parts.append('    </tr>\n'
+                         '  </thead>\n'
+                         '  <tbody>\n')
+            
+            for item in items:
+                url = str(item.get('url') or '')
+                if url.startswith(('http://', 'https://')):
+                    link = f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer">Visit Website</a>'
+                else:
+                    link = 'N/A'
+                parts.append(
+                    '    <tr>\n'
+                    f'      <td>{escape(str(item.get("name") or ""))}</td>\n'
+                    f'      <td>{escape(str(item.get("description") or ""))}</td>\n'
+                    f'      <td>{link}</td>\n'
+                    f'      <td>{escape(str(item.get("notes") or ""))}</td>\n'
+                    '    </tr>\n'
+                )
+            
+            parts.append(_TABLE_CLOSE)
+        
+        if data.get('closing'):
+            parts.append(f'<p>{escape(str(data["closing"]))}</p>\n')
+        
+        return ''.join(parts)
     
     @staticmethod
     def _escape_html(text: str) -> str:
@@ -262,6 +385,9 @@ class ContentFormatter:
         if not text:
             return ""
         
+        # Chained replace() is faster here than str.translate: replace
+        # returns the same string untouched when the character is absent
+        # (most cells), while translate goes character by character
         return (text
                 .replace('&', '&amp;')
                 .replace('<', '&lt;')
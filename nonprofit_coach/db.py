@@ -1,23 +1,199 @@
 import sqlite3
 import os
+import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Optional, Dict, List, Any
 
+logger = logging.getLogger(__name__)
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'nonprofit.db')
 
+# Idea rows are read on nearly every request but rarely change, so they are
+# cached in memory. Writes through this module clear the cache; the TTL
+# bounds how stale another worker process's copy can get.
+IDEA_CACHE_TTL = 60
+IDEA_CACHE_SIZE = 4096
+_idea_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_all_ideas_cache: Optional[tuple] = None
+_idea_cache_lock = threading.Lock()
+# Bumped by every clear_idea_cache. A reader only caches the row it fetched
+# if no clear happened since its lookup, so a read that raced a write can't
+# put the old row back after the write cleared it.
+_idea_cache_generation = 0
+
+
+def clear_idea_cache(idea_id: Optional[int] = None):
+    """
+    Drop cached idea rows.
+    
+    Args:
+        idea_id: Idea to drop, or None to drop every cached idea
+    """
+    global _all_ideas_cache, _idea_cache_generation
+    with _idea_cache_lock:
+        if idea_id is None:
+            _idea_cache.clear()
+        else:
+            _idea_cache.pop(int(idea_id), None)
+        _all_ideas_cache = None
+        _idea_cache_generation += 1
+
+
+# Per-connection settings. With WAL (enabled in init_db) NORMAL only syncs
+# at checkpoints, which is still safe against corruption, and lets commits
+# skip an fsync each. Connections live for the thread's lifetime, so a
+# larger page cache (20MB) keeps hot rows in memory between requests.
+_CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA foreign_keys=ON',
+)
+
+# Compiled statements kept per connection. Python's default of 128 already
+# covers every query in this module; the explicit value keeps it that way.
+_CACHED_STATEMENTS = 200
+
+# Long-lived connections, one per thread
+_local = threading.local()
+
+# Set once init_db has run in this process
+_initialized = False
+_init_lock = threading.Lock()
+
 
 def get_connection():
     """Create and return a database connection."""
-    conn = sqlite3.connect(DB_PATH)
+    # Wait for a concurrent writer instead of failing with "database is locked"
+    conn = sqlite3.connect(DB_PATH, timeout=10, cached_statements=_CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+def _thread_connection():
+    """
+    Return this thread's connection.
+    
+    Each thread keeps one connection open instead of connecting (and
+    applying the pragmas) per query. In WAL mode readers never wait on
+    writers, and a plain SELECT holds no transaction open, so each query
+    sees the latest committed data. Writes run in a `with conn:` block so
+    they commit, or roll back on error, without leaving the shared
+    connection inside a transaction.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        _ensure_initialized()
+        conn = _local.conn = get_connection()
+    return conn
+
+
+def _ensure_initialized():
+    """
+    Run init_db the first time this process uses the database.
+    
+    Done lazily rather than on import, so importing this module (tests,
+    CLI commands, gunicorn's master) touches no files.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            init_db()
+            _initialized = True
+
+
+def _list_cursor(conn):
+    """Return a cursor yielding plain tuples, for use with _fetch_dicts."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def _fetch_dicts(cursor) -> List[Dict[str, Any]]:
+    """
+    Fetch the remaining rows of a query as dicts.
+    
+    The cursor should come from _list_cursor, so rows arrive as plain
+    tuples and the column names are looked up once per query rather than
+    once per row.
+    """
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+# Tables whose rows belong to an idea. Deleting an idea deletes its rows
+# through ON DELETE CASCADE (foreign keys are enabled per connection).
+_CHILD_TABLES = {
+    'content': '''
+        CREATE TABLE IF NOT EXISTS content (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idea_id INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            content_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (idea_id) REFERENCES ideas (id) ON DELETE CASCADE
+        )
+    ''',
+    'volunteers': '''
+        CREATE TABLE IF NOT EXISTS volunteers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idea_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            task TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (idea_id) REFERENCES ideas (id) ON DELETE CASCADE
+        )
+    ''',
+}
+
+
+def _migrate_cascading_deletes(conn):
+    """
+    Rebuild child tables created before their foreign keys cascaded.
+    
+    SQLite can't change a foreign key in place, so the table is renamed,
+    recreated from _CHILD_TABLES and its rows copied back, all in one
+    transaction. Its indexes are dropped with the old table and recreated
+    by init_db afterwards.
+    """
+    for table, create_sql in _CHILD_TABLES.items():
+        foreign_keys = conn.execute(f'PRAGMA foreign_key_list({table})').fetchall()
+        if all(fk['on_delete'] == 'CASCADE' for fk in foreign_keys):
+            continue
+        
+        with conn:
+            conn.execute('BEGIN')
+            conn.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+            conn.execute(create_sql)
+            conn.execute(f'INSERT INTO {table} SELECT * FROM {table}_old')
+            conn.execute(f'DROP TABLE {table}_old')
+
+
 def init_db():
     """Initialize the database with required tables."""
     conn = get_connection()
     cursor = conn.cursor()
     
+    # Rows left by an idea deleted before deletes cascaded would fail the
+    # foreign key check while being copied by the migration
+    cursor.execute('PRAGMA foreign_keys=OFF')
+    
+    # Write-ahead logging lets readers run alongside a writer. The mode is
+    # stored in the database file, so setting it once here is enough.
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     # Create ideas table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS ideas (
@@ -36,32 +212,30 @@ def init_db():
         )
     ''')
     
-    # Create content table
+    # Create content and volunteers tables
+    for create_sql in _CHILD_TABLES.values():
+        cursor.execute(create_sql)
+    _migrate_cascading_deletes(conn)
+    
+    # Every content/volunteer lookup (and delete_idea) filters by idea, and
+    # the ideas list is sorted by date; without these each one is a full scan
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS content (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            idea_id INTEGER NOT NULL,
-            section TEXT NOT NULL,
-            content_type TEXT NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (idea_id) REFERENCES ideas (id)
-        )
+        CREATE INDEX IF NOT EXISTS idx_content_idea
+        ON content (idea_id, section, content_type, created_at)
     ''')
-    
-    # Create volunteers table (optional)
+    # Section pages list every content type at once, newest first; this one
+    # lets that query read rows in order instead of sorting them
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS volunteers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            idea_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            address TEXT,
-            task TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (idea_id) REFERENCES ideas (id)
-        )
+        CREATE INDEX IF NOT EXISTS idx_content_idea_section
+        ON content (idea_id, section, created_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_volunteers_idea
+        ON volunteers (idea_id, created_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ideas_created_at
+        ON ideas (created_at)
     ''')
     
     conn.commit()
@@ -78,53 +252,52 @@ def save_idea(idea_data: Dict[str, Any]) -> int:
     Returns:
         The ID of the saved idea
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if 'id' in idea_data and idea_data['id']:
-        # Update existing idea
-        cursor.execute('''
-            UPDATE ideas 
-            SET title = ?, description = ?, importance = ?, 
-                beneficiaries = ?, implementation = ?, significance = ?, 
-                uniqueness = ?, location = ?, api_key = ?, status = ?
-            WHERE id = ?
-        ''', (
-            idea_data.get('title', ''),
-            idea_data.get('description', ''),
-            idea_data.get('importance', ''),
-            idea_data.get('beneficiaries', ''),
-            idea_data.get('implementation', ''),
-            idea_data.get('significance', ''),
-            idea_data.get('uniqueness', ''),
-            idea_data.get('location', ''),
-            idea_data.get('api_key'),
-            idea_data.get('status', 'draft'),
-            idea_data['id']
-        ))
-        idea_id = idea_data['id']
-    else:
-        # Insert new idea
-        cursor.execute('''
-            INSERT INTO ideas (title, description, importance, beneficiaries, 
-                             implementation, significance, uniqueness, location, api_key, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            idea_data.get('title', ''),
-            idea_data.get('description', ''),
-            idea_data.get('importance', ''),
-            idea_data.get('beneficiaries', ''),
-            idea_data.get('implementation', ''),
-            idea_data.get('significance', ''),
-            idea_data.get('uniqueness', ''),
-            idea_data.get('location', ''),
-            idea_data.get('api_key'),
-            idea_data.get('status', 'draft')
-        ))
-        idea_id = cursor.lastrowid
-    
-    conn.commit()
-    conn.close()
+    conn = _thread_connection()
+    with conn:
+        cursor = conn.cursor()
+        
+        if 'id' in idea_data and idea_data['id']:
+            # Update existing idea
+            cursor.execute('''
+                UPDATE ideas 
+                SET title = ?, description = ?, importance = ?, 
+                    beneficiaries = ?, implementation = ?, significance = ?, 
+                    uniqueness = ?, location = ?, api_key = ?, status = ?
+                WHERE id = ?
+            ''', (
+                idea_data.get('title', ''),
+                idea_data.get('description', ''),
+                idea_data.get('importance', ''),
+                idea_data.get('beneficiaries', ''),
+                idea_data.get('implementation', ''),
+                idea_data.get('significance', ''),
+                idea_data.get('uniqueness', ''),
+                idea_data.get('location', ''),
+                idea_data.get('api_key'),
+                idea_data.get('status', 'draft'),
+                idea_data['id']
+            ))
+            idea_id = idea_data['id']
+        else:
+            # Insert new idea
+            cursor.execute('''
+                INSERT INTO ideas (title, description, importance, beneficiaries, 
+                                 implementation, significance, uniqueness, location, api_key, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                idea_data.get('title', ''),
+                idea_data.get('description', ''),
+                idea_data.get('importance', ''),
+                idea_data.get('beneficiaries', ''),
+                idea_data.get('implementation', ''),
+                idea_data.get('significance', ''),
+                idea_data.get('uniqueness', ''),
+                idea_data.get('location', ''),
+                idea_data.get('api_key'),
+                idea_data.get('status', 'draft')
+            ))
+            idea_id = cursor.lastrowid
+    clear_idea_cache(idea_id)
     return idea_id
 
 
@@ -138,16 +311,36 @@ def get_idea_by_id(idea_id: int) -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary containing idea data or None if not found
     """
-    conn = get_connection()
+    # Routes may pass the id from JSON as a string; cache under one key
+    # either way, and treat an id that isn't a number as not found
+    try:
+        idea_id = int(idea_id)
+    except (TypeError, ValueError):
+        return None
+    now = time.monotonic()
+    with _idea_cache_lock:
+        cached = _idea_cache.get(idea_id)
+        if cached and cached[0] > now:
+            _idea_cache.move_to_end(idea_id)
+            # Copy so callers can't modify the cached row
+            return dict(cached[1])
+        generation = _idea_cache_generation
+    
+    conn = _thread_connection()
     cursor = conn.cursor()
     
     cursor.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,))
     row = cursor.fetchone()
     
-    conn.close()
-    
     if row:
-        return dict(row)
+        idea = dict(row)
+        with _idea_cache_lock:
+            if generation == _idea_cache_generation:
+                _idea_cache[idea_id] = (now + IDEA_CACHE_TTL, idea)
+                _idea_cache.move_to_end(idea_id)
+                if len(_idea_cache) > IDEA_CACHE_SIZE:
+                    _idea_cache.popitem(last=False)
+        return dict(idea)
     return None
 
 
@@ -158,15 +351,29 @@ def get_all_ideas() -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing idea data
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM ideas ORDER BY created_at DESC')
-    rows = cursor.fetchall()
+    global _all_ideas_cache
+    now = time.monotonic()
+    with _idea_cache_lock:
+        cached = _all_ideas_cache
+        generation = _idea_cache_generation
+    if cached and cached[0] > now:
+        return [dict(idea) for idea in cached[1]]
     
-    conn.close()
+    conn = _thread_connection()
+    cursor = _list_cursor(conn)
     
-    return [dict(row) for row in rows]
+    cursor.execute('SELECT * FROM ideas ORDER BY created_at DESC')
+    ideas = _fetch_dicts(cursor)
+    with _idea_cache_lock:
+        if generation == _idea_cache_generation:
+            _all_ideas_cache = (now + IDEA_CACHE_TTL, ideas)
+    return [dict(idea) for idea in ideas]
+
+
+_INSERT_CONTENT = '''
+    INSERT INTO content (idea_id, section, content_type, content)
+    VALUES (?, ?, ?, ?)
+'''
 
 
 def save_content(idea_id: int, section: str, content_type: str, content: str) -> int:
@@ -182,19 +389,41 @@ def save_content(idea_id: int, section: str, content_type: str, content: str) ->
     Returns:
         The ID of the saved content
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    conn = _thread_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute(_INSERT_CONTENT, (idea_id, section, content_type, content))
+        content_id = cursor.lastrowid
     
-    cursor.execute('''
-        INSERT INTO content (idea_id, section, content_type, content)
-        VALUES (?, ?, ?, ?)
-    ''', (idea_id, section, content_type, content))
+    return content_id
+
+
+def save_contents_bulk(idea_id: int, contents: List[Dict[str, Any]]) -> int:
+    """
+    Save several pieces of generated content at once, e.g. a finished batch.
     
-    content_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    Like save_volunteers_bulk, the rows go in with executemany in one
+    transaction and a single commit.
     
-    return content_id
+    Args:
+        idea_id: The ID of the associated idea
+        contents: List of dictionaries with 'section', 'content_type' and
+            'content' keys
+        
+    Returns:
+        The number of content items saved
+    """
+    conn = _thread_connection()
+    with conn:
+        cursor = conn.executemany(
+            _INSERT_CONTENT,
+            [
+                (idea_id, item['section'], item['content_type'], item['content'])
+                for item in contents
+            ]
+        )
+    
+    return cursor.rowcount
 
 
 def get_content_by_idea_and_section(idea_id: int, section: str, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -209,8 +438,8 @@ def get_content_by_idea_and_section(idea_id: int, section: str, content_type: Op
     Returns:
         List of dictionaries containing content data
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    conn = _thread_connection()
+    cursor = _list_cursor(conn)
     
     if content_type:
         cursor.execute('''
@@ -225,10 +454,25 @@ def get_content_by_idea_and_section(idea_id: int, section: str, content_type: Op
             ORDER BY created_at DESC
         ''', (idea_id, section))
     
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return [dict(row) for row in rows]
+    return _fetch_dicts(cursor)
+
+
+_INSERT_VOLUNTEER = '''
+    INSERT INTO volunteers (idea_id, name, email, phone, address, task)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+def _volunteer_row(idea_id: int, volunteer_data: Dict[str, Any]) -> tuple:
+    """Build the _INSERT_VOLUNTEER parameters for one volunteer."""
+    return (
+        idea_id,
+        volunteer_data.get('name', ''),
+        volunteer_data.get('email', ''),
+        volunteer_data.get('phone', ''),
+        volunteer_data.get('address', ''),
+        volunteer_data.get('task', '')
+    )
 
 
 def save_volunteer(idea_id: int, volunteer_data: Dict[str, Any]) -> int:
@@ -242,26 +486,38 @@ def save_volunteer(idea_id: int, volunteer_data: Dict[str, Any]) -> int:
     Returns:
         The ID of the saved volunteer
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    conn = _thread_connection()
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute(_INSERT_VOLUNTEER, _volunteer_row(idea_id, volunteer_data))
+        volunteer_id = cursor.lastrowid
     
-    cursor.execute('''
-        INSERT INTO volunteers (idea_id, name, email, phone, address, task)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (
-        idea_id,
-        volunteer_data.get('name', ''),
-        volunteer_data.get('email', ''),
-        volunteer_data.get('phone', ''),
-        volunteer_data.get('address', ''),
-        volunteer_data.get('task', '')
-    ))
+    return volunteer_id
+
+
+def save_volunteers_bulk(idea_id: int, volunteers: List[Dict[str, Any]]) -> int:
+    """
+    Save several volunteers at once, e.g. from an imported sign-up sheet.
     
-    volunteer_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    All rows go in with executemany in one transaction, so the import pays
+    for a single commit instead of one per volunteer, and either every row
+    is saved or none are.
     
-    return volunteer_id
+    Args:
+        idea_id: The ID of the associated idea
+        volunteers: List of dictionaries containing volunteer fields
+        
+    Returns:
+        The number of volunteers saved
+    """
+    conn = _thread_connection()
+    with conn:
+        cursor = conn.executemany(
+            _INSERT_VOLUNTEER,
+            [_volunteer_row(idea_id, volunteer) for volunteer in volunteers]
+        )
+    
+    return cursor.rowcount
 
 
 def get_volunteers_by_idea(idea_id: int) -> List[Dict[str, Any]]:
@@ -274,19 +530,16 @@ def get_volunteers_by_idea(idea_id: int) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing volunteer data
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    conn = _thread_connection()
+    cursor = _list_cursor(conn)
     
     cursor.execute('''
-        SELECT * FROM volunteers 
+        SELECT * FROM volunteers
         WHERE idea_id = ?
         ORDER BY created_at DESC
     ''', (idea_id,))
     
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return [dict(row) for row in rows]
+    return _fetch_dicts(cursor)
 
 
 def delete_idea(idea_id: int) -> bool:
@@ -300,26 +553,13 @@ def delete_idea(idea_id: int) -> bool:
         True if successful, False otherwise
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Delete associated content
-        cursor.execute('DELETE FROM content WHERE idea_id = ?', (idea_id,))
-        
-        # Delete associated volunteers
-        cursor.execute('DELETE FROM volunteers WHERE idea_id = ?', (idea_id,))
-        
-        # Delete the idea
-        cursor.execute('DELETE FROM ideas WHERE id = ?', (idea_id,))
-        
-        conn.commit()
-        conn.close()
+        conn = _thread_connection()
+        with conn:
+            # Associated content and volunteers are removed by ON DELETE CASCADE
+            conn.execute('DELETE FROM ideas WHERE id = ?', (idea_id,))
+        clear_idea_cache(idea_id)
         
         return True
     except Exception as e:
-        print(f"Error deleting idea: {e}")
+        logger.exception("Error deleting idea", extra={'idea_id': idea_id})
         return False
-
-
-# Initialize database on module import
-init_db()
@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for production deployments.
+
+Gunicorn loads this file automatically when started from this directory
+(see render.yaml and aws/deploy.sh). The AI endpoints spend nearly all of
+their time waiting on the Claude and search APIs, so each worker runs a
+pool of threads instead of gunicorn's default of one request per worker.
+"""
+
+import os
+
+# Threads release the GIL while waiting on network I/O, so one process
+# can hold many in-flight Claude calls at once
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+
+# Long generations and streamed responses can run well past gunicorn's
+# 30 second default before the worker is considered stuck
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+
+# Keep browser connections open between the questionnaire's many small requests
+keepalive = 5
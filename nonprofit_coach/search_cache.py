@@ -2,22 +2,95 @@
 Search cache implementation with TTL-based expiration.
 
 This module provides in-memory caching for search results to reduce
-API calls, improve performance, and prevent rate limit issues.
+API calls, improve performance, and prevent rate limit issues. Results
+can also be written through to SQLite so every worker process, and the
+next deploy, reuses them.
 """
 
 import hashlib
 import json
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Hashable, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
-class CacheEntry:
-    """Cache entry with data and expiration timestamp."""
-    data: Any
-    timestamp: datetime
-    expires_at: datetime
+from search_service import SearchResult, SearchResults, Organization, Grant, Resource
+
+logger = logging.getLogger(__name__)
+
+# Records that may appear in cached values. Persisted entries are stored as
+# JSON, with each record tagged by its type name so it can be rebuilt on
+# load; nothing read back from the shared table is ever executed.
+_RECORD_TYPES = {
+    cls.__name__: cls
+    for cls in (SearchResult, SearchResults, Organization, Grant, Resource)
+}
+_TYPE_TAG = '__type__'
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert a cached value to plain JSON types, tagging known records."""
+    if _RECORD_TYPES.get(type(value).__name__) is type(value):
+        fields = {name: _to_json_value(field) for name, field in value._asdict().items()}
+        fields[_TYPE_TAG] = type(value).__name__
+        return fields
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json_value(item) for key, item in value.items()}
+    return value
+
+
+def _from_json_value(value: Any) -> Any:
+    """Rebuild a value written by _to_json_value."""
+    if isinstance(value, list):
+        return [_from_json_value(item) for item in value]
+    if isinstance(value, dict):
+        fields = {key: _from_json_value(item) for key, item in value.items()}
+        type_name = fields.pop(_TYPE_TAG, None)
+        if type_name is None:
+            return fields
+        return _RECORD_TYPES[type_name](**fields)
+    return value
+
+
+def _dumps(value: Any) -> bytes:
+    """Serialize a cached value for the database."""
+    data = _to_json_value(value)
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+def _loads(data: bytes) -> Any:
+    """Deserialize a value written by _dumps."""
+    if orjson is not None:
+        return _from_json_value(orjson.loads(data))
+    return _from_json_value(json.loads(data))
+
+
+def _run_janitor(cache_ref: "weakref.ref[SearchCache]", interval: float):
+    """
+    Drop expired entries every interval seconds until the cache is gone.
+    
+    Only a weak reference is held between runs, so the thread doesn't keep
+    an unused cache alive.
+    """
+    while True:
+        time.sleep(interval)
+        cache = cache_ref()
+        if cache is None:
+            return
+        cache.cleanup_expired()
+        del cache
 
 
 class SearchCache:
@@ -26,66 +99,96 @@ class SearchCache:
     
     This cache stores search results temporarily to reduce API calls
     and improve response times. Entries automatically expire after
-    the configured TTL period.
+    the configured TTL period. When full, the least recently used
+    entry is evicted.
     """
     
-    def __init__(self, ttl_seconds: int = 86400, max_size: int = 1000):
+    def __init__(self, ttl_seconds: int = 86400, max_size: int = 1000,
+                 db_path: Optional[str] = None,
+                 cleanup_interval: Optional[float] = None):
         """
         Initialize the search cache.
         
         Args:
             ttl_seconds: Time-to-live in seconds (default: 24 hours)
             max_size: Maximum number of cache entries (default: 1000)
+            db_path: Optional SQLite database to persist entries in, shared
+                by all processes using the same file
+            cleanup_interval: Seconds between background sweeps for expired
+                entries (default: a tenth of the TTL, 0 to disable)
         """
-        self.cache: Dict[str, CacheEntry] = {}
+        # Kept in least to most recently used order, so lookups, inserts
+        # and evictions are all O(1). Entries are (expires_at, data) tuples,
+        # with expires_at in time.monotonic() seconds; a tuple is much
+        # smaller than an object with a __dict__.
+        self.cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
         self.ttl_seconds = ttl_seconds
         self.max_size = max_size
+        # One cache is shared by all request threads
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        # Database connections, one per thread, kept open between lookups
+        self._local = threading.local()
+        if db_path:
+            self._init_db()
+        
+        # Expired entries are otherwise only dropped when looked up again or
+        # pushed out by newer ones; sweep them on a daemon thread so no
+        # request pays for the scan
+        if cleanup_interval is None:
+            cleanup_interval = max(ttl_seconds / 10, 1)
+        if cleanup_interval > 0:
+            threading.Thread(
+                target=_run_janitor,
+                args=(weakref.ref(self), cleanup_interval),
+                name="search-cache-janitor",
+                daemon=True
+            ).start()
     
-    def get(self, cache_key: str) -> Optional[Any]:
+    def get(self, cache_key: Hashable) -> Optional[Any]:
         """
         Retrieve cached results if not expired.
         
         Args:
-            cache_key: The cache key to lookup
+            cache_key: The cache key to lookup, either a string from
+                generate_key or a tuple of strings, numbers and tuples
             
         Returns:
             Cached data if found and not expired, None otherwise
         """
-        if cache_key not in self.cache:
-            return None
+        with self._lock:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                if time.monotonic() > entry[0]:
+                    # Remove expired entry
+                    del self.cache[cache_key]
+                    entry = None
+                else:
+                    self.cache.move_to_end(cache_key)
         
-        entry = self.cache[cache_key]
+        if entry is None and self.db_path:
+            entry = self._load(cache_key)
+            if entry is not None:
+                with self._lock:
+                    self._insert(cache_key, entry)
         
-        # Check if entry has expired
-        if datetime.now() > entry.expires_at:
-            # Remove expired entry
-            del self.cache[cache_key]
-            return None
-        
-        return entry.data
+        return entry[1] if entry is not None else None
     
-    def set(self, cache_key: str, results: Any):
+    def set(self, cache_key: Hashable, results: Any):
         """
-        Store results in cache with timestamp.
+        Store results in cache with their expiry time.
         
         Args:
             cache_key: The cache key to store under
             results: The data to cache
         """
-        # Enforce max size by removing oldest entries
-        if len(self.cache) >= self.max_size:
-            self._evict_oldest()
-        
-        now = datetime.now()
-        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        entry = (time.monotonic() + self.ttl_seconds, results)
         
-        entry = CacheEntry(
-            data=results,
-            timestamp=now,
-            expires_at=expires_at
-        )
+        with self._lock:
+            self._insert(cache_key, entry)
         
-        self.cache[cache_key] = entry
+        if self.db_path:
+            self._save(cache_key, entry)
     
     def generate_key(self, query: str, params: Dict) -> str:
         """
@@ -99,15 +202,19 @@ class SearchCache:
             params: Dictionary of search parameters
             
         Returns:
-            SHA256 hash string to use as cache key
+            128-bit BLAKE2b hex digest to use as cache key
         """
-        # Create a deterministic string representation
-        params_str = json.dumps(params, sort_keys=True)
-        key_string = f"{query}:{params_str}"
+        # Create a deterministic representation. orjson sorts keys in C,
+        # about 10x faster than json.dumps for these small nested dicts.
+        if orjson is not None:
+            params_bytes = orjson.dumps(params, option=orjson.OPT_SORT_KEYS)
+        else:
+            params_bytes = json.dumps(params, sort_keys=True).encode()
+        key_bytes = query.encode() + b":" + params_bytes
         
-        # Generate hash
-        hash_object = hashlib.sha256(key_string.encode())
-        return hash_object.hexdigest()
+        # The key only needs to be unique, not cryptographically strong, so
+        # use the same short BLAKE2b digest as the other caches
+        return hashlib.blake2b(key_bytes, digest_size=16).hexdigest()
     
     def cleanup_expired(self):
         """
@@ -116,36 +223,129 @@ class SearchCache:
         This method can be called periodically to free memory
         from expired entries that haven't been accessed.
         """
-        now = datetime.now()
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if now > entry.expires_at
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
+        now = time.monotonic()
+        with self._lock:
+            expired_keys = [
+                key for key, (expires_at, _) in self.cache.items()
+                if now > expires_at
+            ]
+            
+            for key in expired_keys:
+                del self.cache[key]
     
-    def _evict_oldest(self):
+    def _insert(self, cache_key: Hashable, entry: Tuple[float, Any]):
         """
-        Evict the oldest cache entry to make room for new entries.
+        Add an entry as the most recently used, evicting the least
+        recently used entries past max_size. Caller must hold the lock.
+        """
+        self.cache[cache_key] = entry
+        self.cache.move_to_end(cache_key)
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+    
+    def clear(self):
+        """Clear all cache entries."""
+        with self._lock:
+            self.cache.clear()
+        if self.db_path:
+            self._execute('DELETE FROM search_cache')
+    
+    def _init_db(self):
+        """Create the persistent cache table and drop expired rows."""
+        self._execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                timestamp REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self._execute('DELETE FROM search_cache WHERE expires_at < ?',
+                      (time.time(),))
+    
+    def _load(self, cache_key: Hashable) -> Optional[Tuple[float, Any]]:
+        """
+        Read an unexpired entry from the database.
         
-        Uses LRU-like eviction by removing the entry with the
-        oldest timestamp.
+        The table stores wall clock times, since time.monotonic() values
+        mean nothing to another process; they are converted here.
         """
-        if not self.cache:
+        wall_now = time.time()
+        rows = self._execute('''
+            SELECT data, expires_at FROM search_cache
+            WHERE key = ? AND expires_at > ?
+        ''', (self._db_key(cache_key), wall_now))
+        if not rows:
+            return None
+        
+        data, expires_at = rows[0]
+        try:
+            results = _loads(data)
+        except Exception as e:
+            logger.warning("Discarding unreadable search cache entry: %s", e)
+            return None
+        
+        return (time.monotonic() + (expires_at - wall_now), results)
+    
+    def _save(self, cache_key: Hashable, entry: Tuple[float, Any]):
+        """Write an entry to the database, with wall clock times."""
+        expires_at, data = entry
+        try:
+            encoded = _dumps(data)
+        except TypeError as e:
+            # Still cached in memory, just not shared with other processes
+            logger.warning("Not persisting unserializable search cache entry: %s", e)
             return
         
-        # Find the oldest entry
-        oldest_key = min(
-            self.cache.keys(),
-            key=lambda k: self.cache[k].timestamp
-        )
+        expires_at += time.time() - time.monotonic()
+        self._execute('''
+            INSERT OR REPLACE INTO search_cache (key, data, timestamp, expires_at)
+            VALUES (?, ?, ?, ?)
+        ''', (
+            self._db_key(cache_key),
+            encoded,
+            expires_at - self.ttl_seconds,
+            expires_at
+        ))
+    
+    @staticmethod
+    def _db_key(cache_key: Hashable) -> str:
+        """
+        Turn a cache key into the string stored in the database.
         
-        del self.cache[oldest_key]
+        Tuple keys are serialized and hashed here, only when the database is
+        used, since their Python hash() differs between processes.
+        """
+        if isinstance(cache_key, str):
+            return cache_key
+        if orjson is not None:
+            key_bytes = orjson.dumps(cache_key)
+        else:
+            key_bytes = json.dumps(cache_key).encode()
+        return hashlib.blake2b(key_bytes, digest_size=16).hexdigest()
     
-    def clear(self):
-        """Clear all cache entries."""
-        self.cache.clear()
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        """
+        Run one statement against the persistent cache.
+        
+        Each thread reuses its own connection, so a lookup that misses costs
+        one query instead of opening and closing the database file. Database
+        errors are logged and treated as a miss, so a locked or missing
+        database never breaks searching.
+        """
+        conn = getattr(self._local, 'conn', None)
+        try:
+            if conn is None:
+                conn = self._local.conn = sqlite3.connect(self.db_path)
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Search cache database error: %s", e)
+            # Reconnect on the next call, in case the connection is at fault
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            return []
     
     def size(self) -> int:
         """
@@ -170,14 +370,15 @@ class SearchCache:
             'ttl_seconds': self.ttl_seconds
         }
         
-        if self.cache:
-            now = datetime.now()
-            oldest_entry = min(
-                self.cache.values(),
-                key=lambda e: e.timestamp
+        # Every entry lives ttl_seconds, so the oldest expires first
+        with self._lock:
+            first_expiry = min(
+                (expires_at for expires_at, _ in self.cache.values()),
+                default=None
             )
+        if first_expiry is not None:
             stats['oldest_entry_age_seconds'] = (
-                now - oldest_entry.timestamp
-            ).total_seconds()
+                self.ttl_seconds - (first_expiry - time.monotonic())
+            )
         
         return stats
@@ -7,37 +7,80 @@ search service initialization for the application.
 
 import os
 import logging
+import functools
+from dataclasses import dataclass, field
 from typing import Optional
 from search_service import SearchService
-from search_cache import SearchCache
+from db import DB_PATH
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Values left over from copying .env.example, which mean "not configured"
+_PLACEHOLDER_KEYS = frozenset({
+    'your_brave_api_key_here',
+    'your_google_api_key_here',
+    'your_google_engine_id_here',
+    'your_bing_api_key_here',
+})
 
+
+def _is_configured(value: Optional[str]) -> bool:
+    """Check that a key is set and isn't an example placeholder."""
+    return bool(value) and value not in _PLACEHOLDER_KEYS
+
+
+# Per provider: display name, the SearchConfig fields it needs, and how to
+# describe them when missing
+_PROVIDER_REQUIREMENTS = {
+    'brave': ("Brave Search", ('brave_api_key',), "Brave Search API key"),
+    'google': ("Google Search", ('google_api_key', 'google_engine_id'),
+               "Google Search API key or Engine ID"),
+    'bing': ("Bing Search", ('bing_api_key',), "Bing Search API key"),
+}
+
+
+@dataclass(frozen=True)
 class SearchConfig:
-    """Configuration manager for search service."""
-    
-    def __init__(self):
+    """Configuration for the search service, read from environment variables."""
+    provider_name: str = 'none'
+    enabled: bool = True
+    
+    # API Keys (left out of repr so they never end up in logs)
+    brave_api_key: Optional[str] = field(default=None, repr=False)
+    google_api_key: Optional[str] = field(default=None, repr=False)
+    google_engine_id: Optional[str] = None
+    bing_api_key: Optional[str] = field(default=None, repr=False)
+    
+    # Cache configuration
+    cache_ttl: int = 86400
+    cache_max_size: int = 1000
+    cache_persist: bool = True
+    
+    # Search behavior
+    timeout: int = 5
+    max_results: int = 10
+    retry_attempts: int = 1
+    
+    @classmethod
+    def from_env(cls) -> "SearchConfig":
         """Load configuration from environment variables."""
-        self.provider_name = os.getenv('SEARCH_PROVIDER', 'none').lower()
-        self.enabled = os.getenv('SEARCH_ENABLED', 'true').lower() == 'true'
-        
-        # API Keys
-        self.brave_api_key = os.getenv('BRAVE_API_KEY')
-        self.google_api_key = os.getenv('GOOGLE_SEARCH_API_KEY')
-        self.google_engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID')
-        self.bing_api_key = os.getenv('BING_SEARCH_API_KEY')
-        
-        # Cache configuration
-        self.cache_ttl = int(os.getenv('SEARCH_CACHE_TTL', '86400'))
-        self.cache_max_size = int(os.getenv('SEARCH_CACHE_MAX_SIZE', '1000'))
-        
-        # Search behavior
-        self.timeout = int(os.getenv('SEARCH_TIMEOUT', '5'))
-        self.max_results = int(os.getenv('SEARCH_MAX_RESULTS', '10'))
-        self.retry_attempts = int(os.getenv('SEARCH_RETRY_ATTEMPTS', '1'))
+        env = os.environ
+        return cls(
+            provider_name=env.get('SEARCH_PROVIDER', 'none').lower(),
+            enabled=env.get('SEARCH_ENABLED', 'true').lower() == 'true',
+            brave_api_key=env.get('BRAVE_API_KEY'),
+            google_api_key=env.get('GOOGLE_SEARCH_API_KEY'),
+            google_engine_id=env.get('GOOGLE_SEARCH_ENGINE_ID'),
+            bing_api_key=env.get('BING_SEARCH_API_KEY'),
+            cache_ttl=int(env.get('SEARCH_CACHE_TTL', '86400')),
+            cache_max_size=int(env.get('SEARCH_CACHE_MAX_SIZE', '1000')),
+            cache_persist=env.get('SEARCH_CACHE_PERSIST', 'true').lower() == 'true',
+            timeout=int(env.get('SEARCH_TIMEOUT', '5')),
+            max_results=int(env.get('SEARCH_MAX_RESULTS', '10')),
+            retry_attempts=int(env.get('SEARCH_RETRY_ATTEMPTS', '1'))
+        )
     
     def validate(self) -> bool:
         """
@@ -46,39 +89,27 @@ class SearchConfig:
         Returns:
             True if configuration is valid, False otherwise
         """
+        provider_name = self.provider_name
         if not self.enabled:
             logger.info("Search service is disabled")
             return True
         
-        if self.provider_name == 'none':
+        if provider_name == 'none':
             logger.info("No search provider configured, search will be disabled")
             return True
         
         # Validate provider-specific configuration
-        if self.provider_name == 'brave':
-            if not self.brave_api_key or self.brave_api_key == 'your_brave_api_key_here':
-                logger.warning("Brave Search API key not configured. Search will be disabled.")
-                return False
-            logger.info("Brave Search provider configured successfully")
-            return True
-        
-        elif self.provider_name == 'google':
-            if not self.google_api_key or not self.google_engine_id:
-                logger.warning("Google Search API key or Engine ID not configured. Search will be disabled.")
-                return False
-            logger.info("Google Search provider configured successfully")
-            return True
-        
-        elif self.provider_name == 'bing':
-            if not self.bing_api_key:
-                logger.warning("Bing Search API key not configured. Search will be disabled.")
-                return False
-            logger.info("Bing Search provider configured successfully")
-            return True
+        requirements = _PROVIDER_REQUIREMENTS.get(provider_name)
+        if requirements is None:
+            logger.warning(f"Unknown search provider: {provider_name}. Search will be disabled.")
+            return False
         
-        else:
-            logger.warning(f"Unknown search provider: {self.provider_name}. Search will be disabled.")
+        label, fields, description = requirements
+        if not all(_is_configured(getattr(self, name)) for name in fields):
+            logger.warning(f"{description} not configured. Search will be disabled.")
             return False
+        logger.info(f"{label} provider configured successfully")
+        return True
     
     def get_provider_info(self) -> dict:
         """
@@ -92,11 +123,62 @@ class SearchConfig:
             'enabled': self.enabled,
             'cache_ttl': self.cache_ttl,
             'cache_max_size': self.cache_max_size,
+            'cache_persist': self.cache_persist,
             'timeout': self.timeout,
             'max_results': self.max_results
         }
 
 
+@functools.lru_cache(maxsize=1)
+def _load_config() -> SearchConfig:
+    """
+    Return the search configuration, read from the environment once.
+    
+    Startup validation and create_search_service share the same instance;
+    it is frozen, so neither can change what the other sees.
+    """
+    return SearchConfig.from_env()
+
+
+def _build_brave(config: SearchConfig):
+    """Create the Brave Search provider."""
+    from search_providers.brave import BraveSearchProvider
+    return BraveSearchProvider(
+        api_key=config.brave_api_key,
+        timeout=config.timeout,
+        max_results=config.max_results
+    )
+
+
+def _build_google(config: SearchConfig):
+    """Create the Google Search provider."""
+    from search_providers.google import GoogleSearchProvider
+    return GoogleSearchProvider(
+        api_key=config.google_api_key,
+        engine_id=config.google_engine_id,
+        timeout=config.timeout,
+        max_results=config.max_results
+    )
+
+
+def _build_bing(config: SearchConfig):
+    """Create the Bing Search provider."""
+    from search_providers.bing import BingSearchProvider
+    return BingSearchProvider(
+        api_key=config.bing_api_key,
+        timeout=config.timeout,
+        max_results=config.max_results
+    )
+
+
+# Providers are imported by their factory, so only the configured one loads
+_PROVIDER_FACTORIES = {
+    'brave': _build_brave,
+    'google': _build_google,
+    'bing': _build_bing,
+}
+
+
 def create_search_service() -> Optional[SearchService]:
     """
     Create and configure a search service instance.
@@ -104,7 +186,7 @@ def create_search_service() -> Optional[SearchService]:
     Returns:
         SearchService instance if configured, None otherwise
     """
-    config = SearchConfig()
+    config = _load_config()
     
     # Validate configuration
     if not config.validate():
@@ -116,52 +198,21 @@ def create_search_service() -> Optional[SearchService]:
         return None
     
     # Import provider based on configuration
-    provider = None
-    
-    if config.provider_name == 'brave':
-        try:
-            from search_providers.brave import BraveSearchProvider
-            provider = BraveSearchProvider(
-                api_key=config.brave_api_key,
-                timeout=config.timeout,
-                max_results=config.max_results
-            )
-        except ImportError:
-            logger.error("BraveSearchProvider not found. Install required dependencies.")
-            return None
-    
-    elif config.provider_name == 'google':
-        try:
-            from search_providers.google import GoogleSearchProvider
-            provider = GoogleSearchProvider(
-                api_key=config.google_api_key,
-                engine_id=config.google_engine_id,
-                timeout=config.timeout,
-                max_results=config.max_results
-            )
-        except ImportError:
-            logger.error("GoogleSearchProvider not found. Install required dependencies.")
-            return None
-    
-    elif config.provider_name == 'bing':
-        try:
-            from search_providers.bing import BingSearchProvider
-            provider = BingSearchProvider(
-                api_key=config.bing_api_key,
-                timeout=config.timeout,
-                max_results=config.max_results
-            )
-        except ImportError:
-            logger.error("BingSearchProvider not found. Install required dependencies.")
-            return None
-    
-    if not provider:
+    factory = _PROVIDER_FACTORIES.get(config.provider_name)
+    if factory is None:
+        return None
+    try:
+        provider = factory(config)
+    except ImportError:
+        logger.error(f"{config.provider_name} search provider not found. Install required dependencies.")
         return None
     
-    # Create cache
+    # Create cache (imported here, since nothing needs it with search off)
+    from search_cache import SearchCache
     cache = SearchCache(
         ttl_seconds=config.cache_ttl,
-        max_size=config.cache_max_size
+        max_size=config.cache_max_size,
+        db_path=DB_PATH if config.cache_persist else None
     )
     
     # Create and return search service
@@ -178,25 +229,22 @@ def validate_search_config_on_startup():
     This function should be called when the Flask app starts
     to ensure search configuration is valid and log any issues.
     """
-    config = SearchConfig()
-    
-    logger.info("=" * 60)
-    logger.info("Search Service Configuration")
-    logger.info("=" * 60)
-    
-    info = config.get_provider_info()
-    for key, value in info.items():
-        logger.info(f"  {key}: {value}")
-    
+    config = _load_config()
     is_valid = config.validate()
     
     if is_valid and config.enabled and config.provider_name != 'none':
-        logger.info("✓ Search service is configured and ready")
+        level, status = logging.INFO, "✓ Search service is configured and ready"
     elif not config.enabled or config.provider_name == 'none':
-        logger.info("ℹ Search service is disabled")
+        level, status = logging.INFO, "ℹ Search service is disabled"
     else:
-        logger.warning("✗ Search service configuration has issues")
-    
-    logger.info("=" * 60)
+        level, status = logging.WARNING, "✗ Search service configuration has issues"
+    
+    # Logged as one record, so the block isn't interleaved with other
+    # workers' startup output
+    rule = "=" * 60
+    lines = [rule, "Search Service Configuration", rule]
+    lines.extend(f"  {key}: {value}" for key, value in config.get_provider_info().items())
+    lines += [status, rule]
+    logger.log(level, "\n".join(lines))
     
     return is_valid
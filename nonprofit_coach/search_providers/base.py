@@ -47,11 +47,27 @@ class SearchProvider(ABC):
         """
         pass
     
-    @abstractmethod
     def is_available(self) -> bool:
         """
         Check if the provider is configured and available.
         
+        The configuration doesn't change after the provider is created, so
+        _check_availability runs (and logs any problem) only once.
+        
+        Returns:
+            True if the provider has valid configuration (API key, etc.)
+            and is ready to use, False otherwise
+        """
+        available = getattr(self, '_available', None)
+        if available is None:
+            available = self._available = self._check_availability()
+        return available
+    
+    @abstractmethod
+    def _check_availability(self) -> bool:
+        """
+        Check the provider's configuration, for is_available.
+        
         Returns:
             True if the provider has valid configuration (API key, etc.)
             and is ready to use, False otherwise
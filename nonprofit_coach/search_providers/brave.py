@@ -5,17 +5,65 @@ This module implements the SearchProvider interface for Brave Search API,
 providing web search capabilities with result parsing and error handling.
 """
 
-import requests
+import functools
+import httpx
 import logging
+import re
 import time
-from typing import Dict, Optional
-from datetime import datetime
+from typing import Dict, Optional, Tuple
 from .base import SearchProvider
 from search_service import SearchResults, SearchResult
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Connection pool for Brave requests. The search service is shared by the
+# whole process, so all of its searches (including search_many's parallel
+# queries) reuse these keep-alive connections.
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+# Scheme and host of an absolute URL; the host (netloc) ends at the first
+# "/", "?" or "#", as with urllib.parse.urlparse, at about a third the cost
+_NETLOC_RE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)')
+
+# HTTP errors that retrying won't fix, with their message and error type
+_FATAL_HTTP_ERRORS = {
+    429: ("API rate limit exceeded", 'rate_limit'),
+    401: ("Invalid API key", 'api_error'),
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _extract_domain(url: str) -> str:
+    """
+    Extract domain from URL.
+    
+    Cached, since popular pages (government and foundation sites) come back
+    for many related queries.
+    
+    Args:
+        url: Full URL string
+        
+    Returns:
+        Domain name (e.g., 'example.com')
+    """
+    match = _NETLOC_RE.match(url or '')
+    return match.group(1) if match else ''
+
+
+def _http2_available() -> bool:
+    """Check whether httpx can negotiate HTTP/2 (requires the h2 package)."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
 
 class SearchError(Exception):
     """Custom exception for search-related errors."""
@@ -32,7 +80,7 @@ class SearchError(Exception):
         super().__init__(message)
         self.error_type = error_type
         self.original_error = original_error
-        self.timestamp = datetime.now()
+        self.timestamp = time.time()
 
 
 class BraveSearchProvider(SearchProvider):
@@ -43,7 +91,8 @@ class BraveSearchProvider(SearchProvider):
     with support for location-based queries and result filtering.
     """
     
-    def __init__(self, api_key: str, timeout: int = 5, max_results: int = 10):
+    def __init__(self, api_key: str, timeout: int = 5, max_results: int = 10,
+                 http_client: Optional[httpx.Client] = None):
         """
         Initialize Brave Search provider.
         
@@ -51,11 +100,24 @@ class BraveSearchProvider(SearchProvider):
             api_key: Brave Search API key
             timeout: Request timeout in seconds (default: 5)
             max_results: Maximum number of results to return (default: 10)
+            http_client: HTTP client to send requests with (default: a pooled
+                client owned by this provider, using HTTP/2 when available)
         """
         self.api_key = api_key
         self.base_url = "https://api.search.brave.com/res/v1/web/search"
         self.timeout = timeout
         self.max_results = max_results
+        # Built once; sent per request rather than set on the client, since
+        # an http_client passed in may be shared with other code
+        self.headers = {
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip',
+            'X-Subscription-Token': api_key
+        }
+        self.http_client = http_client or httpx.Client(
+            http2=_http2_available(),
+            limits=HTTP_LIMITS
+        )
     
     def search(self, query: str, params: Dict) -> Dict:
         """
@@ -80,58 +142,43 @@ class BraveSearchProvider(SearchProvider):
         for attempt in range(max_retries + 1):
             try:
                 return self._execute_search(query, params)
+            except Exception as e:
+                error_msg, error_type, retryable = self._classify_error(e)
                 
-            except requests.exceptions.Timeout as e:
-                error_msg = f"Search request timed out after {self.timeout} seconds"
-                logger.warning(f"{error_msg} (attempt {attempt + 1}/{max_retries + 1})")
-                
-                if attempt < max_retries:
+                if retryable and attempt < max_retries:
+                    logger.warning("%s (attempt %d/%d): %s", error_msg, attempt + 1, max_retries + 1, e)
                     # Exponential backoff
                     time.sleep(retry_delay)
                     retry_delay *= 2
-                else:
-                    logger.error(f"Search failed after {max_retries + 1} attempts: {error_msg}")
-                    raise SearchError(error_msg, 'timeout', e)
-            
-            except requests.exceptions.HTTPError as e:
-                # Check for rate limiting (429) or other HTTP errors
-                if e.response.status_code == 429:
-                    error_msg = "API rate limit exceeded"
-                    logger.error(f"{error_msg}: {e}")
-                    raise SearchError(error_msg, 'rate_limit', e)
-                elif e.response.status_code == 401:
-                    error_msg = "Invalid API key"
-                    logger.error(f"{error_msg}: {e}")
-                    raise SearchError(error_msg, 'api_error', e)
-                else:
-                    error_msg = f"HTTP error {e.response.status_code}"
-                    logger.error(f"{error_msg}: {e}")
-                    
-                    if attempt < max_retries:
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        raise SearchError(error_msg, 'api_error', e)
-            
-            except requests.exceptions.RequestException as e:
-                error_msg = f"Network error during search request"
-                logger.warning(f"{error_msg} (attempt {attempt + 1}/{max_retries + 1}): {e}")
+                    continue
                 
-                if attempt < max_retries:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    logger.error(f"Search failed after {max_retries + 1} attempts: {error_msg}")
-                    raise SearchError(error_msg, 'network_error', e)
-            
-            except Exception as e:
-                error_msg = f"Unexpected error during search"
-                logger.error(f"{error_msg}: {e}")
-                raise SearchError(error_msg, 'api_error', e)
+                logger.error("Search failed after %d attempt(s): %s: %s", attempt + 1, error_msg, e)
+                raise SearchError(error_msg, error_type, e)
         
         # Should never reach here, but just in case
         raise SearchError("Search failed for unknown reason", 'api_error', None)
     
+    def _classify_error(self, error: Exception) -> Tuple[str, str, bool]:
+        """
+        Describe a failed request for logging and SearchError.
+        
+        Args:
+            error: Exception raised by _execute_search
+            
+        Returns:
+            (message, error type, whether the request is worth retrying)
+        """
+        if isinstance(error, httpx.TimeoutException):
+            return f"Search request timed out after {self.timeout} seconds", 'timeout', True
+        if isinstance(error, httpx.HTTPStatusError):
+            status_code = error.response.status_code
+            if status_code in _FATAL_HTTP_ERRORS:
+                return _FATAL_HTTP_ERRORS[status_code] + (False,)
+            return f"HTTP error {status_code}", 'api_error', True
+        if isinstance(error, httpx.HTTPError):
+            return "Network error during search request", 'network_error', True
+        return "Unexpected error during search", 'api_error', False
+    
     def _execute_search(self, query: str, params: Dict) -> Dict:
         """
         Execute a single search request without retry logic.
@@ -144,19 +191,15 @@ class BraveSearchProvider(SearchProvider):
             Dictionary containing raw API response
             
         Raises:
-            requests.exceptions.RequestException: If the request fails
+            httpx.HTTPError: If the request fails
         """
-        # Build request headers
-        headers = {
-            'Accept': 'application/json',
-            'Accept-Encoding': 'gzip',
-            'X-Subscription-Token': self.api_key
-        }
-        
         # Build query parameters
+        # parse_results only reads web results, so don't have Brave send
+        # (and us parse) news, video and discussion sections as well
         query_params = {
             'q': query,
-            'count': params.get('count', self.max_results)
+            'count': params.get('count', self.max_results),
+            'result_filter': 'web'
         }
         
         # Add location if provided
@@ -169,12 +212,12 @@ class BraveSearchProvider(SearchProvider):
         if 'freshness' in params:
             query_params['freshness'] = params['freshness']
         
-        logger.info(f"Executing Brave Search: query='{query}', params={query_params}")
+        logger.info("Executing Brave Search: query='%s', params=%s", query, query_params)
         
         # Make API request
-        response = requests.get(
+        response = self.http_client.get(
             self.base_url,
-            headers=headers,
+            headers=self.headers,
             params=query_params,
             timeout=self.timeout
         )
@@ -182,7 +225,10 @@ class BraveSearchProvider(SearchProvider):
         # Raise exception for bad status codes
         response.raise_for_status()
         
-        # Return JSON response
+        # Return JSON response. orjson parses the raw bytes directly, several
+        # times faster than json on responses of this size.
+        if orjson is not None:
+            return orjson.loads(response.content)
         return response.json()
     
     def parse_results(self, raw_results: Dict) -> SearchResults:
@@ -199,16 +245,16 @@ class BraveSearchProvider(SearchProvider):
         web_results = raw_results.get('web', {}).get('results', [])
         
         # Parse individual results
-        parsed_results = []
-        for item in web_results:
-            result = SearchResult(
+        parsed_results = [
+            SearchResult(
                 title=item.get('title', ''),
-                url=item.get('url', ''),
+                url=(url := item.get('url', '')),
                 snippet=item.get('description', ''),
-                domain=self._extract_domain(item.get('url', '')),
+                domain=_extract_domain(url),
                 relevance_score=None  # Brave doesn't provide explicit scores
             )
-            parsed_results.append(result)
+            for item in web_results
+        ]
         
         # Create SearchResults object
         search_results = SearchResults(
@@ -216,14 +262,14 @@ class BraveSearchProvider(SearchProvider):
             results=parsed_results,
             total_results=len(parsed_results),
             search_time=0.0,  # Brave doesn't provide search time
-            timestamp=datetime.now()
+            timestamp=time.time()
         )
         
-        logger.info(f"Parsed {len(parsed_results)} results from Brave Search")
+        logger.info("Parsed %d results from Brave Search", len(parsed_results))
         
         return search_results
     
-    def is_available(self) -> bool:
+    def _check_availability(self) -> bool:
         """
         Check if Brave Search provider is configured and available.
         
@@ -265,7 +311,7 @@ class BraveSearchProvider(SearchProvider):
             'location': location
         }
         
-        logger.info(f"Searching local organizations: cause='{cause}', location='{location}'")
+        logger.info("Searching local organizations: cause='%s', location='%s'", cause, location)
         
         return self.search(query, params)
     
@@ -286,8 +332,10 @@ class BraveSearchProvider(SearchProvider):
             Raw API response dictionary
         """
         # Construct grant-specific query
-        location_str = f"in {location}" if location else ""
-        query = f"{cause} grants funding opportunities nonprofit {location_str} 2024 2025"
+        if location:
+            query = f"{cause} grants funding opportunities nonprofit in {location} 2024 2025"
+        else:
+            query = f"{cause} grants funding opportunities nonprofit 2024 2025"
         
         params = {
             'count': count,
@@ -297,7 +345,7 @@ class BraveSearchProvider(SearchProvider):
         if location:
             params['location'] = location
         
-        logger.info(f"Searching grants: cause='{cause}', location='{location}'")
+        logger.info("Searching grants: cause='%s', location='%s'", cause, location)
         
         return self.search(query, params)
     
@@ -322,23 +370,6 @@ class BraveSearchProvider(SearchProvider):
             'count': count
         }
         
-        logger.info(f"Searching resources: topic='{topic}'")
+        logger.info("Searching resources: topic='%s'", topic)
         
         return self.search(query, params)
-    
-    def _extract_domain(self, url: str) -> str:
-        """
-        Extract domain from URL.
-        
-        Args:
-            url: Full URL string
-            
-        Returns:
-            Domain name (e.g., 'example.com')
-        """
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            return parsed.netloc
-        except Exception:
-            return ''
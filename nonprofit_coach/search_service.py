@@ -5,14 +5,27 @@ This module provides a unified interface for searching the web using various
 search providers (Brave, Google, Bing) with caching support.
 """
 
-from typing import Optional, Dict, List
-from dataclasses import dataclass
+import concurrent.futures
+import logging
+import time
+from typing import Optional, Dict, List, NamedTuple, Tuple
 from datetime import datetime
 from abc import ABC, abstractmethod
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class SearchResult:
+
+def _freeze_filters(filters: Optional[Dict]) -> Optional[tuple]:
+    """Return filters as sorted (key, value) pairs, for use in a cache key."""
+    if not filters:
+        return None
+    return tuple(sorted(filters.items()))
+
+
+# Results are kept in the search cache for a day, so the records below are
+# NamedTuples: immutable and without a per-instance __dict__, a fraction of
+# the size of the equivalent dataclass
+class SearchResult(NamedTuple):
     """Individual search result from a search provider."""
     title: str
     url: str
@@ -21,18 +34,21 @@ class SearchResult:
     relevance_score: Optional[float] = None
 
 
-@dataclass
-class SearchResults:
+class SearchResults(NamedTuple):
     """Collection of search results with metadata."""
     query: str
     results: List[SearchResult]
     total_results: int
     search_time: float
-    timestamp: datetime
+    timestamp: float  # time.time() when the search ran
+    
+    @property
+    def created_at(self) -> datetime:
+        """The timestamp as a local datetime, for display."""
+        return datetime.fromtimestamp(self.timestamp)
 
 
-@dataclass
-class Organization:
+class Organization(NamedTuple):
     """Local organization or nonprofit resource."""
     name: str
     description: str
@@ -42,8 +58,7 @@ class Organization:
     relevance: str  # Why it's relevant to the nonprofit
 
 
-@dataclass
-class Grant:
+class Grant(NamedTuple):
     """Grant opportunity information."""
     name: str
     funder: str
@@ -54,8 +69,7 @@ class Grant:
     description: str
 
 
-@dataclass
-class Resource:
+class Resource(NamedTuple):
     """Tool, platform, or educational resource."""
     title: str
     url: str
@@ -82,6 +96,9 @@ class SearchService:
         """
         self.provider = provider
         self.cache = cache
+        # Availability only depends on the provider's configuration, so it
+        # is checked once (is_available also logs a warning when it fails)
+        self._available = provider.is_available()
     
     def search(self, query: str, location: Optional[str] = None, 
                filters: Optional[Dict] = None) -> Optional[SearchResults]:
@@ -96,23 +113,21 @@ class SearchService:
         Returns:
             SearchResults object or None if search fails
         """
-        # Generate cache key
-        cache_key = self.cache.generate_key(query, {
-            'location': location,
-            'filters': filters
-        })
+        if not self._available:
+            return None
+        
+        # A tuple key is hashed by the in-memory cache without serializing
+        # anything; it's only turned into a string if it reaches the database
+        cache_key = (query, location, _freeze_filters(filters))
         
         # Check cache first
         cached_results = self.cache.get(cache_key)
         if cached_results:
             return cached_results
         
-        # Check if provider is available
-        if not self.provider.is_available():
-            return None
-        
-        # Build search parameters
-        params = filters or {}
+        # Build search parameters (copied so the caller's filters are left
+        # as they were)
+        params = dict(filters or {})
         if location:
             params['location'] = location
         
@@ -130,13 +145,80 @@ class SearchService:
             
         except Exception as e:
             # Log the error with details
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Search failed for query '{query}': {type(e).__name__}: {e}")
+            logger.error("Search failed for query '%s': %s: %s", query, type(e).__name__, e)
             
             # Return None to trigger fallback to AI-only generation
             return None
     
+    def search_many(self, queries: List[str], location: Optional[str] = None,
+                    filters: Optional[Dict] = None,
+                    timeout: float = 8.0) -> Optional[SearchResults]:
+        """
+        Run several queries concurrently and merge their results.
+        
+        Queries that fail or are still running after the timeout are left
+        out, so one slow search can't hold up the others.
+        
+        Args:
+            queries: Search query strings
+            location: Optional geographic location for local results
+            filters: Optional dictionary of search filters, applied to each query
+            timeout: Seconds to wait for the queries to finish
+            
+        Returns:
+            SearchResults with duplicate URLs removed, or None if every query failed
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(queries))
+        futures = [
+            executor.submit(self.search, query, location, dict(filters or {}))
+            for query in queries
+        ]
+        done, _ = concurrent.futures.wait(futures, timeout=timeout)
+        # Don't wait for stragglers; their results are discarded
+        executor.shutdown(wait=False)
+        
+        merged = [f.result() for f in futures if f in done and f.result()]
+        if not merged:
+            return None
+        
+        results = []
+        seen_urls = set()
+        for search_results in merged:
+            for result in search_results.results:
+                if result.url not in seen_urls:
+                    seen_urls.add(result.url)
+                    results.append(result)
+        
+        return SearchResults(
+            query=" | ".join(r.query for r in merged),
+            results=results,
+            total_results=len(results),
+            search_time=max(r.search_time for r in merged),
+            timestamp=time.time()
+        )
+    
+    def search_all(self, cause: str, location: str,
+                   limit: int = 10) -> Tuple[List[Organization], List[Grant], List[Resource]]:
+        """
+        Search for local organizations, grants and resources at once.
+        
+        The three searches are independent network round trips, so they run
+        on separate threads and take about as long as the slowest one.
+        
+        Args:
+            cause: The nonprofit's cause or focus area
+            location: Geographic location to search
+            limit: Maximum number of organizations and grants
+            
+        Returns:
+            (organizations, grants, resources), each empty if its search failed
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            organizations = executor.submit(self.search_local_organizations, cause, location, limit)
+            grants = executor.submit(self.search_grants, cause, location, limit)
+            resources = executor.submit(self.search_resources, cause)
+            return organizations.result(), grants.result(), resources.result()
+    
     def search_local_organizations(self, cause: str, location: str, 
                                    limit: int = 10) -> List[Organization]:
         """
@@ -156,20 +238,20 @@ class SearchService:
         if not results:
             return []
         
-        # Convert search results to Organization objects
-        organizations = []
-        for result in results.results[:limit]:
-            org = Organization(
-                name=result.title,
-                description=result.snippet,
-                website=result.url,
+        # Convert search results to Organization objects. Unpacking each
+        # result reads its fields without a lookup per attribute.
+        relevance = f"Related to {cause}"
+        return [
+            Organization(
+                name=title,
+                description=snippet,
+                website=url,
                 location=location,
                 contact=None,  # Would need additional parsing
-                relevance=f"Related to {cause}"
+                relevance=relevance
             )
-            organizations.append(org)
-        
-        return organizations
+            for title, url, snippet, _domain, _score in results.results[:limit]
+        ]
     
     def search_grants(self, cause: str, location: Optional[str] = None,
                      limit: int = 10) -> List[Grant]:
@@ -184,28 +266,28 @@ class SearchService:
         Returns:
             List of Grant objects
         """
-        location_str = f"in {location}" if location else ""
-        query = f"{cause} grants funding opportunities {location_str}"
+        if location:
+            query = f"{cause} grants funding opportunities in {location}"
+        else:
+            query = f"{cause} grants funding opportunities"
         results = self.search(query, location=location, filters={'count': limit})
         
         if not results:
             return []
         
         # Convert search results to Grant objects
-        grants = []
-        for result in results.results[:limit]:
-            grant = Grant(
-                name=result.title,
+        return [
+            Grant(
+                name=title,
                 funder="See website for details",
                 amount=None,  # Would need additional parsing
                 deadline=None,  # Would need additional parsing
-                eligibility=result.snippet,
-                application_url=result.url,
-                description=result.snippet
+                eligibility=snippet,
+                application_url=url,
+                description=snippet
             )
-            grants.append(grant)
-        
-        return grants
+            for title, url, snippet, _domain, _score in results.results[:limit]
+        ]
     
     def search_resources(self, topic: str, limit: int = 5) -> List[Resource]:
         """
@@ -225,15 +307,13 @@ class SearchService:
             return []
         
         # Convert search results to Resource objects
-        resources = []
-        for result in results.results[:limit]:
-            resource = Resource(
-                title=result.title,
-                url=result.url,
-                description=result.snippet,
+        return [
+            Resource(
+                title=title,
+                url=url,
+                description=snippet,
                 resource_type='platform',  # Would need classification logic
                 cost=None  # Would need additional parsing
             )
-            resources.append(resource)
-        
-        return resources
+            for title, url, snippet, _domain, _score in results.results[:limit]
+        ]
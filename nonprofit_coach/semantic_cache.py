@@ -0,0 +1,242 @@
+"""
+Semantic cache for generated section content.
+
+Many users describe overlapping ideas ("tutoring program for underserved
+students") and ask for the same content type. This cache embeds each idea
+and returns previously generated content when a new idea is close enough,
+skipping the Claude call entirely.
+
+Chat replies are cached the same way, matched on the user's message within
+one idea, section and exact conversation history.
+
+Requires the optional sentence-transformers package. Without it, the cache
+reports itself as unavailable and every lookup misses.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_SIZE = 1000
+
+
+class SemanticCache:
+    """
+    In-memory cache of generated content keyed by idea embedding similarity.
+
+    Entries are bucketed by section, content type and operating location,
+    which act as hard gates: a marketing email never matches a grant proposal
+    just because the ideas read alike, and local content is never served to
+    an idea in another city. Within a bucket, the closest idea by cosine
+    similarity is a hit if it scores above the threshold.
+    
+    Chat buckets are keyed by the exact idea, section and preceding
+    conversation, so a reworded question only hits when it is asked at the
+    same point in the same conversation.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_size: int = DEFAULT_MAX_SIZE
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            model_name: sentence-transformers model used for embeddings
+            threshold: Minimum cosine similarity for a cache hit
+            max_size: Maximum number of entries per bucket
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_size = max_size
+        self._model = None
+        self._buckets: Dict[Tuple[str, ...], Tuple["np.ndarray", List[str]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["SemanticCache"]:
+        """
+        Create a cache from environment variables, or None if disabled.
+
+        Reads SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_MODEL,
+        SEMANTIC_CACHE_THRESHOLD and SEMANTIC_CACHE_MAX_SIZE.
+        """
+        if os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() != 'true':
+            return None
+
+        if not cls.is_available():
+            logger.warning(
+                "SEMANTIC_CACHE_ENABLED is set but sentence-transformers is not "
+                "installed. Semantic cache will be disabled."
+            )
+            return None
+
+        return cls(
+            model_name=os.getenv('SEMANTIC_CACHE_MODEL', DEFAULT_MODEL),
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', str(DEFAULT_THRESHOLD))),
+            max_size=int(os.getenv('SEMANTIC_CACHE_MAX_SIZE', str(DEFAULT_MAX_SIZE)))
+        )
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether the optional embedding dependencies are installed."""
+        return SentenceTransformer is not None
+
+    def get(
+        self,
+        section: str,
+        content_type: str,
+        idea_summary: Dict,
+        variant: str = ""
+    ) -> Optional[str]:
+        """
+        Return cached content for a similar idea, if any.
+
+        Args:
+            section: Section name
+            content_type: Type of content
+            idea_summary: Idea information used for similarity
+            variant: Separates content generated differently for the same
+                type, e.g. "search" for content grounded in web results
+
+        Returns:
+            Cached content or None on a miss
+        """
+        key = self._bucket_key(section, content_type, idea_summary) + (variant,)
+        return self._lookup(key, self._idea_text(idea_summary))
+
+    def set(
+        self,
+        section: str,
+        content_type: str,
+        idea_summary: Dict,
+        content: str,
+        variant: str = ""
+    ):
+        """
+        Store generated content for an idea.
+
+        Args:
+            section: Section name
+            content_type: Type of content
+            idea_summary: Idea information used for similarity
+            content: Generated content to cache
+            variant: Same as for get()
+        """
+        key = self._bucket_key(section, content_type, idea_summary) + (variant,)
+        self._store(key, self._idea_text(idea_summary), content)
+
+    def get_chat(
+        self,
+        idea_summary: Dict,
+        section: str,
+        chat_history: Optional[List[Dict]],
+        user_message: str
+    ) -> Optional[str]:
+        """
+        Return a cached reply to a similar message in the same conversation.
+
+        Args:
+            idea_summary: Idea the conversation is about
+            section: Section the chat is in
+            chat_history: Messages before user_message
+            user_message: User's chat message, used for similarity
+
+        Returns:
+            Cached reply or None on a miss
+        """
+        return self._lookup(self._chat_key(idea_summary, section, chat_history), user_message)
+
+    def set_chat(
+        self,
+        idea_summary: Dict,
+        section: str,
+        chat_history: Optional[List[Dict]],
+        user_message: str,
+        reply: str
+    ):
+        """Store a chat reply; arguments as for get_chat()."""
+        self._store(self._chat_key(idea_summary, section, chat_history), user_message, reply)
+
+    def clear(self):
+        """Clear all cached entries."""
+        with self._lock:
+            self._buckets.clear()
+
+    def _lookup(self, key: Tuple[str, ...], text: str) -> Optional[str]:
+        """Return the content stored under the most similar text in a bucket."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+
+        vector = self._embed(text)
+        vectors, contents = bucket
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        scores = vectors @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            logger.debug("Semantic cache hit for %s (score %.3f)", key[:2], scores[best])
+            return contents[best]
+        return None
+
+    def _store(self, key: Tuple[str, ...], text: str, content: str):
+        """Add content to a bucket, dropping the oldest entry when it is full."""
+        vector = self._embed(text)
+        with self._lock:
+            vectors, contents = self._buckets.get(key, (np.empty((0, vector.shape[0])), []))
+            vectors = np.vstack([vectors, vector])
+            contents = contents + [content]
+            if len(contents) > self.max_size:
+                vectors = vectors[1:]
+                contents = contents[1:]
+            self._buckets[key] = (vectors, contents)
+
+    @staticmethod
+    def _bucket_key(section: str, content_type: str, idea_summary: Dict) -> Tuple[str, str, str]:
+        """Exact-match part of the key: section, content type and location."""
+        location = str(idea_summary.get('location') or '').strip().lower()
+        return (section, content_type, location)
+
+    @staticmethod
+    def _chat_key(
+        idea_summary: Dict,
+        section: str,
+        chat_history: Optional[List[Dict]]
+    ) -> Tuple[str, str, str]:
+        """Exact-match part of a chat key: section plus a hash of the idea and history."""
+        payload = json.dumps([idea_summary, chat_history or []], sort_keys=True, default=str)
+        digest = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+        return ('chat', section, digest)
+
+    @staticmethod
+    def _idea_text(idea_summary: Dict) -> str:
+        """The parts of an idea that define what content it needs."""
+        return f"{idea_summary.get('title', '')}\n{idea_summary.get('description', '')}"
+
+    def _embed(self, text: str) -> "np.ndarray":
+        """Embed text as a normalized vector."""
+        if self._model is None:
+            # Loading the model is slow, so defer it until first use
+            with self._lock:
+                if self._model is None:
+                    self._model = SentenceTransformer(self.model_name)
+
+        return self._model.encode(text, normalize_embeddings=True)
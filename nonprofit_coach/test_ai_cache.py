@@ -0,0 +1,90 @@
+"""Tests for the AIService result cache."""
+
+import asyncio
+
+from conftest import IDEA
+
+
+def test_sync_result_is_cached(service, claude_api):
+    first = service.generate_section_content(IDEA, 'marketing', 'email')
+    second = service.generate_section_content(IDEA, 'marketing', 'email')
+
+    assert first == second == "Generated content"
+    assert claude_api.calls == 1
+
+
+def test_cached_result_short_circuits_async(service, claude_api):
+    service.generate_section_content(IDEA, 'marketing', 'email')
+
+    content = asyncio.run(service.agenerate_section_content(IDEA, 'marketing', 'email'))
+
+    assert content == "Generated content"
+    assert claude_api.calls == 1
+
+
+def test_async_result_short_circuits_sync(service, claude_api):
+    asyncio.run(service.agenerate_section_content(IDEA, 'funding', 'grant_proposal'))
+
+    content = service.generate_section_content(IDEA, 'funding', 'grant_proposal')
+
+    assert content == "Generated content"
+    assert claude_api.calls == 1
+
+
+def test_chat_context_bypasses_cache(service, claude_api):
+    chat = [{'role': 'user', 'content': 'Make it shorter'}]
+    service.generate_section_content(IDEA, 'marketing', 'email')
+
+    asyncio.run(service.agenerate_section_content(IDEA, 'marketing', 'email', chat))
+
+    assert claude_api.calls == 2
+
+
+class _BrokenSemanticCache:
+    """Semantic cache whose embedding model fails on every call."""
+
+    def __getattr__(self, name):
+        def fail(*args):
+            raise RuntimeError("embedding model unavailable")
+        return fail
+
+
+class _RecordingSemanticCache:
+    """Semantic cache that hits for every lookup and records the calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, section, content_type, idea_summary, variant=""):
+        self.calls.append(('get', section, content_type, variant))
+        return "Similar idea's content"
+
+    def get_chat(self, idea_summary, section, chat_history, user_message):
+        self.calls.append(('get_chat', section, user_message))
+        return "Similar reply"
+
+
+def test_semantic_cache_errors_are_a_miss(service, claude_api):
+    service.semantic_cache = _BrokenSemanticCache()
+
+    assert service.generate_section_content(IDEA, 'marketing', 'email') == "Generated content"
+    assert service.chat_with_context(IDEA, 'marketing', 'Ideas?') == "Generated content"
+    assert asyncio.run(service.achat_with_context(IDEA, 'team', 'Ideas?')) == "Generated content"
+    assert claude_api.calls == 3
+
+
+def test_semantic_cache_hit_skips_the_api(service, claude_api):
+    semantic_cache = service.semantic_cache = _RecordingSemanticCache()
+
+    assert service.generate_section_content(IDEA, 'marketing', 'email') == "Similar idea's content"
+    assert asyncio.run(
+        service.agenerate_section_content(IDEA, 'funding', 'donor_letter')
+    ) == "Similar idea's content"
+    assert service.chat_with_context(IDEA, 'marketing', 'Ideas?') == "Similar reply"
+
+    assert semantic_cache.calls == [
+        ('get', 'marketing', 'email', ''),
+        ('get', 'funding', 'donor_letter', ''),
+        ('get_chat', 'marketing', 'Ideas?'),
+    ]
+    assert claude_api.calls == 0
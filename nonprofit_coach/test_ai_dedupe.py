@@ -0,0 +1,101 @@
+"""Tests for coalescing identical in-flight Claude requests."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ai_service import AIServiceError
+from conftest import IDEA
+
+CHAT = [{'role': 'user', 'content': 'Make it shorter'}]
+
+
+def _run_concurrently(claude_api, fn, count=2):
+    """
+    Call fn from several threads while the first API request is held open.
+
+    Returns each call's result, or the exception it raised.
+    """
+    claude_api.release = threading.Event()
+    results = [None] * count
+
+    def call(index):
+        try:
+            results[index] = fn()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while claude_api.calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Give the other callers time to join the request in flight
+    time.sleep(0.1)
+    claude_api.release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_concurrent_identical_calls_send_one_request(service, claude_api):
+    results = _run_concurrently(
+        claude_api,
+        lambda: service.chat_with_context(IDEA, 'marketing', 'Ideas for a flyer?')
+    )
+
+    assert results == ["Generated content", "Generated content"]
+    assert claude_api.calls == 1
+
+
+def test_leader_error_reaches_followers(service, claude_api):
+    # 400 isn't retried, so the leader fails on its first attempt
+    claude_api.error_status = 400
+
+    results = _run_concurrently(
+        claude_api,
+        lambda: service.chat_with_context(IDEA, 'marketing', 'Ideas for a flyer?')
+    )
+
+    assert all(isinstance(result, AIServiceError) for result in results)
+    assert claude_api.calls == 1
+
+
+def test_failed_request_is_not_shared_with_later_calls(service, claude_api):
+    claude_api.error_status = 400
+    with pytest.raises(AIServiceError):
+        service.chat_with_context(IDEA, 'marketing', 'Ideas for a flyer?')
+
+    claude_api.error_status = None
+
+    assert service.chat_with_context(IDEA, 'marketing', 'Ideas for a flyer?') == "Generated content"
+    assert claude_api.calls == 2
+
+
+def test_concurrent_identical_async_calls_send_one_request(service, claude_api):
+    async def generate_twice():
+        return await asyncio.gather(*[
+            service.agenerate_section_content(IDEA, 'marketing', 'email', CHAT)
+            for _ in range(2)
+        ])
+
+    assert asyncio.run(generate_twice()) == ["Generated content", "Generated content"]
+    assert claude_api.calls == 1
+
+
+def test_async_leader_error_reaches_followers(service, claude_api):
+    claude_api.error_status = 400
+
+    async def generate_twice():
+        return await asyncio.gather(*[
+            service.agenerate_section_content(IDEA, 'marketing', 'email', CHAT)
+            for _ in range(2)
+        ], return_exceptions=True)
+
+    results = asyncio.run(generate_twice())
+
+    assert all(isinstance(result, AIServiceError) for result in results)
+    assert claude_api.calls == 1
@@ -0,0 +1,50 @@
+"""Tests for the per-call metrics hook."""
+
+import logging
+
+import ai_service
+from conftest import IDEA
+
+
+def test_hook_receives_cache_and_timing_metrics(claude_api):
+    received = []
+    service = ai_service.AIService("sk-test", metrics_hook=received.append)
+
+    service.generate_section_content(IDEA, 'marketing', 'email')
+
+    assert len(received) == 1
+    metrics = received[0]
+    assert metrics["cache_read_input_tokens"] == 100
+    assert metrics["ttft_ms"] >= 0
+    assert metrics["ttft_ms"] == metrics["total_ms"]
+    assert metrics["section"] == 'marketing'
+    assert metrics["content_type"] == 'email'
+
+
+def test_streaming_hook_reports_time_to_first_token(claude_api):
+    received = []
+    service = ai_service.AIService("sk-test", metrics_hook=received.append)
+
+    "".join(service.stream_section_content(IDEA, 'team', 'job_description'))
+
+    assert len(received) == 1
+    metrics = received[0]
+    assert metrics["cache_read_input_tokens"] == 100
+    assert 0 <= metrics["ttft_ms"] <= metrics["total_ms"]
+
+
+def test_default_hook_logs_metrics(service, caplog):
+    with caplog.at_level(logging.INFO, logger=ai_service.logger.name):
+        service.generate_section_content(IDEA, 'marketing', 'email')
+
+    lines = [record.getMessage() for record in caplog.records]
+    assert any("cache_read=100" in line and "ttft_ms=" in line for line in lines)
+
+
+def test_hook_errors_do_not_reach_caller(claude_api):
+    def broken_hook(metrics):
+        raise RuntimeError("hook failed")
+
+    service = ai_service.AIService("sk-test", metrics_hook=broken_hook)
+
+    assert service.generate_section_content(IDEA, 'marketing', 'email') == "Generated content"
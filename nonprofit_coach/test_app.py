@@ -0,0 +1,183 @@
+"""Tests for the Flask routes' request coalescing."""
+
+import concurrent.futures
+import json
+import threading
+import time
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+import app
+import db
+import site_generator
+
+
+def _events(response):
+    """Parse a server-sent event stream into (event, data) pairs."""
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        name = 'message'
+        for line in block.split('\n'):
+            if line.startswith('event: '):
+                name = line[len('event: '):]
+            elif line.startswith('data: '):
+                events.append((name, json.loads(line[len('data: '):])))
+    return events
+
+
+def _claim_generation(idea_id, section='marketing', content_type='email'):
+    """Become the leader for a generation, as another request would."""
+    key = ('generate', idea_id, section, content_type, json.dumps([], sort_keys=True))
+    future, leader = app.claim_flight(key)
+    assert leader
+    return key, future
+
+
+def test_single_flight_follower_times_out(monkeypatch):
+    monkeypatch.setattr(app, 'FLIGHT_TIMEOUT', 0.01)
+    key = ('test', 'timeout')
+    future, _ = app.claim_flight(key)
+    try:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            app.single_flight(key, lambda: 'not run')
+    finally:
+        app.finish_flight(key, future)
+
+
+def test_string_id_joins_the_flight_for_int_id(client, saved_idea, claude_api):
+    key, future = _claim_generation(saved_idea['id'])
+    # Resolved but not yet removed, as just before the leader finishes
+    future.set_result('From the leader')
+    try:
+        response = client.post('/api/generate', json={
+            'idea_id': str(saved_idea['id']), 'section': 'marketing', 'content_type': 'email'
+        })
+    finally:
+        with app._inflight_lock:
+            del app._inflight[key]
+
+    assert response.get_json() == {'success': True, 'content': 'From the leader'}
+    assert claude_api.calls == 0
+
+
+def test_stream_follower_reports_any_leader_error(client, saved_idea, claude_api):
+    key, future = _claim_generation(saved_idea['id'])
+    future.set_exception(RuntimeError('database is locked'))
+    try:
+        response = client.post('/api/generate/stream', json={
+            'idea_id': saved_idea['id'], 'section': 'marketing', 'content_type': 'email'
+        })
+        events = _events(response)
+    finally:
+        with app._inflight_lock:
+            del app._inflight[key]
+
+    assert events[-1][0] == 'error'
+    assert 'database is locked' in events[-1][1]['error']
+    assert claude_api.calls == 0
+
+
+def test_stream_follower_times_out(client, saved_idea, monkeypatch):
+    monkeypatch.setattr(app, 'FLIGHT_TIMEOUT', 0.01)
+    key, future = _claim_generation(saved_idea['id'])
+    try:
+        response = client.post('/api/generate/stream', json={
+            'idea_id': saved_idea['id'], 'section': 'marketing', 'content_type': 'email'
+        })
+        events = _events(response)
+    finally:
+        app.finish_flight(key, future)
+
+    assert [name for name, _ in events] == ['error']
+
+
+def _saved_content(idea_id, timeout=5):
+    """Wait for content saved by a background task, or return []."""
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = db.get_content_by_idea_and_section(idea_id, 'marketing', 'email')
+        if rows or time.monotonic() > deadline:
+            return rows
+        time.sleep(0.02)
+
+
+def test_stream_saves_content(client, saved_idea):
+    response = client.post('/api/generate/stream', json={
+        'idea_id': saved_idea['id'], 'section': 'marketing', 'content_type': 'email'
+    })
+    events = _events(response)
+
+    assert events[-1] == ('done', {'content': 'Generated content'})
+    assert _saved_content(saved_idea['id'])[0]['content'] == 'Generated content'
+
+
+def test_disconnected_stream_is_still_saved(client, saved_idea, claude_api):
+    response = client.post('/api/generate/stream', json={
+        'idea_id': saved_idea['id'], 'section': 'marketing', 'content_type': 'email'
+    }, buffered=False)
+    first_event = next(iter(response.response))
+    # The browser goes away after the first delta
+    response.close()
+
+    assert b'delta' in first_event
+    rows = _saved_content(saved_idea['id'])
+    assert [row['content'] for row in rows] == ['Generated content']
+    assert claude_api.calls == 1
+
+
+def test_stream_leader_error_reaches_follower(client, saved_idea, claude_api):
+    claude_api.error_status = 400
+    claude_api.release = threading.Event()
+    request = {'idea_id': saved_idea['id'], 'section': 'marketing', 'content_type': 'email'}
+    responses = []
+
+    def stream():
+        responses.append(_events(client.post('/api/generate/stream', json=request)))
+
+    leader = threading.Thread(target=stream)
+    leader.start()
+    deadline = time.monotonic() + 5
+    while claude_api.calls == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    follower = threading.Thread(target=stream)
+    follower.start()
+    # Give the follower time to join the flight
+    time.sleep(0.1)
+    claude_api.release.set()
+    leader.join(timeout=5)
+    follower.join(timeout=5)
+
+    assert len(responses) == 2
+    assert all(events[-1][0] == 'error' for events in responses)
+    assert claude_api.calls == 1
+    assert _saved_content(saved_idea['id'], timeout=0) == []
+
+
+def test_delete_removes_generated_site(client, saved_idea, tmp_path, monkeypatch):
+    monkeypatch.setattr(site_generator, '_SITES_ROOT', tmp_path / 'sites')
+    assert site_generator.generate_and_save_site(saved_idea)
+    site_dir = tmp_path / 'sites' / str(saved_idea['id'])
+    assert (site_dir / 'index.html').exists()
+
+    response = client.delete(f"/api/ideas/{saved_idea['id']}")
+
+    assert response.get_json()['success']
+    deadline = time.monotonic() + 5
+    while site_dir.exists() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not site_dir.exists()
+
+
+def test_orjson_provider_matches_default_provider():
+    body = {
+        'success': True,
+        'content': [{'id': 1, 'section': 'marketing', 'content': 'Café <b>night</b>', 'score': 0.5}],
+        'volunteers': [],
+        'missing': None,
+    }
+
+    orjson_body = app.OrjsonProvider(app.app).dumps(body)
+    default_body = DefaultJSONProvider(app.app).dumps(body)
+
+    assert json.loads(orjson_body) == json.loads(default_body)
@@ -0,0 +1,163 @@
+"""Tests for the database module."""
+
+import sqlite3
+
+import pytest
+
+from conftest import IDEA
+
+
+@pytest.fixture
+def idea_id(saved_idea):
+    return saved_idea['id']
+
+
+def test_string_and_int_ids_share_a_cache_entry(temp_db, idea_id):
+    temp_db.get_idea_by_id(str(idea_id))
+    temp_db.get_idea_by_id(idea_id)
+
+    assert list(temp_db._idea_cache) == [idea_id]
+
+
+def test_invalid_id_is_not_found(temp_db):
+    assert temp_db.get_idea_by_id('not-a-number') is None
+    assert temp_db.get_idea_by_id(None) is None
+
+
+def test_save_invalidates_cached_idea(temp_db, idea_id):
+    assert temp_db.get_idea_by_id(idea_id)['title'] == 'Food Bank'
+
+    # Updates arrive from JSON, where the id may be a string
+    temp_db.save_idea(dict(IDEA, id=str(idea_id), title='Food Pantry'))
+
+    assert temp_db.get_idea_by_id(idea_id)['title'] == 'Food Pantry'
+    assert temp_db.get_all_ideas()[0]['title'] == 'Food Pantry'
+
+
+def test_delete_invalidates_cached_idea(temp_db, idea_id):
+    assert temp_db.get_idea_by_id(idea_id) is not None
+    assert len(temp_db.get_all_ideas()) == 1
+
+    assert temp_db.delete_idea(idea_id)
+
+    assert temp_db.get_idea_by_id(idea_id) is None
+    assert temp_db.get_all_ideas() == []
+
+
+def test_read_racing_a_write_does_not_cache_old_row(temp_db, idea_id, monkeypatch):
+    temp_db.clear_idea_cache()
+    real_connection = temp_db._thread_connection
+
+    def connection_then_write():
+        # Another thread saves the idea after this reader missed the cache
+        # but before its stale row is stored
+        conn = real_connection()
+        stale = conn.execute('SELECT * FROM ideas WHERE id = ?', (idea_id,)).fetchone()
+        monkeypatch.setattr(temp_db, '_thread_connection', real_connection)
+        temp_db.save_idea(dict(IDEA, id=idea_id, title='Food Pantry'))
+        return _FixedRow(conn, stale)
+
+    monkeypatch.setattr(temp_db, '_thread_connection', connection_then_write)
+
+    assert temp_db.get_idea_by_id(idea_id)['title'] == 'Food Bank'
+    assert temp_db.get_idea_by_id(idea_id)['title'] == 'Food Pantry'
+
+
+class _FixedRow:
+    """Connection whose queries return a row read earlier."""
+
+    def __init__(self, conn, row):
+        self._conn = conn
+        self._row = row
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        return self
+
+    def fetchone(self):
+        return self._row
+
+
+# Schema as created before child rows cascaded on delete
+_BASELINE_SCHEMA = '''
+    CREATE TABLE ideas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT,
+        importance TEXT,
+        beneficiaries TEXT,
+        implementation TEXT,
+        significance TEXT,
+        uniqueness TEXT,
+        location TEXT,
+        api_key TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT DEFAULT 'draft'
+    );
+    CREATE TABLE content (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idea_id INTEGER NOT NULL,
+        section TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (idea_id) REFERENCES ideas (id)
+    );
+    CREATE TABLE volunteers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idea_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        address TEXT,
+        task TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (idea_id) REFERENCES ideas (id)
+    );
+    INSERT INTO ideas (id, title) VALUES (1, 'Food Bank'), (2, 'Tutoring');
+    INSERT INTO content (idea_id, section, content_type, content) VALUES
+        (1, 'marketing', 'email', 'Dear neighbor'),
+        (2, 'funding', 'grant_proposal', 'We request'),
+        (99, 'team', 'roles', 'Left by an idea deleted before deletes cascaded');
+    INSERT INTO volunteers (idea_id, name) VALUES (1, 'Sam'), (2, 'Alex');
+'''
+
+
+def test_migration_keeps_rows_and_cascades_deletes(temp_db):
+    with sqlite3.connect(temp_db.DB_PATH) as conn:
+        conn.executescript(_BASELINE_SCHEMA)
+    conn.close()
+
+    temp_db._ensure_initialized()
+
+    conn = temp_db._thread_connection()
+    for table in ('content', 'volunteers'):
+        foreign_keys = conn.execute(f'PRAGMA foreign_key_list({table})').fetchall()
+        assert [fk['on_delete'] for fk in foreign_keys] == ['CASCADE']
+    assert conn.execute('SELECT COUNT(*) FROM content').fetchone()[0] == 3
+    assert conn.execute('SELECT COUNT(*) FROM volunteers').fetchone()[0] == 2
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_content_idea', 'idx_content_idea_section', 'idx_volunteers_idea'} <= indexes
+
+    assert temp_db.delete_idea(1)
+
+    assert temp_db.get_content_by_idea_and_section(1, 'marketing') == []
+    assert temp_db.get_volunteers_by_idea(1) == []
+    assert len(temp_db.get_content_by_idea_and_section(2, 'funding')) == 1
+    assert len(temp_db.get_volunteers_by_idea(2)) == 1
+
+
+def test_migration_runs_once(temp_db):
+    with sqlite3.connect(temp_db.DB_PATH) as conn:
+        conn.executescript(_BASELINE_SCHEMA)
+    conn.close()
+    temp_db.init_db()
+
+    temp_db.init_db()
+
+    conn = temp_db._thread_connection()
+    assert conn.execute('SELECT COUNT(*) FROM content').fetchone()[0] == 3
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not {'content_old', 'volunteers_old'} & tables
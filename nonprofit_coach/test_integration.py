@@ -9,6 +9,7 @@ from db import (
     save_idea, 
     get_idea_by_id, 
     save_content, 
+    save_contents_bulk,
     get_content_by_idea_and_section,
     save_volunteer,
     get_volunteers_by_idea
@@ -106,6 +107,30 @@ def test_idea_workflow():
     updated_idea = get_idea_by_id(updated_id)
     print(f"   ✓ Idea status updated to: {updated_idea['status']}")
     
+    # Test 9: Save several content items in one transaction
+    print("\n10. Saving funding content in bulk...")
+    funding_items = [
+        {
+            'section': 'funding',
+            'content_type': 'grant_proposal',
+            'content': 'Community Food Bank requests $10,000 to expand weekend meal programs...'
+        },
+        {
+            'section': 'funding',
+            'content_type': 'donor_letter',
+            'content': 'Dear friend, your gift puts meals on the table for local families...'
+        }
+    ]
+    saved = save_contents_bulk(idea_id, funding_items)
+    funding_content = get_content_by_idea_and_section(idea_id, 'funding')
+    saved_rows = {(item['content_type'], item['content']) for item in funding_content}
+    expected_rows = {(item['content_type'], item['content']) for item in funding_items}
+    if saved == len(funding_items) and saved_rows == expected_rows:
+        print(f"   ✓ Saved and read back {saved} funding content item(s)")
+    else:
+        print(f"   ✗ Bulk save returned {saved}, read back {sorted(saved_rows)}")
+        return False
+    
     print("\n" + "=" * 60)
     print("✓ All tests passed successfully!")
     print("=" * 60)
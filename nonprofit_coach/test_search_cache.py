@@ -0,0 +1,65 @@
+"""Tests for the persistent search cache."""
+
+import sqlite3
+import time
+
+import search_cache
+from search_cache import SearchCache
+from search_service import SearchResult, SearchResults
+
+
+def _results():
+    return SearchResults(
+        query='food bank grants',
+        results=[
+            SearchResult('Grant A', 'https://a.example', 'Funds food banks', 'a.example', 0.9),
+            SearchResult('Grant B', 'https://b.example', 'Local giving', 'b.example'),
+        ],
+        total_results=2,
+        search_time=0.25,
+        timestamp=time.time()
+    )
+
+
+def test_persisted_results_are_rebuilt_as_records(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    results = _results()
+    SearchCache(db_path=db_path, cleanup_interval=0).set('key', results)
+
+    # A new cache, as in another worker process, reads the row back
+    loaded = SearchCache(db_path=db_path, cleanup_interval=0).get('key')
+
+    assert loaded == results
+    assert isinstance(loaded, SearchResults)
+    assert all(isinstance(result, SearchResult) for result in loaded.results)
+    assert loaded.created_at == results.created_at
+
+
+def test_rows_are_stored_as_json(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    SearchCache(db_path=db_path, cleanup_interval=0).set('key', _results())
+
+    with sqlite3.connect(db_path) as conn:
+        data = conn.execute('SELECT data FROM search_cache').fetchone()[0]
+
+    assert bytes(data).startswith(b'{')
+    assert b'"__type__":"SearchResults"' in bytes(data).replace(b' ', b'')
+
+
+def test_unreadable_rows_are_a_miss(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    cache = SearchCache(db_path=db_path, cleanup_interval=0)
+    cache.set('key', _results())
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE search_cache SET data = ?", (b'\x80\x04not json',))
+
+    assert SearchCache(db_path=db_path, cleanup_interval=0).get('key') is None
+
+
+def test_json_fallback_without_orjson(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_cache, 'orjson', None)
+    db_path = str(tmp_path / 'cache.db')
+    results = _results()
+    SearchCache(db_path=db_path, cleanup_interval=0).set('key', results)
+
+    assert SearchCache(db_path=db_path, cleanup_interval=0).get('key') == results
@@ -0,0 +1,72 @@
+"""Tests for saving generated sites."""
+
+import os
+
+import pytest
+
+import site_generator
+from conftest import IDEA
+
+
+@pytest.fixture
+def written(tmp_path, monkeypatch):
+    """Save sites under tmp_path and record the name of every page written."""
+    monkeypatch.setattr(site_generator, '_SITES_ROOT', tmp_path)
+    pages = []
+    write_page = site_generator._write_page
+
+    def record(filepath, data):
+        pages.append(os.path.basename(filepath))
+        write_page(filepath, data)
+
+    monkeypatch.setattr(site_generator, '_write_page', record)
+    return pages
+
+
+def test_first_save_writes_every_page(written, tmp_path):
+    assert site_generator.generate_and_save_site(IDEA)
+
+    assert sorted(written) == [
+        'funding.html', 'index.html', 'marketing.html', 'research.html', 'team.html'
+    ]
+    assert (tmp_path / '1' / 'index.html.gz').exists()
+
+
+def test_unchanged_idea_writes_nothing(written):
+    site_generator.generate_and_save_site(IDEA)
+    written.clear()
+
+    assert site_generator.generate_and_save_site(dict(IDEA))
+
+    assert written == []
+
+
+def test_changed_field_rewrites_only_its_page(written, tmp_path):
+    site_generator.generate_and_save_site(IDEA)
+    written.clear()
+
+    # Importance only appears on the home page
+    assert site_generator.generate_and_save_site(dict(IDEA, importance='Food prices doubled'))
+
+    assert written == ['index.html']
+    assert 'Food prices doubled' in (tmp_path / '1' / 'index.html').read_text(encoding='utf-8')
+
+
+def test_changed_title_rewrites_every_page(written):
+    site_generator.generate_and_save_site(IDEA)
+    written.clear()
+
+    site_generator.generate_and_save_site(dict(IDEA, title='Food Pantry'))
+
+    assert len(written) == 5
+
+
+def test_missing_page_is_rewritten(written, tmp_path):
+    site_generator.generate_and_save_site(IDEA)
+    written.clear()
+    (tmp_path / '1' / 'team.html').unlink()
+
+    # The content hash is unchanged, so save the pages directly
+    assert site_generator.save_generated_site(1, site_generator.iter_all_pages(IDEA))
+
+    assert written == ['team.html']